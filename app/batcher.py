@@ -0,0 +1,57 @@
+import asyncio
+
+class MicroBatcher:
+    """
+    Collects concurrent submit() calls per group for up to `max_wait` seconds, sorts
+    them by `sort_key` so similar items share a batch, and runs them through
+    `run_batch(group, items)` in chunks of `max_batch`. Each caller gets its own result back.
+    """
+
+    def __init__(self, run_batch, max_batch: int, max_wait: float, sort_key=None, max_pending: int = None):
+        self.run_batch = run_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.sort_key = sort_key
+        # Flush early once this many items are waiting, so latency stays bounded
+        self.max_pending = max_pending or self.max_batch * 8
+        self._pending = {}
+        self._timers = {}
+
+    async def submit(self, group, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(group, [])
+        pending.append((item, future))
+        if len(pending) >= self.max_pending:
+            self._flush(group)
+        elif group not in self._timers:
+            self._timers[group] = loop.call_later(self.max_wait, self._flush, group)
+        return await future
+
+    def _flush(self, group):
+        timer = self._timers.pop(group, None)
+        if timer:
+            timer.cancel()
+        pending = self._pending.pop(group, [])
+        if self.sort_key:
+            pending.sort(key=lambda entry: self.sort_key(entry[0]))
+        for i in range(0, len(pending), self.max_batch):
+            asyncio.ensure_future(self._run(group, pending[i:i + self.max_batch]))
+
+    async def _run(self, group, batch):
+        try:
+            results = await self.run_batch(group, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        results = list(results)
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if i < len(results):
+                future.set_result(results[i])
+            else:
+                # A short result list would otherwise leave these callers waiting forever
+                future.set_exception(RuntimeError(f"Batch returned {len(results)} results for {len(batch)} items"))
@@ -1,26 +1,48 @@
 import os
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Connection pool and write queue configuration
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+# Seconds a request waits for a free pooled connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+# Connections idle longer than this are pinged before being handed out
+DB_HEALTH_CHECK_SECONDS = float(os.getenv('DB_HEALTH_CHECK_SECONDS', 30))
+# After a failed connect, callers get no pool (and no 10 s connect timeout) for this long
+DB_RETRY_SECONDS = float(os.getenv('DB_RETRY_SECONDS', 60))
+DB_WRITE_BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', 50))
+DB_WRITE_FLUSH_MS = int(os.getenv('DB_WRITE_FLUSH_MS', 200))
+
+def _connect_params():
+    db_type = os.getenv('DB_TYPE', 'mysql')  # Default to mysql for local dev
+    return db_type, {
+        'host': os.getenv('DATABASE_HOST', 'localhost'),
+        'user': os.getenv('DATABASE_USER', 'postgres' if db_type == 'postgresql' else 'root'),
+        'password': os.getenv('DATABASE_PASSWORD', ''),
+        'database': os.getenv('DATABASE_NAME', 'video_translator'),
+    }
+
 def get_db_connection():
     """
-    Get database connection with support for both MySQL (local) and PostgreSQL (Render)
+    Get database connection with support for both MySQL (local) and PostgreSQL (Render).
+    Opens a new, unpooled connection; request handlers should use get_db_pool().
     """
-    db_type = os.getenv('DB_TYPE', 'mysql')  # Default to mysql for local dev
-    
+    db_type, params = _connect_params()
+
     try:
         if db_type == 'postgresql':
             # PostgreSQL connection for Render
             import psycopg2
             from psycopg2.extras import RealDictCursor
-            
+
             connection = psycopg2.connect(
-                host=os.getenv('DATABASE_HOST', 'localhost'),
-                user=os.getenv('DATABASE_USER', 'postgres'),
-                password=os.getenv('DATABASE_PASSWORD', ''),
-                database=os.getenv('DATABASE_NAME', 'video_translator'),
+                **params,
                 cursor_factory=RealDictCursor,
                 connect_timeout=10
             )
@@ -28,16 +50,330 @@ def get_db_connection():
         else:
             # MySQL connection for local development
             import mysql.connector
-            
+
             connection = mysql.connector.connect(
-                host=os.getenv('DATABASE_HOST', 'localhost'),
-                user=os.getenv('DATABASE_USER', 'root'),
-                password=os.getenv('DATABASE_PASSWORD', ''),
-                database=os.getenv('DATABASE_NAME', 'video_translator'),
+                **params,
                 connection_timeout=10
             )
             return connection
-            
+
     except Exception as err:
         print(f"Database connection error: {err}")
         return None
+
+class PoolTimeoutError(Exception):
+    pass
+
+class DatabasePool:
+    """
+    Fixed-size connection pool over psycopg2's ThreadedConnectionPool or mysql-connector's
+    pooling. Both raise instead of waiting when exhausted, so a semaphore makes callers
+    queue for up to DB_POOL_TIMEOUT; wait times and health-check results are tracked.
+    """
+
+    def __init__(self, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT):
+        self.db_type, params = _connect_params()
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.in_use = 0
+        self.health_check_failures = 0
+        if self.db_type == 'postgresql':
+            from psycopg2.pool import ThreadedConnectionPool
+            from psycopg2.extras import RealDictCursor
+            self._pool = ThreadedConnectionPool(
+                1, self.size, **params,
+                cursor_factory=RealDictCursor,
+                connect_timeout=10
+            )
+        else:
+            from mysql.connector import pooling
+            self._pool = pooling.MySQLConnectionPool(
+                pool_name="translator", pool_size=self.size, pool_reset_session=True,
+                **params, connection_timeout=10
+            )
+
+    def _get(self):
+        if self.db_type == 'postgresql':
+            return self._pool.getconn()
+        return self._pool.get_connection()
+
+    def _key(self, conn):
+        # mysql hands out a fresh PooledMySQLConnection wrapper per checkout; track the connection inside
+        return id(getattr(conn, '_cnx', None) or conn)
+
+    def _put(self, conn, broken: bool = False):
+        key = self._key(conn)
+        with self._lock:
+            if broken:
+                self._last_used.pop(key, None)
+            else:
+                if len(self._last_used) > 4 * self.size:
+                    # Ids of connections the driver closed on its own; forgetting them only costs a ping
+                    self._last_used.clear()
+                self._last_used[key] = time.monotonic()
+        if self.db_type == 'postgresql':
+            self._pool.putconn(conn, close=broken)
+            return
+        if broken:
+            # Drop the socket: the mysql pool reconnects a disconnected connection on its next checkout
+            try:
+                conn._cnx.disconnect()
+            except Exception:
+                pass
+        try:
+            # Closing a pooled mysql connection hands it back to the pool
+            conn.close()
+        except Exception as err:
+            if not broken:
+                print(f"[{time.strftime('%H:%M:%S')}] Returning a pooled connection failed: {err}", flush=True)
+
+    def _healthy(self, conn):
+        with self._lock:
+            last_used = self._last_used.get(self._key(conn), 0)
+        idle = time.monotonic() - last_used
+        if idle < DB_HEALTH_CHECK_SECONDS:
+            return True
+        try:
+            if self.db_type == 'postgresql':
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            else:
+                conn.ping(reconnect=True, attempts=1)
+            return True
+        except Exception as err:
+            print(f"[{time.strftime('%H:%M:%S')}] Pooled connection failed its health check: {err}", flush=True)
+            with self._lock:
+                self.health_check_failures += 1
+            return False
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits are up to the caller, errors roll back"""
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeoutError(f"No database connection free within {self.timeout}s")
+        waited = time.monotonic() - start
+        with self._lock:
+            self.acquired += 1
+            self.in_use += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        conn = None
+        broken = False
+        try:
+            conn = self._get()
+            if not self._healthy(conn):
+                self._put(conn, broken=True)
+                conn = self._get()
+            try:
+                yield conn
+            except Exception:
+                try:
+                    conn.rollback()
+                except Exception:
+                    # The connection itself is gone; don't hand it to the next caller
+                    broken = True
+                raise
+        finally:
+            if conn is not None:
+                self._put(conn, broken=broken)
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'acquired': self.acquired,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.wait_total / self.acquired * 1000, 2) if self.acquired else 0.0,
+                'max_wait_ms': round(self.wait_max * 1000, 2),
+                'health_check_failures': self.health_check_failures,
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_retry_at = 0.0
+
+def get_db_pool():
+    """Shared pool, created on first use; None if the database is unreachable (retried after DB_RETRY_SECONDS)"""
+    global _pool, _pool_retry_at
+    with _pool_lock:
+        if _pool is None:
+            if time.monotonic() < _pool_retry_at:
+                return None
+            try:
+                _pool = DatabasePool()
+            except Exception as err:
+                _pool_retry_at = time.monotonic() + DB_RETRY_SECONDS
+                print(f"Database connection error: {err} (next attempt in {DB_RETRY_SECONDS:.0f}s)")
+                return None
+        return _pool
+
+def execute_batch(statements):
+    """
+    Run [(sql, params), ...] in one transaction. Consecutive runs of the same statement
+    go through one executemany; order is preserved so an UPDATE never overtakes its INSERT.
+    """
+    pool = get_db_pool()
+    if pool is None:
+        return False
+    runs = []
+    for sql, params in statements:
+        if runs and runs[-1][0] == sql:
+            runs[-1][1].append(params)
+        else:
+            runs.append((sql, [params]))
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        for sql, rows in runs:
+            cursor.executemany(sql, rows)
+        conn.commit()
+        cursor.close()
+    return True
+
+def fetch_all(sql: str, params=()):
+    """Run a read query on a pooled connection and return rows as dicts; None without a database"""
+    pool = get_db_pool()
+    if pool is None:
+        return None
+    with pool.connection() as conn:
+        # RealDictCursor is the default for postgres connections; mysql needs asking
+        cursor = conn.cursor() if pool.db_type == 'postgresql' else conn.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        rows = [dict(row) for row in cursor.fetchall()]
+        cursor.close()
+    return rows
+
+class WriteQueue:
+    """
+    Non-blocking database writes: statements are queued from the event loop and a
+    background task flushes them in batches on a worker thread. Writes given a
+    `coalesce_key` (e.g. status updates for one job) replace any pending write with
+    the same key, so only the latest status reaches the database.
+    """
+
+    def __init__(self, batch_size: int = DB_WRITE_BATCH_SIZE, flush_interval: float = DB_WRITE_FLUSH_MS / 1000):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._counter = 0
+        self._wakeup = None
+        self._task = None
+        self.written = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.batches = 0
+
+    def enqueue(self, sql: str, params, coalesce_key=None):
+        if coalesce_key is None:
+            self._counter += 1
+            key = ('write', self._counter)
+        else:
+            key = ('coalesce', coalesce_key)
+            if key in self._pending:
+                self.coalesced += 1
+                # Keep the first write's position so statements stay in order
+                self._pending[key] = (sql, params)
+                return
+        self._pending[key] = (sql, params)
+        if self._wakeup and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        while self._pending:
+            keys = list(self._pending)[:self.batch_size]
+            batch = [self._pending.pop(key) for key in keys]
+            try:
+                written = await asyncio.to_thread(execute_batch, batch)
+            except PoolTimeoutError as err:
+                self.failed += len(batch)
+                print(f"[{time.strftime('%H:%M:%S')}] Database write batch failed: {err}", flush=True)
+                continue
+            except Exception as err:
+                # The batch was rolled back; replay it one statement at a time so a bad row fails alone
+                print(f"[{time.strftime('%H:%M:%S')}] Database write batch failed, retrying statements singly: {err}", flush=True)
+                await self._write_singly(batch)
+                continue
+            if written:
+                self.written += len(batch)
+                self.batches += 1
+            else:
+                self.failed += len(batch)
+
+    async def _write_singly(self, batch):
+        for index, statement in enumerate(batch):
+            try:
+                written = await asyncio.to_thread(execute_batch, [statement])
+            except PoolTimeoutError as err:
+                self.failed += len(batch) - index
+                print(f"[{time.strftime('%H:%M:%S')}] Database write failed: {err}", flush=True)
+                return
+            except Exception as err:
+                self.failed += 1
+                print(f"[{time.strftime('%H:%M:%S')}] Database write failed: {err} ({statement[0].split()[0]} skipped)", flush=True)
+                continue
+            if not written:
+                self.failed += len(batch) - index
+                return
+            self.written += 1
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self):
+        return {
+            'pending': len(self._pending),
+            'written': self.written,
+            'coalesced': self.coalesced,
+            'failed': self.failed,
+            'batches': self.batches,
+        }
+
+_write_queue = None
+
+def get_write_queue():
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteQueue()
+    return _write_queue
+
+def db_stats():
+    pool = _pool
+    return {
+        'pool': pool.stats() if pool else None,
+        'writes': get_write_queue().stats(),
+    }
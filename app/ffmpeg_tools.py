@@ -0,0 +1,24 @@
+import os
+import subprocess
+from app.metrics import span
+
+# Paths
+if os.name == 'nt':
+    ffmpeg_dir = r'C:\ffmpeg\ffmpeg-8.0.1-essentials_build\bin'
+    if ffmpeg_dir not in os.environ["PATH"]:
+        os.environ["PATH"] += os.pathsep + ffmpeg_dir
+    ffmpeg_cmd = os.path.join(ffmpeg_dir, 'ffmpeg.exe')
+    ffprobe_cmd = os.path.join(ffmpeg_dir, 'ffprobe.exe')
+else:
+    ffmpeg_cmd = 'ffmpeg'
+    ffprobe_cmd = 'ffprobe'
+
+def get_audio_duration(file_path):
+    cmd = [
+        ffprobe_cmd,
+        '-v', 'error', '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1', file_path
+    ]
+    with span('ffprobe'):
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    return float(result.stdout.strip())
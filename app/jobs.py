@@ -0,0 +1,176 @@
+import os
+import time
+import uuid
+import asyncio
+import traceback
+import contextvars
+from app.metrics import JobMetrics, current_job_metrics, register, Gauge, JOB_SECONDS, METRICS_PREFIX
+from app.progress import get_progress_bus
+
+# Job queue configuration
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+JOB_QUEUE_DEPTH = int(os.getenv('JOB_QUEUE_DEPTH', 8))
+JOB_HISTORY_LIMIT = int(os.getenv('JOB_HISTORY_LIMIT', 200))
+
+class QueueFullError(Exception):
+    pass
+
+# Id of the job the current worker task is running (lets job code tag its own records)
+current_job_id = contextvars.ContextVar('current_job_id', default=None)
+
+_jobs = {}
+_active_by_key = {}
+_queue = None
+_workers = []
+
+def _public_view(job):
+    return {key: value for key, value in job.items() if not key.startswith('_')}
+
+def _prune_finished_jobs():
+    finished = [job for job in _jobs.values() if job['status'] in ('completed', 'failed')]
+    if len(finished) <= JOB_HISTORY_LIMIT:
+        return
+    finished.sort(key=lambda job: job['finished_at'])
+    for job in finished[:len(finished) - JOB_HISTORY_LIMIT]:
+        _jobs.pop(job['id'], None)
+        get_progress_bus().discard(job['id'])
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue(maxsize=JOB_QUEUE_DEPTH)
+    return _queue
+
+def _new_job(status, dedupe_key=None):
+    return {
+        'id': str(uuid.uuid4()),
+        'status': status,
+        'created_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+        'result': None,
+        'error': None,
+        'metrics': None,
+        'dedupe_key': dedupe_key,
+    }
+
+def find_active_job(dedupe_key: str):
+    """Return the queued or running job submitted with dedupe_key, if any"""
+    job_id = _active_by_key.get(dedupe_key)
+    return get_job(job_id) if job_id else None
+
+def submit_job(coro_fn, *args, dedupe_key: str = None, **kwargs):
+    """
+    Queue coro_fn(*args, **kwargs) for a worker and return the job record.
+    If a job with the same dedupe_key is still queued or running, that job is
+    returned instead (with 'attached': True) and nothing new is queued.
+    Raises QueueFullError when the queue is at JOB_QUEUE_DEPTH.
+    """
+    if dedupe_key:
+        active = find_active_job(dedupe_key)
+        if active:
+            print(f"[{time.strftime('%H:%M:%S')}] Attaching to in-flight job {active['id']}", flush=True)
+            return dict(active, attached=True)
+    
+    job = _new_job('queued', dedupe_key)
+    job['_call'] = (coro_fn, args, kwargs)
+    job_id = job['id']
+    try:
+        get_queue().put_nowait(job_id)
+    except asyncio.QueueFull:
+        raise QueueFullError(f"Job queue is full ({JOB_QUEUE_DEPTH} pending jobs)")
+    _jobs[job_id] = job
+    if dedupe_key:
+        _active_by_key[dedupe_key] = job_id
+    print(f"[{time.strftime('%H:%M:%S')}] Job {job_id} queued (depth {get_queue().qsize()}/{JOB_QUEUE_DEPTH})", flush=True)
+    get_progress_bus().publish(job_id, 'queued', message="Waiting for a free worker", queue_position=get_queue().qsize())
+    return _public_view(job)
+
+def record_completed_job(result, dedupe_key: str = None):
+    """Register an already finished job (e.g. a cache hit) so clients can use the same job API"""
+    job = _new_job('completed', dedupe_key)
+    job['started_at'] = job['finished_at'] = job['created_at']
+    job['result'] = result
+    _jobs[job['id']] = job
+    get_progress_bus().publish(job['id'], 'completed', message="Served from cache", result=result)
+    _prune_finished_jobs()
+    return _public_view(job)
+
+def get_job(job_id: str):
+    job = _jobs.get(job_id)
+    if job is None:
+        return None
+    view = _public_view(job)
+    if job['status'] == 'queued':
+        view['queue_position'] = _queue_position(job_id)
+    return view
+
+def _queue_position(job_id):
+    pending = [job for job in _jobs.values() if job['status'] == 'queued']
+    pending.sort(key=lambda job: job['created_at'])
+    for position, job in enumerate(pending, start=1):
+        if job['id'] == job_id:
+            return position
+    return None
+
+async def _run_job(job):
+    coro_fn, args, kwargs = job.pop('_call')
+    job['status'] = 'running'
+    job['started_at'] = time.time()
+    print(f"[{time.strftime('%H:%M:%S')}] Job {job['id']} started", flush=True)
+    current_job_id.set(job['id'])
+    get_progress_bus().publish(job['id'], 'running', message="Job started")
+    # Stage spans recorded by the pipeline roll up into this job's metrics
+    job_metrics = JobMetrics()
+    current_job_metrics.set(job_metrics)
+    job_metrics.start_sampling()
+    try:
+        job['result'] = await coro_fn(*args, **kwargs)
+        job['status'] = 'completed'
+    except Exception as e:
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        with open("error_log.txt", "a") as f:
+            f.write(f"\n--- Error in job {job['id']} at {time.ctime()} ---\n")
+            f.write(traceback.format_exc())
+            f.write("\n")
+    finally:
+        job['finished_at'] = time.time()
+        job_metrics.stop_sampling()
+        job['metrics'] = job_metrics.summary()
+        JOB_SECONDS.observe(job['finished_at'] - job['started_at'], status=job['status'])
+        if _active_by_key.get(job['dedupe_key']) == job['id']:
+            del _active_by_key[job['dedupe_key']]
+        print(f"[{time.strftime('%H:%M:%S')}] Job {job['id']} {job['status']} in {job['finished_at'] - job['started_at']:.2f}s", flush=True)
+        if job['status'] == 'completed':
+            get_progress_bus().publish(job['id'], 'completed', message="Done", result=job['result'], metrics=job['metrics'])
+        else:
+            get_progress_bus().publish(job['id'], 'failed', message=job['error'] or "Job failed", error=job['error'])
+        _prune_finished_jobs()
+
+register(Gauge(f"{METRICS_PREFIX}_job_queue_depth", "Jobs waiting for a worker", lambda: _queue.qsize() if _queue else 0))
+register(Gauge(f"{METRICS_PREFIX}_jobs_running", "Jobs currently running", lambda: sum(1 for job in _jobs.values() if job['status'] == 'running')))
+
+async def _worker(worker_id: int):
+    queue = get_queue()
+    while True:
+        job_id = await queue.get()
+        try:
+            job = _jobs.get(job_id)
+            if job is not None:
+                await _run_job(job)
+        finally:
+            queue.task_done()
+
+async def start_workers():
+    if _workers:
+        return
+    for worker_id in range(JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker(worker_id)))
+    print(f"[{time.strftime('%H:%M:%S')}] Started {JOB_WORKERS} job workers (queue depth {JOB_QUEUE_DEPTH})", flush=True)
+
+async def stop_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -1,9 +1,18 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import translation
+from app.routers import translation, outputs
+from app import jobs
+from app.pipeline import shutdown_executors, warm_models
+from app.model_registry import readiness
+from app.database import get_write_queue, db_stats
+from app.metrics import render_prometheus
+from app.uploads import max_upload_bytes, UPLOAD_MAX_MB
+from app.output_store import get_output_store, run_janitor
+from app.voices import get_voice_catalog
+import asyncio
 import uvicorn
 import os
 import time
@@ -27,6 +36,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse multipart uploads by Content-Length before the body is read and spooled"""
+    length = request.headers.get("content-length", "")
+    if request.method == "POST" and request.url.path == "/api/translate" and length.isdigit():
+        # Allow for the multipart framing and the other form fields
+        if int(length) > max_upload_bytes() + 64 * 1024:
+            return JSONResponse(status_code=413, content={"detail": f"Upload exceeds the {UPLOAD_MAX_MB:.0f} MB limit"})
+    return await call_next(request)
+
 # Mount Static Files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -35,6 +54,26 @@ templates = Jinja2Templates(directory="templates")
 
 # Include Routers
 app.include_router(translation.router)
+app.include_router(outputs.router)
+
+@app.on_event("startup")
+async def start_job_workers():
+    # Parse voices.txt once; /api/voices and TTS voice lookups share the index
+    get_voice_catalog()
+    await jobs.start_workers()
+    await get_write_queue().start()
+    # Load models in the background so /api/health answers while they warm up
+    app.state.model_warmup = asyncio.create_task(warm_models())
+    # Keeps outputs under OUTPUT_MAX_MB / OUTPUT_TTL_HOURS, clears abandoned scratch dirs and uploads, and trims the transcript cache
+    app.state.output_janitor = asyncio.create_task(run_janitor())
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    app.state.output_janitor.cancel()
+    await jobs.stop_workers()
+    # Flush queued history writes before the process exits
+    await get_write_queue().stop()
+    shutdown_executors()
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
@@ -45,9 +84,21 @@ async def health_check():
     return {
         "status": "ok", 
         "time": time.strftime("%H:%M:%S"),
-        "environment": os.getenv("ENVIRONMENT", "development")
+        "environment": os.getenv("ENVIRONMENT", "development"),
+        "database": db_stats(),
+        "outputs": get_output_store().stats()
     }
 
+@app.get("/api/ready")
+async def readiness_check():
+    """503 until the MODEL_PRELOAD models are loaded, so traffic can wait for warm workers"""
+    return JSONResponse(status_code=200 if readiness['ready'] else 503, content=readiness)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage histograms, counters and gauges in the Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     # Local development server
     port = int(os.getenv("PORT", 8001))
@@ -0,0 +1,33 @@
+import os
+import hashlib
+from app.tts_cache import TTSCache
+
+# Downloaded media cache configuration
+MEDIA_CACHE_ENABLED = os.getenv('MEDIA_CACHE_ENABLED', '1') == '1'
+MEDIA_CACHE_DIR = os.getenv('MEDIA_CACHE_DIR', os.path.join('cache', 'media'))
+MEDIA_CACHE_MAX_MB = float(os.getenv('MEDIA_CACHE_MAX_MB', 4096))
+MEDIA_CACHE_MAX_AGE_DAYS = float(os.getenv('MEDIA_CACHE_MAX_AGE_DAYS', 7))
+
+# Streams are stored under a fixed extension per kind; ffmpeg probes the container itself
+MEDIA_EXTENSIONS = {'audio': '.audio', 'video': '.video'}
+
+def media_cache_key(source_key: str, kind: str) -> str:
+    return hashlib.sha256(f"{source_key}\x1f{kind}".encode('utf-8')).hexdigest()
+
+_media_cache = None
+
+def get_media_cache():
+    """
+    Downloaded audio/video streams keyed by source (e.g. YouTube video id). Same on-disk
+    layout, atomic writes and mtime-LRU eviction as the TTS clip cache, with its own size bound;
+    streams a running job holds stay pinned until its mux is done (see cache_leases).
+    None when MEDIA_CACHE_ENABLED=0.
+    """
+    global _media_cache
+    if _media_cache is None and MEDIA_CACHE_ENABLED:
+        _media_cache = TTSCache(
+            MEDIA_CACHE_DIR,
+            max_bytes=int(MEDIA_CACHE_MAX_MB * 1024 * 1024),
+            max_age_seconds=MEDIA_CACHE_MAX_AGE_DAYS * 86400
+        )
+    return _media_cache
@@ -0,0 +1,329 @@
+import os
+import sys
+import time
+import math
+import threading
+import contextvars
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Stage duration buckets in seconds (a TTS clip is sub-second, a long ASR run is minutes)
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+JOB_BUCKETS = (5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+OVERFLOW_BUCKETS = (0, 0.25, 0.5, 1, 2, 5)
+METRICS_PREFIX = os.getenv('METRICS_PREFIX', 'translator')
+# How often a running job samples the resident memory of the server and its worker processes
+RSS_SAMPLE_SECONDS = float(os.getenv('RSS_SAMPLE_SECONDS', 0.5))
+
+def _label_key(label_names, labels):
+    return tuple(str(labels.get(name, '')) for name in label_names)
+
+def _format_labels(label_names, key, extra=()):
+    pairs = list(zip(label_names, key)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+class Gauge:
+    """Value read at scrape time from `read_fn`, e.g. a queue depth or the process's peak RSS"""
+
+    def __init__(self, name: str, help_text: str, read_fn):
+        self.name = name
+        self.help_text = help_text
+        self.read_fn = read_fn
+
+    def render(self):
+        try:
+            value = self.read_fn()
+        except Exception:
+            return []
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {_format_value(value)}"]
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names=(), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets) + (math.inf,)
+        # label key -> [bucket counts..., sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, state):
+                    labels = _format_labels(self.label_names, key, [('le', _format_value(float(bound)))])
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {round(state[-2], 6)}")
+                lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+_registry = []
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+def render_prometheus():
+    """All registered metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def peak_rss_bytes(children: bool = False):
+    """Peak resident set size of this process (or its reaped children, e.g. ffmpeg); None without `resource`"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is kilobytes on Linux but bytes on macOS
+    return usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+
+def _proc_status_bytes(pid, field: str = 'VmRSS'):
+    """A memory field of /proc/<pid>/status in bytes; None without procfs or once the process is gone"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def _child_pids():
+    """Direct children of this process: the Whisper/Bark pool workers and any running ffmpeg"""
+    parent = os.getpid()
+    children = []
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces or parentheses; the fields after it don't
+        fields = stat[stat.rfind(')') + 2:].split()
+        if len(fields) > 1 and fields[1] == str(parent):
+            children.append(int(entry))
+    return children
+
+def current_rss_bytes():
+    """Resident memory right now of this process plus its child processes; None without procfs"""
+    total = _proc_status_bytes('self')
+    if total is None:
+        return None
+    for pid in _child_pids():
+        total += _proc_status_bytes(pid) or 0
+    return total
+
+STAGE_SECONDS = register(Histogram(f"{METRICS_PREFIX}_stage_duration_seconds", "Wall time per pipeline stage", ('stage', 'status')))
+STAGE_BYTES = register(Counter(f"{METRICS_PREFIX}_stage_bytes_total", "Bytes read or written by pipeline stages", ('stage',)))
+STAGE_ITEMS = register(Counter(f"{METRICS_PREFIX}_stage_items_total", "Segments, clips or chunks processed by pipeline stages", ('stage',)))
+CACHE_LOOKUPS = register(Counter(f"{METRICS_PREFIX}_cache_lookups_total", "Cache lookups made inside pipeline stages", ('stage', 'result')))
+JOB_SECONDS = register(Histogram(f"{METRICS_PREFIX}_job_duration_seconds", "Wall time per job", ('status',), buckets=JOB_BUCKETS))
+SEGMENT_OVERFLOW_SECONDS = register(Histogram(f"{METRICS_PREFIX}_segment_overflow_seconds", "Dubbed speech running past its time budget, per clip", buckets=OVERFLOW_BUCKETS))
+TTS_CALLS_SAVED = register(Counter(f"{METRICS_PREFIX}_tts_calls_saved_total", "TTS calls avoided by merging Whisper segments"))
+register(Gauge(f"{METRICS_PREFIX}_process_peak_rss_bytes", "Peak resident set size of the server process", peak_rss_bytes))
+register(Gauge(f"{METRICS_PREFIX}_children_peak_rss_bytes", "Peak resident set size of finished child processes", lambda: peak_rss_bytes(children=True)))
+
+class JobMetrics:
+    """
+    Per-job roll-up of the spans recorded while the job ran (attached to the job's result).
+    peak_rss is the highest resident memory of the server plus its pool workers sampled while
+    the job ran (see start_sampling); it includes jobs running alongside this one.
+    """
+
+    def __init__(self, sample_seconds: float = RSS_SAMPLE_SECONDS):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.peak_rss = None
+        self.segment_plans = {}
+        self.sample_seconds = sample_seconds
+        self._lock = threading.Lock()
+        self._stop_sampling = threading.Event()
+        self._sampler = None
+
+    def sample_rss(self):
+        rss = current_rss_bytes()
+        if rss is not None:
+            with self._lock:
+                self.peak_rss = max(self.peak_rss or 0, rss)
+
+    def _sample_until_stopped(self):
+        while not self._stop_sampling.wait(self.sample_seconds):
+            self.sample_rss()
+
+    def start_sampling(self):
+        """Sample RSS now and then every sample_seconds in a daemon thread until stop_sampling"""
+        self.sample_rss()
+        if self._sampler is None and self.sample_seconds > 0:
+            self._sampler = threading.Thread(target=self._sample_until_stopped, name="rss-sampler", daemon=True)
+            self._sampler.start()
+
+    def stop_sampling(self):
+        self._stop_sampling.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self.sample_rss()
+
+    def record(self, span, seconds: float):
+        with self._lock:
+            stage = self.stages.setdefault(span.stage, {
+                'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'bytes': 0, 'items': 0, 'cache_hits': 0, 'cache_misses': 0
+            })
+            stage['count'] += 1
+            stage['seconds'] += seconds
+            stage['max_seconds'] = max(stage['max_seconds'], seconds)
+            stage['bytes'] += span.bytes
+            stage['items'] += span.items
+            stage['cache_hits'] += span.cache_hits
+            stage['cache_misses'] += span.cache_misses
+
+    def record_plan(self, language: str, plan: dict):
+        with self._lock:
+            self.segment_plans[language] = plan
+
+    def summary(self):
+        with self._lock:
+            stages = {
+                name: dict(values, seconds=round(values['seconds'], 3), max_seconds=round(values['max_seconds'], 3))
+                for name, values in self.stages.items()
+            }
+            segment_plans = dict(self.segment_plans)
+        summary = {
+            'wall_seconds': round(time.perf_counter() - self.started, 3),
+            # Stages overlap (parallel branches, concurrent TTS), so their seconds can exceed wall time
+            'stages': stages,
+            'peak_rss_mb': round(self.peak_rss / (1024 * 1024), 1) if self.peak_rss else None
+        }
+        if segment_plans:
+            # Per language: TTS calls saved by segment planning and how clips fit their budgets
+            summary['segment_plans'] = segment_plans
+        return summary
+
+# Collector for the job the current task belongs to; copied into threads started with asyncio.to_thread
+current_job_metrics = contextvars.ContextVar('current_job_metrics', default=None)
+
+class Span:
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.bytes = 0
+        self.items = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, bytes: int = 0, items: int = 0):
+        self.bytes += bytes or 0
+        self.items += items or 0
+
+    def add_file(self, path):
+        try:
+            self.bytes += os.path.getsize(path)
+        except (OSError, TypeError):
+            pass
+
+    def cache(self, hit: bool):
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+def record_segment_plan(language: str, plan: dict):
+    """Count one dub branch's segment plan (see segment_planner) and attach it to the current job"""
+    TTS_CALLS_SAVED.inc(plan['tts_calls_saved'])
+    job_metrics = current_job_metrics.get()
+    if job_metrics is not None:
+        job_metrics.record_plan(language, plan)
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+def note_cache(hit: bool):
+    """Count a cache lookup against the innermost open span (no-op outside one)"""
+    current = _current_span.get()
+    if current is not None:
+        current.cache(hit)
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a pipeline stage: `with span('download') as s: ... s.add_file(path)`.
+    Feeds the process-wide histograms/counters and the current job's roll-up.
+    """
+    current = Span(stage)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield current
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _current_span.reset(token)
+        STAGE_SECONDS.observe(seconds, stage=stage, status=status)
+        if current.bytes:
+            STAGE_BYTES.inc(current.bytes, stage=stage)
+        if current.items:
+            STAGE_ITEMS.inc(current.items, stage=stage)
+        if current.cache_hits:
+            CACHE_LOOKUPS.inc(current.cache_hits, stage=stage, result='hit')
+        if current.cache_misses:
+            CACHE_LOOKUPS.inc(current.cache_misses, stage=stage, result='miss')
+        job_metrics = current_job_metrics.get()
+        if job_metrics is not None:
+            job_metrics.record(current, seconds)
@@ -0,0 +1,325 @@
+import os
+import time
+import wave
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app.ffmpeg_tools import ffmpeg_cmd, get_audio_duration
+
+# Mixing configuration
+MIX_ENGINE = os.getenv('MIX_ENGINE', 'numpy')  # 'numpy' or 'ffmpeg' (legacy filtergraph)
+# 0 mixes at the original audio's own sample rate (the dub track keeps its channel layout either way)
+MIX_SAMPLE_RATE = int(os.getenv('MIX_SAMPLE_RATE', 0))
+MIX_DECODE_WORKERS = int(os.getenv('MIX_DECODE_WORKERS', os.cpu_count() or 4))
+MAX_SPEED_FACTOR = 2.0
+# Unity: the filtergraph's volume=3.0 only made up for amix dividing every input by the input count
+SPEECH_GAIN = 1.0
+BACKGROUND_GAIN = 0.25
+# Background level while a dubbed segment is playing
+BACKGROUND_DUCK_GAIN = 0.08
+DUCK_RAMP_SECONDS = 0.05
+# The full-length mix is ducked and piped to ffmpeg in blocks of this many seconds,
+# so no other full-length buffer exists next to it
+MIX_BLOCK_SECONDS = 10
+PIPE_READ_BYTES = 1024 * 1024
+
+def read_pcm_wav(path: str, sample_rate: int):
+    """Read a 16-bit mono WAV at the mix rate directly; None if it needs ffmpeg"""
+    try:
+        with wave.open(path, 'rb') as f:
+            if f.getnchannels() != 1 or f.getsampwidth() != 2 or f.getframerate() != sample_rate:
+                return None
+            frames = f.readframes(f.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+def decode_audio(path: str, sample_rate: int):
+    """Decode any audio/video file to mono float32 PCM"""
+    if path.endswith('.wav'):
+        samples = read_pcm_wav(path, sample_rate)
+        if samples is not None:
+            return samples
+    cmd = [
+        ffmpeg_cmd, '-v', 'error', '-i', path,
+        '-vn', '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1'
+    ]
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+def _read_exact(stream, size: int):
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError("truncated WAV header")
+    return data
+
+def open_wav_stream(path: str, sample_rate: int = MIX_SAMPLE_RATE):
+    """
+    Start decoding `path` to float32 PCM in its own channel layout (and sample rate, unless
+    one is given) and read the WAV header ffmpeg writes first, so the format is known
+    before the samples arrive. Returns (process, channels, sample_rate); see read_wav_stream.
+    """
+    cmd = [ffmpeg_cmd, '-v', 'error', '-i', path, '-vn', '-c:a', 'pcm_f32le']
+    if sample_rate:
+        cmd += ['-ar', str(sample_rate)]
+    cmd += ['-f', 'wav', 'pipe:1']
+    # stderr goes to a file: a pipe nobody drains while the samples are read could fill and stall ffmpeg
+    error_log = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=error_log)
+    process.error_log = error_log
+    channels = None
+    try:
+        _read_exact(process.stdout, 12)
+        while True:
+            chunk = _read_exact(process.stdout, 8)
+            if chunk[:4] == b'data':
+                break
+            size = int.from_bytes(chunk[4:], 'little')
+            body = _read_exact(process.stdout, size + (size & 1))
+            if chunk[:4] == b'fmt ':
+                channels = int.from_bytes(body[2:4], 'little')
+                sample_rate = int.from_bytes(body[4:8], 'little')
+    except EOFError:
+        process.stdout.read()
+        process.wait()
+        raise subprocess.CalledProcessError(process.returncode or 1, cmd, stderr=_error_output(process))
+    return process, channels, sample_rate
+
+def _error_output(process):
+    process.error_log.seek(0)
+    error = process.error_log.read()
+    process.error_log.close()
+    return error
+
+def read_wav_stream(process, channels: int):
+    """
+    The rest of an open_wav_stream decode as a writable (frames, channels) float32 array.
+    Read into one growing buffer the array then wraps, so the samples are held only once.
+    """
+    data = bytearray()
+    for chunk in iter(lambda: process.stdout.read(PIPE_READ_BYTES), b''):
+        data += chunk
+    process.wait()
+    error = _error_output(process)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args, stderr=error)
+    frames = len(data) // (4 * channels)
+    return np.frombuffer(data, dtype=np.float32, count=frames * channels).reshape(frames, channels)
+
+def time_stretch(samples, rate: float, sample_rate: int):
+    """
+    Speed speech up by `rate` without changing pitch (WSOLA: windowed overlap-add,
+    each frame shifted within a small tolerance to line up with the previous one).
+    """
+    if rate == 1.0 or len(samples) == 0:
+        return samples
+    win_len = int(sample_rate * 0.03)
+    hop_out = win_len // 2
+    hop_in = hop_out * rate
+    tolerance = hop_out // 2
+    window = np.hanning(win_len).astype(np.float32)
+
+    out_len = int(len(samples) / rate)
+    frames = out_len // hop_out + 1
+    padded = np.concatenate([
+        np.zeros(tolerance, dtype=np.float32),
+        samples,
+        np.zeros(win_len * 2 + tolerance + int(hop_in), dtype=np.float32)
+    ])
+    out = np.zeros(frames * hop_out + win_len, dtype=np.float32)
+    norm = np.zeros_like(out)
+
+    prev = tolerance
+    for k in range(frames):
+        nominal = tolerance + int(k * hop_in)
+        if k == 0:
+            pos = nominal
+        else:
+            # Pick the frame near `nominal` that best continues the previous frame
+            natural = padded[prev + hop_out:prev + hop_out + win_len]
+            region = padded[nominal - tolerance:nominal + tolerance + win_len]
+            pos = nominal - tolerance + int(np.argmax(np.correlate(region, natural, mode='valid')))
+        out_pos = k * hop_out
+        out[out_pos:out_pos + win_len] += padded[pos:pos + win_len] * window
+        norm[out_pos:out_pos + win_len] += window
+        prev = pos
+
+    out /= np.maximum(norm, 1e-3)
+    return out[:out_len]
+
+def duck_envelope(length: int, regions, sample_rate: int, offset: int = 0):
+    """
+    Background gain curve for frames offset..offset+length: BACKGROUND_GAIN normally,
+    BACKGROUND_DUCK_GAIN inside speech regions (given in absolute frames)
+    """
+    ramp = max(1, int(sample_rate * DUCK_RAMP_SECONDS))
+    half = ramp // 2
+    # Speech indicator over the block plus the ramp's reach on either side
+    low = offset - half - 1
+    speech = np.zeros(length + ramp + 1, dtype=np.float32)
+    for start, end in regions:
+        speech[max(0, start - low):max(0, min(end, offset + length + ramp - half) - low)] = 1.0
+    # Smooth the on/off edges so ducking doesn't click (moving average via cumulative sum)
+    summed = np.cumsum(speech, dtype=np.float64)
+    speech = ((summed[ramp:ramp + length] - summed[:length]) / ramp).astype(np.float32)
+    speech *= BACKGROUND_GAIN - BACKGROUND_DUCK_GAIN
+    return np.float32(BACKGROUND_GAIN) - speech
+
+def duck_in_place(background, regions, sample_rate: int):
+    """Scale the (frames, channels) background by the duck envelope, MIX_BLOCK_SECONDS at a time"""
+    block = int(MIX_BLOCK_SECONDS * sample_rate)
+    regions = sorted(regions)
+    first = 0
+    for offset in range(0, len(background), block):
+        length = min(block, len(background) - offset)
+        reach = int(sample_rate * DUCK_RAMP_SECONDS)
+        # Only regions within the ramp's reach of this block affect it
+        while first < len(regions) and regions[first][1] + reach < offset:
+            first += 1
+        nearby = [region for region in regions[first:] if region[0] - reach <= offset + length]
+        background[offset:offset + length] *= duck_envelope(length, nearby, sample_rate, offset)[:, None]
+
+def render_dub_audio(original_audio: str, placements, sample_rate: int = MIX_SAMPLE_RATE):
+    """
+    Overlay TTS clips onto the ducked original audio. The mix keeps the original's sample
+    rate and channel layout (so a stereo bed stays stereo); the mono clips go to every channel.
+    `placements` is a list of {'start', 'duration', 'path'} in seconds.
+    Returns (pcm, sample_rate, fits): pcm is (frames, channels) and fits lists
+    (speed factor, seconds past the slot) per clip.
+    """
+    process, channels, sample_rate = open_wav_stream(original_audio, sample_rate)
+    try:
+        with ThreadPoolExecutor(max_workers=MIX_DECODE_WORKERS) as pool:
+            # Clips decode at the original's rate while its samples are still streaming in
+            clip_futures = [pool.submit(decode_audio, p['path'], sample_rate) for p in placements]
+            background = read_wav_stream(process, channels)
+            clips = [future.result() for future in clip_futures]
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    regions = []
+    fits = []
+    for i, (placement, clip) in enumerate(zip(placements, clips)):
+        slot = placement['duration']
+        clip_seconds = len(clip) / sample_rate
+        # Speed up clips that overrun their slot, capped to stay intelligible
+        speed = 1.0
+        if clip_seconds > slot > 0:
+            speed = min(clip_seconds / slot, MAX_SPEED_FACTOR)
+            clips[i] = clip = time_stretch(clip, speed, sample_rate)
+        fits.append((speed, max(0.0, len(clip) / sample_rate - slot)))
+
+        start = int(placement['start'] * sample_rate)
+        end = min(start + len(clip), len(background))
+        regions.append((start, end))
+
+    # Everything happens in the background's own buffer: duck it, then add the speech on top
+    duck_in_place(background, [region for region in regions if region[0] < region[1]], sample_rate)
+    for i, (start, end) in enumerate(regions):
+        if start < end:
+            background[start:end] += clips[i][:end - start, None] * SPEECH_GAIN
+        clips[i] = None
+    np.clip(background, -1.0, 1.0, out=background)
+    return background, sample_rate, fits
+
+def mux_video_with_pcm(video_path: str, pcm, output_video_path: str, sample_rate: int):
+    """
+    Single ffmpeg pass: copy the video stream and encode the mixed (frames, channels) PCM to AAC.
+    The PCM is written to ffmpeg's stdin block by block, straight from the array's memory.
+    """
+    cmd = [
+        ffmpeg_cmd, '-y', '-v', 'error',
+        '-i', video_path,
+        '-f', 'f32le', '-ar', str(sample_rate), '-ac', str(pcm.shape[1]), '-i', 'pipe:0',
+        '-map', '0:v',
+        '-map', '1:a',
+        '-c:v', 'copy',
+        '-c:a', 'aac',
+        '-shortest',
+        output_video_path
+    ]
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    block = int(MIX_BLOCK_SECONDS * sample_rate)
+    try:
+        for offset in range(0, len(pcm), block):
+            process.stdin.write(np.ascontiguousarray(pcm[offset:offset + block]).data)
+    except BrokenPipeError:
+        # -shortest: ffmpeg stops reading once the video ends
+        pass
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        process.wait()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
+
+def mix_segments_numpy(video_path: str, original_audio: str, placements, output_video_path: str):
+    pcm, sample_rate, fits = render_dub_audio(original_audio, placements)
+    mux_video_with_pcm(video_path, pcm, output_video_path, sample_rate)
+    return fits
+
+def mix_segments_filtergraph(video_path: str, original_audio: str, placements, output_video_path: str):
+    """Legacy path: ffprobe every clip, then one ffmpeg run with an N-input amix"""
+    audio_filters = []
+    input_files = [video_path, original_audio]
+    fits = []
+    for i, placement in enumerate(placements):
+        duration = placement['duration']
+        tts_duration = get_audio_duration(placement['path'])
+
+        # Calculate speed factor if TTS is longer than original duration
+        # We cap speed at 2.0x to keep it somewhat intelligible
+        speed_factor = 1.0
+        if tts_duration > duration and duration > 0:
+            speed_factor = min(tts_duration / duration, MAX_SPEED_FACTOR)
+        fits.append((speed_factor, max(0.0, tts_duration / speed_factor - duration)))
+
+        # Add to FFmpeg inputs
+        input_files.append(placement['path'])
+        input_idx = len(input_files) - 1
+
+        # Prepare filter for this segment: speed up, boost volume, then delay
+        delay_ms = int(placement['start'] * 1000)
+        # We boost volume by 3.0x to ensure it's very audible
+        if speed_factor != 1.0:
+            # atempo filter for speed without changing pitch
+            filter_str = f"[{input_idx}:a]atempo={speed_factor},volume=3.0,adelay={delay_ms}|{delay_ms}[a{i}]"
+        else:
+            filter_str = f"[{input_idx}:a]volume=3.0,adelay={delay_ms}|{delay_ms}[a{i}]"
+        audio_filters.append(filter_str)
+
+    # Combine all segments and original audio (at lower volume)
+    # [1:a] is original audio
+    mix_inputs = "".join([f"[a{i}]" for i in range(len(placements))])
+    amix_filter = f"[1:a]volume=0.1[bg_low];{';'.join(audio_filters)};[bg_low]{mix_inputs}amix=inputs={len(placements) + 1}:duration=first,volume=2.0[outa]"
+
+    cmd = [ffmpeg_cmd, '-y']
+    for f in input_files:
+        cmd.extend(['-i', f])
+
+    cmd.extend([
+        '-filter_complex', amix_filter,
+        '-map', '0:v',
+        '-map', '[outa]',
+        '-c:v', 'copy',
+        '-c:a', 'aac',
+        '-shortest',
+        output_video_path
+    ])
+    subprocess.run(cmd, check=True)
+    return fits
+
+def mix_segments(video_path: str, original_audio: str, placements, output_video_path: str):
+    """Render the dubbed video with the configured MIX_ENGINE; returns per-clip (speed factor, overflow seconds)"""
+    start = time.time()
+    if MIX_ENGINE == 'ffmpeg':
+        fits = mix_segments_filtergraph(video_path, original_audio, placements, output_video_path)
+    else:
+        fits = mix_segments_numpy(video_path, original_audio, placements, output_video_path)
+    print(f"[{time.strftime('%H:%M:%S')}] Mixed {len(placements)} segments with {MIX_ENGINE} engine in {time.time() - start:.2f}s", flush=True)
+    return fits
@@ -0,0 +1,120 @@
+import os
+import gc
+import time
+import threading
+from collections import OrderedDict
+import torch
+
+# Model registry configuration
+MODEL_DEVICE = os.getenv('MODEL_DEVICE', 'auto')  # 'auto', 'cpu' or 'cuda'
+# Comma-separated models to load at startup, e.g. "whisper:tiny,bark"
+MODEL_PRELOAD = [name.strip() for name in os.getenv('MODEL_PRELOAD', '').split(',') if name.strip()]
+# Resident model budget; least recently used models are dropped past it (0 = no limit)
+MODEL_MEMORY_BUDGET_MB = int(os.getenv('MODEL_MEMORY_BUDGET_MB', 0))
+
+# Rough in-memory sizes used to make room before a model is loaded
+ESTIMATED_SIZES_MB = {
+    'whisper:tiny': 150,
+    'whisper:base': 290,
+    'whisper:small': 970,
+    'whisper:medium': 3000,
+    'whisper:large': 6200,
+    'faster-whisper:tiny': 75,
+    'faster-whisper:base': 150,
+    'faster-whisper:small': 500,
+    'faster-whisper:medium': 1500,
+    'faster-whisper:large-v3': 3100,
+    'bark': 1700,
+}
+
+_device = None
+
+def get_device():
+    """Pick the torch device once for every model in this process"""
+    global _device
+    if _device is None:
+        if MODEL_DEVICE == 'auto':
+            _device = "cuda" if torch.cuda.is_available() else "cpu"
+        else:
+            _device = MODEL_DEVICE
+        print(f"[{time.strftime('%H:%M:%S')}] Using {_device} for models.", flush=True)
+    return _device
+
+def model_nbytes(model):
+    """Parameter and buffer bytes of a torch module (or the first module in a tuple)"""
+    if isinstance(model, tuple):
+        model = model[0]
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except AttributeError:
+        return 0
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+class ModelRegistry:
+    """
+    Named model loaders with lazy, thread-safe loading and an LRU memory budget.
+    Loader names look like "whisper:base"; the prefix picks the loader and the
+    rest is passed to it.
+    """
+
+    def __init__(self, budget_mb: int = 0):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.loaders = {}
+        self.models = OrderedDict()
+        self.sizes = {}
+        self._lock = threading.RLock()
+
+    def register(self, prefix: str, loader):
+        self.loaders[prefix] = loader
+
+    def get(self, name: str):
+        with self._lock:
+            if name in self.models:
+                self.models.move_to_end(name)
+                return self.models[name]
+            prefix, _, variant = name.partition(':')
+            if prefix not in self.loaders:
+                raise KeyError(f"Unknown model: {name}")
+            self._make_room(name, ESTIMATED_SIZES_MB.get(name, 0) * 1024 * 1024)
+            start = time.time()
+            print(f"[{time.strftime('%H:%M:%S')}] Loading {name} model... This might take a minute the first time.", flush=True)
+            model = self.loaders[prefix](variant, get_device())
+            self.models[name] = model
+            self.sizes[name] = model_nbytes(model) or ESTIMATED_SIZES_MB.get(name, 0) * 1024 * 1024
+            print(f"[{time.strftime('%H:%M:%S')}] {name} loaded in {time.time() - start:.1f}s ({self.sizes[name] / 1024 / 1024:.0f} MB).", flush=True)
+            self._make_room(name, 0)
+            return model
+
+    def _make_room(self, keep: str, incoming: int):
+        if self.budget_bytes <= 0:
+            return
+        while self.models and sum(self.sizes.values()) + incoming > self.budget_bytes:
+            victim = next(iter(self.models))
+            if victim == keep:
+                break
+            self.evict(victim)
+
+    def evict(self, name: str):
+        with self._lock:
+            if self.models.pop(name, None) is None:
+                return
+            self.sizes.pop(name, None)
+            print(f"[{time.strftime('%H:%M:%S')}] Evicted {name} model to stay within the memory budget.", flush=True)
+        gc.collect()
+        if get_device() == "cuda":
+            torch.cuda.empty_cache()
+
+    def resident(self):
+        with self._lock:
+            return {name: round(self.sizes[name] / 1024 / 1024) for name in self.models}
+
+_registry = None
+
+def get_model_registry():
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry(MODEL_MEMORY_BUDGET_MB)
+    return _registry
+
+# Warm-up state reported by /api/ready (kept in the web process)
+readiness = {'ready': not MODEL_PRELOAD, 'models': {}, 'error': None}
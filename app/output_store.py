@@ -0,0 +1,190 @@
+import os
+import re
+import time
+import uuid
+import asyncio
+import threading
+from app.scratch import sweep_scratch
+from app.transcript_cache import get_transcript_cache
+from app.uploads import get_upload_sessions
+
+# Output store configuration
+OUTPUT_DIR = os.getenv('OUTPUT_DIR', 'outputs')
+OUTPUT_MAX_MB = float(os.getenv('OUTPUT_MAX_MB', 2048))
+# Outputs nobody has fetched (or hit in the result cache) for this long are deleted
+OUTPUT_TTL_HOURS = float(os.getenv('OUTPUT_TTL_HOURS', 72))
+OUTPUT_JANITOR_INTERVAL_SECONDS = float(os.getenv('OUTPUT_JANITOR_INTERVAL_SECONDS', 300))
+
+# Served under /outputs/<kind>/<name>
+OUTPUT_KINDS = ('video', 'subtitles')
+OUTPUT_URL_PREFIX = '/outputs/'
+# Outputs written or served within this window are never evicted for space
+EVICTION_GRACE_SECONDS = 600
+
+OUTPUT_NAME = re.compile(r'[\w.-]+')
+
+class OutputStore:
+    """
+    Finished job outputs (dubbed videos, subtitle files) under OUTPUT_DIR/<kind>/.
+    The access time is the LRU clock: serving a file or answering a request from the
+    result cache refreshes it (the mtime, and so the ETag used for range requests, stays).
+    sweep() deletes outputs idle for longer than the TTL, then least recently used ones
+    until the store is under its quota, and drops result cache entries that pointed at them.
+    """
+
+    def __init__(self, root: str, max_bytes: int, max_age_seconds: float):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.evictions = 0
+        self.last_sweep = None
+        # Bytes on disk as of the last sweep plus everything added since
+        self._total = None
+        self._lock = threading.Lock()
+
+    def directory(self, kind: str):
+        if kind not in OUTPUT_KINDS:
+            raise KeyError(kind)
+        path = os.path.join(self.root, kind)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def path(self, kind: str, name: str):
+        """On-disk path of an output; KeyError for unknown kinds or names that aren't a plain file name"""
+        if not OUTPUT_NAME.fullmatch(name or '') or name.startswith('.'):
+            raise KeyError(name)
+        return os.path.join(self.directory(kind), name)
+
+    def url(self, kind: str, name: str):
+        return f"{OUTPUT_URL_PREFIX}{kind}/{name}"
+
+    def new_output(self, kind: str, prefix: str, ext: str):
+        """A fresh (path, url) pair to write a job's output to"""
+        name = f"{prefix}_{uuid.uuid4()}{ext}"
+        return self.path(kind, name), self.url(kind, name)
+
+    def path_for_url(self, url: str):
+        """File behind an /outputs/ URL, or None for other URLs"""
+        if not (url or '').startswith(OUTPUT_URL_PREFIX):
+            return None
+        kind, _, name = url[len(OUTPUT_URL_PREFIX):].partition('/')
+        try:
+            return self.path(kind, name)
+        except KeyError:
+            return None
+
+    def touch(self, path: str):
+        """Mark an output as used now (atime only, so Last-Modified and the ETag don't change)"""
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+
+    def added(self, path: str):
+        """Account for a newly written output; sweeps early if it takes the store over quota"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._total is None:
+                return
+            self._total += size
+            over = self._total > self.max_bytes
+        if over:
+            self.sweep()
+
+    def _entries(self):
+        for kind in OUTPUT_KINDS:
+            directory = os.path.join(self.root, kind)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                # An output used either way counts as used: freshly written or freshly served
+                last_used = max(stat.st_atime, stat.st_mtime)
+                yield last_used, stat.st_size, path, self.url(kind, name)
+
+    def sweep(self):
+        """Expire idle outputs, then evict least recently used ones down to the quota"""
+        now = time.time()
+        entries = []
+        total = 0
+        removed = []
+        for last_used, size, path, url in self._entries():
+            if now - last_used > self.max_age_seconds:
+                if self._remove(path):
+                    removed.append(url)
+                continue
+            entries.append((last_used, size, path, url))
+            total += size
+
+        entries.sort()
+        for last_used, size, path, url in entries:
+            if total <= self.max_bytes:
+                break
+            if now - last_used < EVICTION_GRACE_SECONDS:
+                break
+            if self._remove(path):
+                removed.append(url)
+                total -= size
+
+        if removed:
+            # Cached results that point at a deleted output would only be misses now
+            from app.result_cache import get_result_cache
+            cache = get_result_cache()
+            if cache:
+                cache.delete_outputs(removed)
+            print(f"[{time.strftime('%H:%M:%S')}] Output janitor removed {len(removed)} outputs ({total / (1024 * 1024):.0f} MB kept)", flush=True)
+        with self._lock:
+            self._total = total
+            self.last_sweep = now
+        return removed
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+        with self._lock:
+            self.evictions += 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'bytes': self._total,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'last_sweep': self.last_sweep,
+            }
+
+_output_store = None
+
+def get_output_store():
+    global _output_store
+    if _output_store is None:
+        _output_store = OutputStore(
+            OUTPUT_DIR,
+            max_bytes=int(OUTPUT_MAX_MB * 1024 * 1024),
+            max_age_seconds=OUTPUT_TTL_HOURS * 3600
+        )
+    return _output_store
+
+async def run_janitor(interval: float = OUTPUT_JANITOR_INTERVAL_SECONDS):
+    """Background task: sweep the output store, stale scratch directories, abandoned uploads and the transcript cache every `interval` seconds"""
+    while True:
+        try:
+            await asyncio.to_thread(get_output_store().sweep)
+            await asyncio.to_thread(sweep_scratch)
+            await asyncio.to_thread(get_upload_sessions().expire)
+            transcripts = get_transcript_cache()
+            if transcripts:
+                await asyncio.to_thread(transcripts.evict)
+        except Exception as e:
+            print(f"[{time.strftime('%H:%M:%S')}] Output janitor error: {e}", flush=True)
+        await asyncio.sleep(interval)
@@ -3,88 +3,380 @@ import time
 import uuid
 import asyncio
 import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import yt_dlp
 import whisper
-from deep_translator import GoogleTranslator
+import numpy as np
 from typing import Optional
 import edge_tts
 import torch
 import scipy.io.wavfile as wavfile
 from transformers import AutoProcessor, BarkModel
+from app.ffmpeg_tools import ffmpeg_cmd
+from app.mixer import mix_segments
+from app.translators import get_translator_backend
+from app.tts_scheduler import synthesize_in_order, call_with_retry, make_limits, TTS_MAX_IN_FLIGHT
+from app.stage_queue import StageQueue, END_OF_STREAM
+from app.batcher import MicroBatcher
+from app.tts_cache import get_tts_cache, cache_key, cache_leases
+from app.translation_memory import get_translation_memory
+from app.transcript_cache import get_transcript_cache, transcript_cache_key
+from app.result_cache import sha256_file, source_key_for_url
+from app.media_cache import get_media_cache, media_cache_key, MEDIA_EXTENSIONS
+from app.model_registry import get_model_registry, get_device, readiness, MODEL_PRELOAD
+from app.metrics import span, note_cache, record_segment_plan, SEGMENT_OVERFLOW_SECONDS
+from app.progress import get_progress_bus, stage_percent
+from app.jobs import current_job_id
+from app.subtitles import write_subtitles, mux_soft_subtitles
+from app.segment_planner import SegmentPlanner, plan_segments, overflow_summary
+from app.output_store import get_output_store
+from app.scratch import job_scratch, scratch_dir
+from app.voices import get_voice_catalog
 
-# Paths
-# Paths
-if os.name == 'nt':
-    ffmpeg_dir = r'C:\ffmpeg\ffmpeg-8.0.1-essentials_build\bin'
-    if ffmpeg_dir not in os.environ["PATH"]:
-        os.environ["PATH"] += os.pathsep + ffmpeg_dir
-    ffmpeg_cmd = os.path.join(ffmpeg_dir, 'ffmpeg.exe')
-    ffprobe_cmd = os.path.join(ffmpeg_dir, 'ffprobe.exe')
-else:
-    ffmpeg_cmd = 'ffmpeg'
-    ffprobe_cmd = 'ffprobe'
-
-# Model Cache
-_whisper_model = None
-
-def get_whisper_model():
-    global _whisper_model
-    if _whisper_model is None:
-        print(f"[{time.strftime('%H:%M:%S')}] Loading Whisper tiny model... This might take a minute the first time.", flush=True)
-        _whisper_model = whisper.load_model("tiny")
-        print(f"[{time.strftime('%H:%M:%S')}] Whisper model loaded.", flush=True)
-    return _whisper_model
+# Worker pool for CPU-bound stages (Whisper, Bark). CPU_WORKERS=0 runs them in threads instead.
+CPU_WORKERS = int(os.getenv('CPU_WORKERS', 1))
+_cpu_executor = None
+
+def get_cpu_executor():
+    global _cpu_executor
+    if _cpu_executor is None and CPU_WORKERS > 0:
+        # spawn avoids forking a parent that already holds torch threads
+        _cpu_executor = ProcessPoolExecutor(
+            max_workers=CPU_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=preload_models,
+            initargs=(MODEL_PRELOAD,)
+        )
+    return _cpu_executor
+
+async def run_cpu_bound(fn, *args):
+    """Run a CPU-heavy, picklable function in the process pool without blocking the event loop"""
+    executor = get_cpu_executor()
+    if executor is None:
+        return await asyncio.to_thread(fn, *args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, fn, *args)
+
+async def run_blocking(fn, *args):
+    """Run blocking I/O (yt-dlp, ffmpeg, ffprobe) in a thread"""
+    return await asyncio.to_thread(fn, *args)
+
+# Parallel chunked transcription: ASR_PARALLEL_WORKERS processes, each with its own model
+ASR_PARALLEL_WORKERS = int(os.getenv('ASR_PARALLEL_WORKERS', 0))
+ASR_CHUNK_SECONDS = float(os.getenv('ASR_CHUNK_SECONDS', 60))
+# Extra audio decoded on each side of a chunk so words at a cut aren't clipped
+ASR_CHUNK_OVERLAP_SECONDS = float(os.getenv('ASR_CHUNK_OVERLAP_SECONDS', 1.0))
+_asr_executor = None
+
+def _init_asr_worker(threads: int):
+    # Split the cores between workers instead of every model grabbing all of them
+    torch.set_num_threads(threads)
+    get_asr_backend().load()
+
+def get_asr_executor():
+    global _asr_executor
+    if _asr_executor is None:
+        _asr_executor = ProcessPoolExecutor(
+            max_workers=ASR_PARALLEL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_asr_worker,
+            initargs=(max(1, (os.cpu_count() or 1) // ASR_PARALLEL_WORKERS),)
+        )
+    return _asr_executor
+
+def shutdown_executors():
+    global _cpu_executor, _asr_executor
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False, cancel_futures=True)
+        _cpu_executor = None
+    if _asr_executor is not None:
+        _asr_executor.shutdown(wait=False, cancel_futures=True)
+        _asr_executor = None
+
+# yt-dlp: audio and video are fetched as separate streams so ASR can start on the audio
+YTDLP_CONCURRENT_FRAGMENTS = int(os.getenv('YTDLP_CONCURRENT_FRAGMENTS', 8))
+YTDLP_FORMATS = {
+    'audio': 'bestaudio[ext=m4a]/bestaudio/best',
+    'video': 'bestvideo[ext=mp4]/bestvideo/best[ext=mp4]/best',
+}
+
+# Model Cache (loaded through the registry so sizes can share one memory budget)
+WHISPER_MODEL_NAME = os.getenv('WHISPER_MODEL', 'tiny')
+WHISPER_OPTIONS = {'fp16': False}
+
+def _load_whisper(size: str, device: str):
+    return whisper.load_model(size, device=device)
+
+def get_whisper_model(size: Optional[str] = None):
+    return get_model_registry().get(f"whisper:{size or WHISPER_MODEL_NAME}")
+
+# ASR engine: 'whisper' (openai-whisper, default) or 'faster-whisper' (CTranslate2, int8 on CPU)
+ASR_BACKEND = os.getenv('ASR_BACKEND', 'whisper')
+ASR_COMPUTE_TYPE = os.getenv('ASR_COMPUTE_TYPE', 'int8')
+ASR_BATCH_SIZE = int(os.getenv('ASR_BATCH_SIZE', 8))
+ASR_VAD = os.getenv('ASR_VAD', '1') == '1'
+ASR_CPU_THREADS = int(os.getenv('ASR_CPU_THREADS', 0))
+
+try:
+    from faster_whisper import WhisperModel as FasterWhisperModel
+    try:
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError:
+        BatchedInferencePipeline = None
+except ImportError:
+    FasterWhisperModel = None
+    BatchedInferencePipeline = None
+
+def _load_faster_whisper(size: str, device: str):
+    if FasterWhisperModel is None:
+        raise RuntimeError("ASR_BACKEND=faster-whisper needs the faster-whisper package (pip install faster-whisper)")
+    compute_type = ASR_COMPUTE_TYPE if device == "cpu" else "float16"
+    return FasterWhisperModel(size, device=device, compute_type=compute_type, cpu_threads=ASR_CPU_THREADS)
+
+class ASRBackend:
+    """Speech recognition engine; transcribe() returns Whisper's {'text', 'language', 'segments'} shape"""
+    name = ""
+
+    def __init__(self, size: str):
+        self.size = size
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the model/settings in transcript cache keys"""
+        return f"{self.name}:{self.size}"
+
+    def load(self):
+        raise NotImplementedError
+
+    def transcribe(self, audio, language: Optional[str] = None) -> dict:
+        raise NotImplementedError
+
+class WhisperASRBackend(ASRBackend):
+    name = "whisper"
+
+    @property
+    def model_id(self) -> str:
+        # Bare size keeps transcripts cached before the backend option valid
+        return self.size
+
+    def load(self):
+        return get_whisper_model(self.size)
+
+    def transcribe(self, audio, language: Optional[str] = None) -> dict:
+        options = dict(WHISPER_OPTIONS)
+        if language:
+            options['language'] = language
+        return self.load().transcribe(audio, **options)
+
+class FasterWhisperASRBackend(ASRBackend):
+    """CTranslate2 Whisper: int8 weights on CPU, VAD-chunked and batched decoding"""
+    name = "faster-whisper"
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.name}:{self.size}:{ASR_COMPUTE_TYPE}:vad={int(ASR_VAD)}"
+
+    def load(self):
+        return get_model_registry().get(f"faster-whisper:{self.size}")
+
+    def transcribe(self, audio, language: Optional[str] = None) -> dict:
+        model = self.load()
+        if BatchedInferencePipeline is not None and ASR_BATCH_SIZE > 1:
+            # Batched mode splits on VAD speech regions and decodes them together
+            batched = BatchedInferencePipeline(model=model)
+            segments, info = batched.transcribe(audio, language=language, batch_size=ASR_BATCH_SIZE)
+        else:
+            segments, info = model.transcribe(audio, language=language, vad_filter=ASR_VAD)
+        result_segments = []
+        for seg in segments:
+            result_segments.append({
+                'id': len(result_segments),
+                'seek': seg.seek,
+                'start': seg.start,
+                'end': seg.end,
+                'text': seg.text,
+                'tokens': list(seg.tokens),
+                'temperature': seg.temperature,
+                'avg_logprob': seg.avg_logprob,
+                'compression_ratio': seg.compression_ratio,
+                'no_speech_prob': seg.no_speech_prob,
+            })
+        return {
+            'text': "".join(seg['text'] for seg in result_segments),
+            'language': info.language,
+            'segments': result_segments
+        }
+
+ASR_BACKENDS = {
+    WhisperASRBackend.name: WhisperASRBackend,
+    FasterWhisperASRBackend.name: FasterWhisperASRBackend,
+}
+_asr_backend = None
+
+def get_asr_backend():
+    global _asr_backend
+    if _asr_backend is None:
+        if ASR_BACKEND not in ASR_BACKENDS:
+            raise ValueError(f"Unknown ASR_BACKEND: {ASR_BACKEND}")
+        _asr_backend = ASR_BACKENDS[ASR_BACKEND](WHISPER_MODEL_NAME)
+    return _asr_backend
+
+# Streaming mode: overlap ASR, translation and TTS through bounded queues
+STREAMING_PIPELINE = os.getenv('STREAMING_PIPELINE', '0') == '1'
+STREAM_CHUNK_SECONDS = float(os.getenv('STREAM_CHUNK_SECONDS', 30))
+STREAM_QUEUE_SIZE = int(os.getenv('STREAM_QUEUE_SIZE', 32))
+STREAM_TRANSLATE_BATCH = int(os.getenv('STREAM_TRANSLATE_BATCH', 16))
+WHISPER_SAMPLE_RATE = 16000
 
 # Model Cache for Bark
-_bark_model = None
-_bark_processor = None
+BARK_MODEL_NAME = "suno/bark-small"
+# Segments generated per model.generate call, and how long to wait for a batch to fill
+BARK_BATCH_SIZE = int(os.getenv('BARK_BATCH_SIZE', 8))
+BARK_BATCH_WAIT_MS = int(os.getenv('BARK_BATCH_WAIT_MS', 50))
+BARK_NUM_THREADS = int(os.getenv('BARK_NUM_THREADS', 0))  # 0 keeps torch's default
+BARK_QUANTIZE = os.getenv('BARK_QUANTIZE', '')  # 'int8' for dynamic quantization on CPU
+
+def _load_bark(_variant: str, device: str):
+    if BARK_NUM_THREADS > 0:
+        torch.set_num_threads(BARK_NUM_THREADS)
+    processor = AutoProcessor.from_pretrained(BARK_MODEL_NAME)
+    model = BarkModel.from_pretrained(BARK_MODEL_NAME).to(device)
+    if BARK_QUANTIZE == 'int8' and device == "cpu":
+        # Linear layers dominate Bark's transformers; int8 weights cut CPU time and memory
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model, processor
 
 def get_bark_model():
-    global _bark_model, _bark_processor
-    if _bark_model is None:
-        print(f"[{time.strftime('%H:%M:%S')}] Loading Bark model (small)... This may take a while.", flush=True)
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        _bark_processor = AutoProcessor.from_pretrained("suno/bark-small")
-        _bark_model = BarkModel.from_pretrained("suno/bark-small").to(device)
-        print(f"[{time.strftime('%H:%M:%S')}] Bark model loaded.", flush=True)
-    return _bark_model, _bark_processor
+    return get_model_registry().get("bark")
 
-async def text_to_speech_bark(text: str, voice_preset: str, output_dir: str = "static/audio"):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    filename = f"{uuid.uuid4()}.wav"
-    output_path = os.path.join(output_dir, filename)
-    
+get_model_registry().register("whisper", _load_whisper)
+get_model_registry().register("faster-whisper", _load_faster_whisper)
+get_model_registry().register("bark", _load_bark)
+
+def preload_models(names=None):
+    """Load (and for ASR models, warm up on a second of silence) the given registry models"""
+    for name in names if names is not None else MODEL_PRELOAD:
+        model = get_model_registry().get(name)
+        silence = np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32)
+        if name.startswith("whisper:"):
+            model.transcribe(silence, **WHISPER_OPTIONS)
+        elif name.startswith("faster-whisper:"):
+            list(model.transcribe(silence)[0])
+    return get_model_registry().resident()
+
+async def warm_models():
+    """
+    Preload MODEL_PRELOAD wherever inference runs: in every pool worker (via the pool
+    initializer) or in this process when CPU_WORKERS=0. Updates `readiness` for /api/ready.
+    """
+    if not MODEL_PRELOAD:
+        return
+    start = time.time()
+    try:
+        # One call per worker so each one spawns and runs the preload initializer
+        loaded = await asyncio.gather(*(run_cpu_bound(preload_models) for _ in range(max(1, CPU_WORKERS))))
+        readiness['models'] = loaded[0]
+        readiness['ready'] = True
+        print(f"[{time.strftime('%H:%M:%S')}] Models ready in {time.time() - start:.1f}s: {loaded[0]}", flush=True)
+    except Exception as e:
+        readiness['error'] = str(e)
+        print(f"[{time.strftime('%H:%M:%S')}] Model preload failed: {e}", flush=True)
+
+def _bark_generate_batch_to_files(texts, voice_preset: str, output_paths):
+    """Generate one padded batch of segments with a single model.generate call"""
     model, processor = get_bark_model()
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+    device = get_device()
     
-    # Bark works best with short phrases, but we'll try it on the segment
-    inputs = processor(text, voice_preset=voice_preset).to(device)
+    # Bark works best with short phrases; the processor pads the batch to a common length
+    inputs = processor(list(texts), voice_preset=voice_preset).to(device)
     
     with torch.no_grad():
-        audio_array = model.generate(**inputs)
-        audio_array = audio_array.cpu().numpy().squeeze()
+        try:
+            audio, lengths = model.generate(**inputs, return_output_lengths=True)
+        except TypeError:
+            # Older transformers can't report per-item lengths; keep the padded audio
+            audio = model.generate(**inputs)
+            lengths = [audio.shape[-1]] * len(texts)
+        audio = audio.cpu().numpy()
     
     sample_rate = model.generation_config.sample_rate
-    wavfile.write(output_path, rate=sample_rate, data=audio_array)
-    
-    return output_path
+    for row, length, output_path in zip(audio, lengths, output_paths):
+        wavfile.write(output_path, rate=sample_rate, data=row[:int(length)])
+    return list(output_paths)
 
-def download_video_and_audio(youtube_url: str, output_dir: str = "downloads"):
+async def _run_bark_batch(voice_preset: str, items):
+    texts = [text for text, _ in items]
+    paths = [path for _, path in items]
+    start = time.time()
+    result = await run_cpu_bound(_bark_generate_batch_to_files, texts, voice_preset, paths)
+    print(f"[{time.strftime('%H:%M:%S')}] Bark generated a batch of {len(items)} segments in {time.time() - start:.1f}s", flush=True)
+    return result
+
+_bark_batcher = None
+
+def get_bark_batcher():
+    global _bark_batcher
+    if _bark_batcher is None:
+        # Sort by text length so each padded batch wastes as little compute as possible
+        _bark_batcher = MicroBatcher(
+            _run_bark_batch, BARK_BATCH_SIZE, BARK_BATCH_WAIT_MS / 1000,
+            sort_key=lambda item: len(item[0])
+        )
+    return _bark_batcher
+
+def is_bark_voice(voice_id: str):
+    return str(voice_id).startswith("hf_")
+
+async def text_to_speech_bark(text: str, voice_preset: str, output_dir: str = "static/audio"):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    unique_id = uuid.uuid4()
-    video_path = os.path.join(output_dir, f"{unique_id}_video.mp4")
-    audio_path = os.path.join(output_dir, f"{unique_id}_audio.mp3")
+    cache = get_tts_cache()
+    key = cache_key(text, voice_preset, "bark", BARK_MODEL_NAME)
+    if cache:
+        cached_path = cache.get(key, ".wav")
+        note_cache(bool(cached_path))
+        if cached_path:
+            return cached_path
     
-    print(f"[{time.strftime('%H:%M:%S')}] Target Video URL: {youtube_url}", flush=True)
+    filename = f"{uuid.uuid4()}.wav"
+    output_path = os.path.join(output_dir, filename)
+    
+    # Concurrent calls are grouped per voice preset into batched generate calls
+    output_path = await get_bark_batcher().submit(voice_preset, (text, output_path))
+    if cache:
+        output_path = await run_blocking(cache.put, key, ".wav", output_path)
+    return output_path
+
+def download_stream(youtube_url: str, kind: str, output_dir: str = "downloads"):
+    """
+    Download one stream ('audio' or 'video') with yt-dlp, fetching fragments in parallel.
+    Streams are kept in the media cache keyed by video id, so repeat jobs skip the download.
+    """
+    with span(f'download_{kind}') as stage:
+        path = _download_stream(youtube_url, kind, output_dir)
+        stage.add_file(path)
+    return path
+
+def _download_stream(youtube_url: str, kind: str, output_dir: str):
+    cache = get_media_cache()
+    key = media_cache_key(source_key_for_url(youtube_url), kind)
+    ext = MEDIA_EXTENSIONS[kind]
+    if cache:
+        cached_path = cache.get(key, ext)
+        note_cache(bool(cached_path))
+        if cached_path:
+            print(f"[{time.strftime('%H:%M:%S')}] Using cached {kind} for {youtube_url}", flush=True)
+            return cached_path
+    
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
     
-    # Standard format selection
     ydl_opts = {
-        'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-        'outtmpl': video_path,
+        'format': YTDLP_FORMATS[kind],
+        'outtmpl': os.path.join(output_dir, f"{uuid.uuid4()}_{kind}.%(ext)s"),
+        'concurrent_fragment_downloads': YTDLP_CONCURRENT_FRAGMENTS,
         'quiet': False,
         'no_warnings': False,
         'noplaylist': True,
@@ -92,203 +384,221 @@ def download_video_and_audio(youtube_url: str, output_dir: str = "downloads"):
         'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
     }
     
-    print(f"[{time.strftime('%H:%M:%S')}] Starting download with yt-dlp for: {youtube_url}", flush=True)
+    print(f"[{time.strftime('%H:%M:%S')}] Starting {kind} download with yt-dlp for: {youtube_url}", flush=True)
+    start = time.time()
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([youtube_url])
+            info = ydl.extract_info(youtube_url, download=True)
     except Exception as e:
         print(f"[{time.strftime('%H:%M:%S')}] yt-dlp error: {e}", flush=True)
         raise e
     
-    if not os.path.exists(video_path):
-        print(f"[{time.strftime('%H:%M:%S')}] ERROR: Video file not found at {video_path}", flush=True)
-        raise Exception("Download failed: Video file not created.")
-        
-    print(f"[{time.strftime('%H:%M:%S')}] Download successful. Extracting audio...", flush=True)
+    downloads = info.get('requested_downloads') or []
+    path = downloads[0].get('filepath') if downloads else None
+    if not path or not os.path.exists(path):
+        print(f"[{time.strftime('%H:%M:%S')}] ERROR: {kind} file not found after download", flush=True)
+        raise Exception(f"Download failed: {kind} file not created.")
+    print(f"[{time.strftime('%H:%M:%S')}] {kind.capitalize()} download finished in {time.time() - start:.1f}s", flush=True)
     
-    # Extract audio for transcription
+    if cache:
+        path = cache.put(key, ext, path)
+        cache.evict()
+    return path
+
+def download_video_and_audio(youtube_url: str, output_dir: str = "downloads"):
+    """Sequential helper: returns (video_path, audio_path, pcm_path) for one URL"""
+    audio_path = download_stream(youtube_url, 'audio', output_dir)
+    pcm_path = extract_pcm_16k(audio_path, os.path.join(output_dir, f"{uuid.uuid4()}_audio16k.f32"))
+    video_path = download_stream(youtube_url, 'video', output_dir)
+    return video_path, audio_path, pcm_path
+
+def extract_pcm_16k(media_path: str, output_path: str):
+    """
+    Decode the audio once into raw 16 kHz mono float32 PCM for ASR. The mix reads the
+    original audio stream itself, so no lossy intermediate is made.
+    """
     cmd = [
         ffmpeg_cmd,
-        '-y', '-i', video_path,
-        '-vn', '-acodec', 'libmp3lame', '-ar', '16000',
-        audio_path
+        '-y', '-i', media_path,
+        '-vn', '-f', 'f32le', '-ac', '1', '-ar', str(WHISPER_SAMPLE_RATE),
+        output_path
     ]
-    # No capture_output so we see errors/progress in terminal
-    subprocess.run(cmd, check=True)
-    
-    return video_path, audio_path
+    with span('extract') as stage:
+        # No capture_output so we see errors/progress in terminal
+        subprocess.run(cmd, check=True)
+        stage.add_file(output_path)
+    return output_path
 
 def transcribe_audio(audio_path: str):
-    print(f"[{time.strftime('%H:%M:%S')}] Starting transcription...", flush=True)
-    model = get_whisper_model()
-    # Task 'transcribe' returns segments with timestamps
-    result = model.transcribe(audio_path, fp16=False)
+    print(f"[{time.strftime('%H:%M:%S')}] Starting transcription ({ASR_BACKEND})...", flush=True)
+    # Task 'transcribe' returns segments with timestamps; the model gets the PCM array directly
+    result = get_asr_backend().transcribe(load_audio_16k(audio_path))
     print(f"[{time.strftime('%H:%M:%S')}] Transcription complete.", flush=True)
     return result
 
-def translate_text(text: str, target_lang: str):
-    if not text.strip():
-        return "No speech detected."
+def translate_segments(segments, target_lang: str, source_lang: str = 'auto', backend=None):
+    """
+    Translate all Whisper segments in batched requests, serving repeats from the
+    translation memory. Returns ({segment id: translated text}, memory stats);
+    segments without speech are skipped.
+    """
+    with span('translate') as stage:
+        translations, stats = _translate_segments(segments, target_lang, source_lang, backend)
+        stage.add(items=stats['hits'] + stats['misses'])
+        stage.cache_hits += stats['hits']
+        stage.cache_misses += stats['misses']
+    return translations, stats
+
+def _translate_segments(segments, target_lang: str, source_lang: str, backend):
+    backend = backend or get_translator_backend()
+    spoken = [seg for seg in segments if seg['text'].strip()]
+    stats = {'hits': 0, 'misses': 0, 'hit_ratio': 0.0}
+    if not spoken:
+        return {}, stats
     
-    print(f"[{time.strftime('%H:%M:%S')}] Translating text...", flush=True)
-    try:
-        translator = GoogleTranslator(source='auto', target=target_lang)
-        translated = translator.translate(text)
-        print(f"[{time.strftime('%H:%M:%S')}] Translation complete.", flush=True)
-        return translated
-    except Exception as e:
-        print(f"[{time.strftime('%H:%M:%S')}] Translation error: {e}", flush=True)
-        return text # Fallback to original
+    texts = [seg['text'] for seg in spoken]
+    memory = get_translation_memory()
+    remembered = memory.get_many(texts, source_lang, target_lang) if memory else {}
+    pending = list(dict.fromkeys(text for text in texts if text not in remembered))
+    stats['misses'] = sum(1 for text in texts if text not in remembered)
+    stats['hits'] = len(texts) - stats['misses']
+    stats['hit_ratio'] = stats['hits'] / len(texts)
+    
+    print(f"[{time.strftime('%H:%M:%S')}] Translating {len(pending)} segments ({stats['hits']} from translation memory)...", flush=True)
+    translated = dict(remembered)
+    if pending:
+        fresh = backend.translate_batch(pending, 'auto', target_lang)
+        translated.update(zip(pending, fresh))
+        if memory:
+            # Untranslated fallbacks (provider errors) are not worth remembering
+            memory.put_many([(src, dst) for src, dst in zip(pending, fresh) if dst != " ".join(src.split())], source_lang, target_lang)
+    print(f"[{time.strftime('%H:%M:%S')}] Translation complete.", flush=True)
+    return {seg['id']: translated[seg['text']] for seg in spoken}, stats
+
+def join_translations(segments, translations):
+    """Build the full-text translation for the UI from the per-segment output"""
+    text = " ".join(translations[seg['id']] for seg in segments if seg['id'] in translations)
+    return text or "No speech detected."
 
 async def text_to_speech_edge(text: str, lang: str, gender: str = "female", output_dir: str = "static/audio"):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
+    # A catalog voice name is used as-is; 'female'/'male' pick the language's default voice
+    voice = get_voice_catalog().resolve(gender, lang)
+    
+    cache = get_tts_cache()
+    key = cache_key(text, voice, "edge")
+    if cache:
+        cached_path = cache.get(key, ".mp3")
+        note_cache(bool(cached_path))
+        if cached_path:
+            return cached_path
+    
     filename = f"{uuid.uuid4()}.mp3"
     output_path = os.path.join(output_dir, filename)
     
     print(f"[{time.strftime('%H:%M:%S')}] Generating TTS voice...", flush=True)
-    
-    voices_map = {
-        'hi': {'male': 'hi-IN-MadhurNeural', 'female': 'hi-IN-SwaraNeural'},
-        'ta': {'male': 'ta-IN-ValluvarNeural', 'female': 'ta-IN-PallaviNeural'},
-        'ml': {'male': 'ml-IN-MidhunNeural', 'female': 'ml-IN-SobhanaNeural'},
-        'es': {'male': 'es-MX-JorgeNeural', 'female': 'es-MX-DaliaNeural'},
-        'fr': {'male': 'fr-FR-HenriNeural', 'female': 'fr-FR-DeniseNeural'},
-        'de': {'male': 'de-DE-KillianNeural', 'female': 'de-DE-KatjaNeural'},
-        'ja': {'male': 'ja-JP-KeitaNeural', 'female': 'ja-JP-NanamiNeural'},
-        'en': {'male': 'en-US-AndrewNeural', 'female': 'en-US-EmmaNeural'}
-    }
-    
-    lang_key = lang.lower()[:2]
-    lang_voices = voices_map.get(lang_key, voices_map['en'])
-    
-    # If a specific voice name is provided, use it directly
-    if str(gender).startswith('en-') or str(gender).startswith('hi-') or str(gender).startswith('ta-') or str(gender).startswith('ml-'):
-        voice = gender
-    else:
-        voice = lang_voices.get(gender.lower(), lang_voices['female'])
-    
-    
     communicate = edge_tts.Communicate(text, voice)
     await communicate.save(output_path)
     print(f"[{time.strftime('%H:%M:%S')}] TTS complete.", flush=True)
+    if cache:
+        output_path = await run_blocking(cache.put, key, ".mp3", output_path)
     return output_path
 
-def get_audio_duration(file_path):
-    cmd = [
-        ffprobe_cmd,
-        '-v', 'error', '-show_entries', 'format=duration',
-        '-of', 'default=noprint_wrappers=1:nokey=1', file_path
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    return float(result.stdout.strip())
-
-async def mix_audio_and_video_segmented(video_path, original_audio, segments, target_lang, voice_id, output_dir="static/video"):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    temp_dir = os.path.join("downloads", "temp_segments")
-    if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir)
-
-    output_filename = f"translated_{uuid.uuid4()}.mp4"
-    output_video_path = os.path.join(output_dir, output_filename)
-    
-    audio_filters = []
-    input_files = [video_path, original_audio]
-    
-    print(f"[{time.strftime('%H:%M:%S')}] Generating segmented TTS and processing speed...", flush=True)
-    
-    processed_segments = 0
-    for i, seg in enumerate(segments):
-        start = seg['start']
-        end = seg['end']
-        duration = end - start
-        text = seg['text'].strip()
-        
-        if not text:
-            continue
-            
-        translated_text = translate_text(text, target_lang)
-        
-        if str(voice_id).startswith("hf_"):
+async def synthesize_clip(text: str, target_lang: str, voice_id: str, output_dir: str):
+    with span('tts') as stage:
+        stage.add(items=1)
+        if is_bark_voice(voice_id):
             # voice_id format: hf_bark_en_speaker_0 -> v2/en_speaker_0
             preset = voice_id.replace("hf_bark_", "v2/")
-            seg_audio_path = await text_to_speech_bark(translated_text, preset, output_dir=temp_dir)
-        else:
-            seg_audio_path = await text_to_speech_edge(translated_text, target_lang, voice_id, output_dir=temp_dir)
-        
-        # Add a small delay to prevent "connection failed" errors from rapid requests
-        await asyncio.sleep(0.5)
-        
-        tts_duration = get_audio_duration(seg_audio_path)
-        
-        # Calculate speed factor if TTS is longer than original duration
-        # We cap speed at 2.0x to keep it somewhat intelligible
-        speed_factor = 1.0
-        if tts_duration > duration and duration > 0:
-            speed_factor = min(tts_duration / duration, 2.0)
-        
-        # Add to FFmpeg inputs
-        input_files.append(seg_audio_path)
-        input_idx = len(input_files) - 1
-        
-        # Prepare filter for this segment: speed up, boost volume, then delay
-        delay_ms = int(start * 1000)
-        # We boost volume by 3.0x to ensure it's very audible
-        if speed_factor != 1.0:
-            # atempo filter for speed without changing pitch
-            filter_str = f"[{input_idx}:a]atempo={speed_factor},volume=3.0,adelay={delay_ms}|{delay_ms}[a{i}]"
+            path = await text_to_speech_bark(text, preset, output_dir=output_dir)
         else:
-            filter_str = f"[{input_idx}:a]volume=3.0,adelay={delay_ms}|{delay_ms}[a{i}]"
-        
-        audio_filters.append(filter_str)
-        processed_segments += 1
+            path = await text_to_speech_edge(text, target_lang, voice_id, output_dir=output_dir)
+        stage.add_file(path)
+    return path
 
-    if processed_segments == 0:
+async def render_dub(video_path, original_audio, spoken, clip_paths, plan=None):
+    """
+    Mix the clips synthesized for `spoken` units over the original audio and mux the video.
+    Each clip may fill its unit's time budget before it is sped up; how the clips fit is
+    stored as plan['overflow'] when a plan dict is given.
+    """
+    if plan is not None:
+        plan['overflow'] = overflow_summary([])
+    if not clip_paths:
         # Fallback to simple mixing if no segments were processed
-        return mix_audio_and_video(video_path, original_audio, original_audio, output_dir)
-
-    # Combine all segments and original audio (at lower volume)
-    # [1:a] is original audio
-    mix_inputs = "".join([f"[a{i}]" for i in range(len(segments))])
-    # Ensure we only include indices that were actually added to audio_filters
-    valid_indices = [i for i, seg in enumerate(segments) if seg['text'].strip()]
-    mix_inputs = "".join([f"[a{i}]" for i in valid_indices])
-    
-    amix_filter = f"[1:a]volume=0.1[bg_low];{';'.join(audio_filters)};[bg_low]{mix_inputs}amix=inputs={processed_segments + 1}:duration=first,volume=2.0[outa]"
+        return await run_blocking(mix_audio_and_video, video_path, original_audio, original_audio)
     
-    cmd = [ffmpeg_cmd, '-y']
-    for f in input_files:
-        cmd.extend(['-i', f])
-        
-    cmd.extend([
-        '-filter_complex', amix_filter,
-        '-map', '0:v',
-        '-map', '[outa]',
-        '-c:v', 'copy',
-        '-c:a', 'aac',
-        '-shortest',
-        output_video_path
-    ])
+    store = get_output_store()
+    output_video_path, output_url = store.new_output('video', 'translated', '.mp4')
     
-    subprocess.run(cmd, check=True)
+    placements = [
+        {'start': seg['start'], 'duration': seg.get('budget', seg['end'] - seg['start']), 'path': path}
+        for seg, path in zip(spoken, clip_paths)
+    ]
+    with span('mux') as stage:
+        fits = await run_blocking(mix_segments, video_path, original_audio, placements, output_video_path)
+        stage.add(items=len(placements))
+        stage.add_file(output_video_path)
+    await run_blocking(store.added, output_video_path)
+    for _, seconds in fits:
+        SEGMENT_OVERFLOW_SECONDS.observe(seconds)
+    report = overflow_summary(fits)
+    if plan is not None:
+        plan['overflow'] = report
+    if report['overflowed']:
+        print(f"[{time.strftime('%H:%M:%S')}] {report['overflowed']}/{report['clips']} clips overran their budget "
+              f"(p90 {report['p90_seconds']:.2f}s, max {report['max_seconds']:.2f}s)", flush=True)
     
-    # Cleanup temp segments
-    for f in input_files[2:]:
+    # Cleanup temp segments (cached clips stay for the next job)
+    cache = get_tts_cache()
+    for f in clip_paths:
+        if cache and cache.owns(f):
+            continue
         try: os.remove(f)
         except: pass
         
+    if cache:
+        print(f"[{time.strftime('%H:%M:%S')}] TTS cache: {cache.stats()}", flush=True)
     print(f"[{time.strftime('%H:%M:%S')}] Segmented mixing complete.", flush=True)
-    return f"/static/video/{output_filename}"
+    return output_url
 
-def mix_audio_and_video(video_path, original_audio, translated_audio, output_dir="static/video"):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        
-    output_filename = f"translated_{uuid.uuid4()}.mp4"
-    output_video_path = os.path.join(output_dir, output_filename)
+async def mix_audio_and_video_segmented(video_path, original_audio, segments, translations, target_lang, voice_id, timings=None, log_progress=None, plan=None):
+    temp_dir = scratch_dir()
+    
+    print(f"[{time.strftime('%H:%M:%S')}] Generating segmented TTS and processing speed...", flush=True)
+    
+    spoken = [seg for seg in segments if translations.get(seg['id'])]
+    
+    # Synthesize concurrently (bounded and rate-limited); results stay in segment order.
+    # Bark is local, so every segment is submitted at once and the batcher groups them.
+    limits = {'max_in_flight': len(spoken), 'rate': 0} if is_bark_voice(voice_id) else {}
+    voiced = 0
+    
+    async def synthesize_and_report(seg):
+        nonlocal voiced
+        path = await synthesize_clip(translations[seg['id']], target_lang, voice_id, temp_dir)
+        voiced += 1
+        if log_progress:
+            log_progress(f"[{target_lang}] Voiced {voiced}/{len(spoken)} segments", stage='tts', fraction=voiced / len(spoken), language=target_lang)
+        return path
+    
+    stage_start = time.time()
+    clip_paths = await synthesize_in_order(spoken, synthesize_and_report, **limits)
+    tts_seconds = time.time() - stage_start
+    stage_start = time.time()
+    if log_progress:
+        log_progress(f"[{target_lang}] Mixing audio and video...", stage='mix', language=target_lang)
+    video_url = await render_dub(video_path, original_audio, spoken, clip_paths, plan=plan)
+    if timings is not None:
+        timings['tts_seconds'] = round(tts_seconds, 2)
+        timings['mix_seconds'] = round(time.time() - stage_start, 2)
+    return video_url
+
+def mix_audio_and_video(video_path, original_audio, translated_audio):
+    store = get_output_store()
+    output_video_path, output_url = store.new_output('video', 'translated', '.mp4')
     
     cmd = [
         ffmpeg_cmd,
@@ -305,73 +615,523 @@ def mix_audio_and_video(video_path, original_audio, translated_audio, output_dir
         '-shortest',
         output_video_path
     ]
-    subprocess.run(cmd, check=True)
-    return f"/static/video/{output_filename}"
-
-async def run_pipeline(youtube_url: str, target_lang: str, voice_id: str = "female", input_file: Optional[str] = None):
-    pipeline_start = time.time()
-    def log_progress(msg):
-        timestamp = time.strftime('%H:%M:%S')
-        print(f"[{timestamp}] {msg}", flush=True)
-        with open("pipeline_progress.log", "a") as f:
-            f.write(f"[{timestamp}] {msg}\n")
-    
-    # Clear previous log
-    with open("pipeline_progress.log", "w") as f:
-        f.write(f"--- Pipeline Started at {time.ctime()} ---\n")
+    with span('mux') as stage:
+        subprocess.run(cmd, check=True)
+        stage.add_file(output_video_path)
+    store.added(output_video_path)
+    return output_url
 
-    log_progress(f"PIPELINE STARTED for {youtube_url or input_file}")
-    
-    # 1. Download or Prep
+async def prepare_media(youtube_url: Optional[str], input_file: Optional[str], log_progress, need_video: bool = True):
+    """
+    Get the source audio and extract 16 kHz PCM for ASR. For URLs the audio-only stream is
+    fetched first and the video stream downloads concurrently for the final mux (skipped
+    when need_video is False; video_task then resolves to None).
+    Returns (video_task, source_audio, pcm_file); await video_task for the video path.
+    """
+    pcm_file = os.path.join(scratch_dir(), f"{uuid.uuid4()}_audio16k.f32")
     if input_file:
-        log_progress(f"Using uploaded file: {input_file}")
-        video_file = input_file
-        unique_id = uuid.uuid4()
-        audio_file = os.path.join("downloads", f"{unique_id}_audio.mp3")
-        cmd = [
-            ffmpeg_cmd,
-            '-y', '-i', video_file,
-            '-vn', '-acodec', 'libmp3lame', '-ar', '16000',
-            audio_file
-        ]
-        subprocess.run(cmd, check=True)
+        log_progress(f"Using uploaded file: {input_file}", stage='download')
+        video_task = asyncio.ensure_future(asyncio.sleep(0, result=input_file))
+        source_audio = input_file
+    elif not need_video:
+        log_progress("Downloading audio...", stage='download')
+        video_task = asyncio.ensure_future(asyncio.sleep(0, result=None))
+        source_audio = await run_blocking(download_stream, youtube_url, 'audio')
     else:
-        log_progress("Downloading video and audio...")
-        video_file, audio_file = download_video_and_audio(youtube_url)
+        log_progress("Downloading audio (video downloads in parallel)...", stage='download')
+        video_task = asyncio.ensure_future(run_blocking(download_stream, youtube_url, 'video'))
+        try:
+            source_audio = await run_blocking(download_stream, youtube_url, 'audio')
+        except BaseException:
+            video_task.cancel()
+            raise
+    try:
+        await run_blocking(extract_pcm_16k, source_audio, pcm_file)
+    except BaseException:
+        video_task.cancel()
+        raise
+    log_progress("Audio ready for transcription", stage='download', fraction=1.0)
+    return video_task, source_audio, pcm_file
+
+async def cached_transcription(audio_file: str, options: dict):
+    """Look up a stored transcription; returns (result or None, cache key)"""
+    cache = get_transcript_cache()
+    if not cache:
+        return None, None
+    media_hash = await run_blocking(sha256_file, audio_file)
+    key = transcript_cache_key(media_hash, get_asr_backend().model_id, options)
+    return await run_blocking(cache.get, key), key
+
+async def transcribe_media(audio_file: str, log_progress):
+    """Transcribe with the ASR backend, reusing an earlier result for the same audio, model and options"""
+    options = dict(WHISPER_OPTIONS)
+    if ASR_PARALLEL_WORKERS > 1:
+        # Chunked results differ slightly from single-pass ones, so cache them separately
+        options.update(parallel_chunk_seconds=ASR_CHUNK_SECONDS, parallel_overlap_seconds=ASR_CHUNK_OVERLAP_SECONDS)
+    with span('asr') as stage:
+        transcription_result = await _transcribe_media(audio_file, options, log_progress)
+        stage.add(items=len(transcription_result['segments']))
+    return transcription_result
+
+async def _transcribe_media(audio_file: str, options: dict, log_progress):
+    cache = get_transcript_cache()
+    if cache:
+        cached, key = await cached_transcription(audio_file, options)
+        note_cache(bool(cached))
+        if cached:
+            log_progress("Reusing cached transcription for this audio", stage='transcribe', fraction=1.0)
+            return cached
     
-    # 2. Transcribe
-    log_progress("Transcribing audio with Whisper...")
-    transcription_result = transcribe_audio(audio_file)
-    original_text = transcription_result['text']
-    source_lang = transcription_result['language']
-    segments = transcription_result['segments']
-    log_progress(f"Transcription complete ({len(segments)} segments)")
+    log_progress(f"Transcribing audio with {ASR_BACKEND}...", stage='transcribe')
+    if ASR_PARALLEL_WORKERS > 1:
+        transcription_result = await transcribe_parallel(audio_file, log_progress)
+    else:
+        transcription_result = await run_cpu_bound(transcribe_audio, audio_file)
+    if cache:
+        await run_blocking(cache.put, key, transcription_result)
+    return transcription_result
+
+async def render_translation(video_task, source_audio, segments, source_lang, target_lang, voice_id, log_progress, output_mode: str = 'dub'):
+    """
+    Translate, synthesize and mux one target language; returns that branch's outputs.
+    With output_mode 'subtitles' or 'softsub' it stops after translation (see render_subtitles).
+    """
+    plan = None
+    if output_mode == 'dub':
+        # Regroup into sentence-sized units with time budgets: fewer TTS calls, less stretching
+        segments, plan = plan_segments(segments)
+        log_progress(f"[{target_lang}] Planned {plan['tts_calls']} TTS units from {plan['source_segments']} segments")
     
-    # 3. Translate the full text for UI display
-    log_progress("Translating text...")
-    translated_text = translate_text(original_text, target_lang)
+    # 3. Translate all segments in batches; the UI text is built from the same output
+    log_progress(f"[{target_lang}] Translating text...", stage='translate', language=target_lang)
+    stage_start = time.time()
+    translations, tm_stats = await run_blocking(translate_segments, segments, target_lang, source_lang)
+    timings = {'translate_seconds': round(time.time() - stage_start, 2)}
+    translated_text = join_translations(segments, translations)
+    log_progress(f"[{target_lang}] Translation memory hit ratio: {tm_stats['hit_ratio']:.0%}")
+    if output_mode != 'dub':
+        branch = await render_subtitles(video_task, source_audio, segments, translations, target_lang, output_mode, timings, log_progress)
+        return dict(branch, translated_text=translated_text, translation_memory=tm_stats, timings=timings)
     
     # 4 & 5. TTS and Mix (Segmented)
-    log_progress("Starting segmented TTS and mixing...")
+    log_progress(f"[{target_lang}] Starting segmented TTS and mixing...", stage='tts', language=target_lang)
+    # The background bed is decoded straight from the source's own audio stream
     video_url = await mix_audio_and_video_segmented(
-        video_file, audio_file, segments, target_lang, voice_id
+        await video_task, source_audio, segments, translations, target_lang, voice_id, timings=timings, log_progress=log_progress, plan=plan
+    )
+    record_segment_plan(target_lang, plan)
+    log_progress(f"[{target_lang}] Mixing complete. Output: {video_url}", stage='mix', fraction=1.0, language=target_lang)
+    return {
+        "translated_text": translated_text,
+        "output_video_url": video_url,
+        "translation_memory": tm_stats,
+        "segment_plan": plan,
+        "timings": timings
+    }
+
+async def render_subtitles(video_task, source_audio, segments, translations, target_lang, output_mode, timings, log_progress):
+    """
+    SRT/WebVTT from the Whisper segment timestamps, with no TTS. 'softsub' also muxes the
+    SRT into a copy of the video as a soft subtitle track, without re-encoding.
+    """
+    log_progress(f"[{target_lang}] Writing subtitles...", stage='mix', language=target_lang)
+    stage_start = time.time()
+    subtitle_urls = await run_blocking(write_subtitles, segments, translations)
+    branch = {"subtitle_urls": subtitle_urls, "output_video_url": None}
+    if output_mode == 'softsub':
+        store = get_output_store()
+        output_path, branch["output_video_url"] = store.new_output('video', 'subtitled', '.mp4')
+        await run_blocking(
+            mux_soft_subtitles, await video_task, source_audio, store.path_for_url(subtitle_urls['srt']), output_path, target_lang
+        )
+        await run_blocking(store.added, output_path)
+    timings['mix_seconds'] = round(time.time() - stage_start, 2)
+    log_progress(f"[{target_lang}] Subtitles ready: {branch['output_video_url'] or subtitle_urls['srt']}", stage='mix', fraction=1.0, language=target_lang)
+    return branch
+
+def load_audio_16k(audio_path: str):
+    """Read the PCM written by extract_pcm_16k (other files are decoded through Whisper's ffmpeg loader)"""
+    if audio_path.endswith('.f32'):
+        return np.fromfile(audio_path, dtype=np.float32)
+    return whisper.load_audio(audio_path)
+
+def find_split_points(audio, chunk_seconds: float, sample_rate: int = WHISPER_SAMPLE_RATE, search_seconds: float = 5.0, frame_seconds: float = 0.1):
+    """
+    Cut points roughly every chunk_seconds, each moved to the quietest frame in the
+    search_seconds before it so chunks end in a pause rather than mid-word.
+    """
+    chunk = int(chunk_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+    frame = int(frame_seconds * sample_rate)
+    points = []
+    pos = 0
+    while len(audio) - pos > chunk:
+        target = pos + chunk
+        low = max(target - search, pos + frame)
+        window = audio[low:target]
+        frames = len(window) // frame
+        if frames == 0:
+            cut = target
+        else:
+            energy = np.square(window[:frames * frame].reshape(frames, frame)).mean(axis=1)
+            cut = low + int(np.argmin(energy)) * frame + frame // 2
+        points.append(cut)
+        pos = cut
+    return points
+
+def transcribe_chunk(samples, offset_seconds: float, language: Optional[str] = None):
+    """Transcribe one slice of 16 kHz audio, shifting its timestamps to the full-file timeline"""
+    result = get_asr_backend().transcribe(samples, language)
+    for seg in result['segments']:
+        seg['start'] += offset_seconds
+        seg['end'] += offset_seconds
+    return result
+
+def transcribe_region(samples, low: int, start: int, end: int, language: Optional[str] = None):
+    """
+    Transcribe `samples` (the audio from sample `low`, padded around [start, end)), keeping
+    only segments whose midpoint falls inside [start, end) so neighbouring chunks don't repeat them.
+    """
+    result = transcribe_chunk(samples, low / WHISPER_SAMPLE_RATE, language)
+    owned_start = start / WHISPER_SAMPLE_RATE
+    owned_end = end / WHISPER_SAMPLE_RATE
+    result['segments'] = [
+        seg for seg in result['segments']
+        if owned_start <= (seg['start'] + seg['end']) / 2 < owned_end
+    ]
+    result['duration'] = owned_end - owned_start
+    return result
+
+async def transcribe_parallel(audio_file: str, log_progress):
+    """
+    Split the 16 kHz audio at quiet points into ASR_CHUNK_SECONDS chunks and transcribe
+    them across ASR_PARALLEL_WORKERS processes, then stitch the segments in time order.
+    """
+    audio = await run_blocking(load_audio_16k, audio_file)
+    bounds = [0] + find_split_points(audio, ASR_CHUNK_SECONDS) + [len(audio)]
+    regions = list(zip(bounds, bounds[1:]))
+    overlap = int(ASR_CHUNK_OVERLAP_SECONDS * WHISPER_SAMPLE_RATE)
+    log_progress(f"Transcribing {len(audio) / WHISPER_SAMPLE_RATE:.0f}s of audio in {len(regions)} chunks on {ASR_PARALLEL_WORKERS} workers")
+    
+    loop = asyncio.get_running_loop()
+    executor = get_asr_executor()
+    
+    finished = 0
+    
+    async def run_region(i, language):
+        nonlocal finished
+        start, end = regions[i]
+        # Only the padded slice is pickled to the worker, not the whole file
+        low = max(0, start - overlap)
+        high = min(len(audio), end + overlap)
+        result = await loop.run_in_executor(executor, transcribe_region, audio[low:high], low, start, end, language)
+        finished += 1
+        log_progress(f"Transcribed chunk {finished}/{len(regions)}", stage='transcribe', fraction=finished / len(regions))
+        return result
+    
+    async def run_regions(indexes, language=None):
+        return await asyncio.gather(*(run_region(i, language) for i in indexes))
+    
+    results = await run_regions(range(len(regions)))
+    
+    # Chunks detect language on their own; redo any that disagree with the majority (by duration)
+    durations = {}
+    for result in results:
+        durations[result['language']] = durations.get(result['language'], 0) + result['duration']
+    language = max(durations, key=durations.get)
+    outliers = [i for i, result in enumerate(results) if result['language'] != language]
+    if outliers:
+        log_progress(f"Re-transcribing {len(outliers)} chunks as '{language}'")
+        for i, result in zip(outliers, await run_regions(outliers, language)):
+            results[i] = result
+    
+    segments = []
+    for result in results:
+        for seg in result['segments']:
+            seg['id'] = len(segments)
+            segments.append(seg)
+    return {
+        'text': "".join(seg['text'] for seg in segments),
+        'language': language,
+        'segments': segments
+    }
+
+async def gather_or_cancel(*coros):
+    """asyncio.gather that cancels the siblings when one stage fails, so no producer blocks forever"""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+async def stream_transcription(audio_file: str, segment_queues, log_progress):
+    """
+    ASR stage of the streaming pipeline: transcribe chunk by chunk, plan the segments into
+    TTS units as they finalize and push each (unit, source_lang) to every branch queue.
+    Returns (transcription_result, units, plan_stats).
+    """
+    options = dict(WHISPER_OPTIONS, stream_chunk_seconds=STREAM_CHUNK_SECONDS)
+    planner = SegmentPlanner()
+    units = []
+    
+    async def emit(released, language):
+        for unit in released:
+            units.append(unit)
+            for queue in segment_queues:
+                await queue.put((unit, language))
+    
+    with span('asr') as stage:
+        result, key = await cached_transcription(audio_file, options)
+        if key:
+            stage.cache(bool(result))
+    if result:
+        log_progress("Reusing cached transcription for this audio", stage='transcribe', fraction=1.0)
+        for seg in result['segments']:
+            await emit(planner.feed(seg), result['language'])
+    else:
+        audio = await run_blocking(load_audio_16k, audio_file)
+        bounds = [0] + find_split_points(audio, STREAM_CHUNK_SECONDS) + [len(audio)]
+        total_seconds = len(audio) / WHISPER_SAMPLE_RATE
+        language = None
+        segments = []
+        texts = []
+        for start, end in zip(bounds, bounds[1:]):
+            with span('asr') as stage:
+                chunk_result = await run_cpu_bound(transcribe_chunk, audio[start:end], start / WHISPER_SAMPLE_RATE, language)
+                stage.add(items=len(chunk_result['segments']))
+            # Lock the language detected on the first chunk for the rest of the file
+            language = language or chunk_result['language']
+            texts.append(chunk_result['text'].strip())
+            for seg in chunk_result['segments']:
+                seg['id'] = len(segments)
+                segments.append(seg)
+                await emit(planner.feed(seg), language)
+            log_progress(f"Transcribed {end / WHISPER_SAMPLE_RATE:.0f}s / {total_seconds:.0f}s ({len(segments)} segments)", stage='transcribe', fraction=end / len(audio))
+        result = {'text': " ".join(t for t in texts if t), 'language': language, 'segments': segments}
+        if key:
+            await run_blocking(get_transcript_cache().put, key, result)
+    
+    await emit(planner.flush(), result['language'])
+    for queue in segment_queues:
+        await queue.put(END_OF_STREAM)
+    return result, units, planner.stats()
+
+async def stream_translation(target_lang: str, segment_queue, clip_queue, translations: dict, tm_totals: dict, tts_workers: int):
+    """Translation stage: batch whatever segments are waiting and forward translated ones to TTS"""
+    done = False
+    while not done:
+        batch = []
+        item = await segment_queue.get()
+        while True:
+            if item is END_OF_STREAM:
+                done = True
+                break
+            batch.append(item)
+            if len(batch) >= STREAM_TRANSLATE_BATCH or segment_queue.empty():
+                break
+            item = segment_queue.get_nowait()
+        if not batch:
+            continue
+        segs = [seg for seg, _ in batch]
+        result, stats = await run_blocking(translate_segments, segs, target_lang, batch[0][1])
+        tm_totals['hits'] += stats['hits']
+        tm_totals['misses'] += stats['misses']
+        for seg in segs:
+            if result.get(seg['id']):
+                translations[seg['id']] = result[seg['id']]
+                await clip_queue.put(seg)
+    for _ in range(tts_workers):
+        await clip_queue.put(END_OF_STREAM)
+
+async def stream_tts_worker(target_lang: str, voice_id: str, clip_queue, translations: dict, clip_paths: dict, limits, temp_dir: str, log_progress):
+    """TTS stage worker: synthesize segments as they arrive, within the job's concurrency and rate limits"""
+    semaphore, bucket = limits
+    while True:
+        seg = await clip_queue.get()
+        if seg is END_OF_STREAM:
+            return
+        clip_paths[seg['id']] = await call_with_retry(
+            lambda s: synthesize_clip(translations[s['id']], target_lang, voice_id, temp_dir),
+            seg, bucket, semaphore, label=seg['id']
+        )
+        # The total is unknown until ASR finishes, so streamed TTS reports counts, not a percentage
+        log_progress(f"[{target_lang}] Voiced {len(clip_paths)}/{len(translations)} segments so far", stage='tts', language=target_lang)
+
+async def stream_branch(target_lang, voice_id, segment_queue, log_progress):
+    """Translation + TTS for one target language fed by the ASR stage, then a single mux"""
+    temp_dir = scratch_dir()
+    clip_queue = StageQueue(f"tts:{target_lang}", STREAM_QUEUE_SIZE)
+    translations = {}
+    clip_paths = {}
+    tm_totals = {'hits': 0, 'misses': 0}
+    if is_bark_voice(voice_id):
+        # Enough workers to fill a Bark batch; no remote rate limit applies
+        tts_workers = max(TTS_MAX_IN_FLIGHT, BARK_BATCH_SIZE)
+        limits = make_limits(tts_workers, rate=0)
+    else:
+        tts_workers = TTS_MAX_IN_FLIGHT
+        limits = make_limits()
+    
+    await gather_or_cancel(
+        stream_translation(target_lang, segment_queue, clip_queue, translations, tm_totals, tts_workers),
+        *(stream_tts_worker(target_lang, voice_id, clip_queue, translations, clip_paths, limits, temp_dir, log_progress) for _ in range(tts_workers))
+    )
+    log_progress(f"[{target_lang}] Translation and TTS complete ({len(clip_paths)} clips)", stage='tts', fraction=1.0, language=target_lang)
+    return translations, clip_paths, tm_totals, clip_queue.stats()
+
+async def run_streaming_stages(video_task, source_audio, audio_file, targets, log_progress):
+    """
+    Streaming mode: ASR, translation and TTS overlap through bounded queues, so a long
+    video finishes in roughly the time of its slowest stage. Returns
+    (transcription_result, branches, stage_metrics).
+    """
+    segment_queues = [StageQueue(f"translate:{target_lang}", STREAM_QUEUE_SIZE) for target_lang, _ in targets]
+    stage_start = time.time()
+    (transcription_result, units, plan_stats), *streamed = await gather_or_cancel(
+        stream_transcription(audio_file, segment_queues, log_progress),
+        *(stream_branch(target_lang, voice_id, queue, log_progress)
+          for (target_lang, voice_id), queue in zip(targets, segment_queues))
     )
-    log_progress(f"Mixing complete. Output: {video_url}")
+    streamed_seconds = time.time() - stage_start
+    branches = []
+    queue_metrics = {}
+    for (target_lang, voice_id), queue, (translations, clip_paths, tm_totals, tts_queue_stats) in zip(targets, segment_queues, streamed):
+        spoken = [unit for unit in units if unit['id'] in clip_paths]
+        log_progress(f"[{target_lang}] Mixing audio and video...", stage='mix', language=target_lang)
+        mix_start = time.time()
+        plan = dict(plan_stats)
+        video_url = await render_dub(await video_task, source_audio, spoken, [clip_paths[unit['id']] for unit in spoken], plan=plan)
+        record_segment_plan(target_lang, plan)
+        mix_seconds = round(time.time() - mix_start, 2)
+        log_progress(f"[{target_lang}] Mixing complete. Output: {video_url}", stage='mix', fraction=1.0, language=target_lang)
+        lookups = tm_totals['hits'] + tm_totals['misses']
+        branches.append({
+            "translated_text": join_translations(units, translations),
+            "output_video_url": video_url,
+            "translation_memory": dict(tm_totals, hit_ratio=tm_totals['hits'] / lookups if lookups else 0.0),
+            "segment_plan": plan,
+            # ASR, translation and TTS overlap here, so only the mix has a time of its own
+            "timings": {'mix_seconds': mix_seconds}
+        })
+        queue_metrics[queue.name] = queue.stats()
+        queue_metrics[f"tts:{target_lang}"] = tts_queue_stats
+    
+    stage_metrics = {
+        'streamed_stages_seconds': round(streamed_seconds, 2),
+        'queues': queue_metrics
+    }
+    log_progress(f"Streaming stage metrics: {stage_metrics}")
+    return transcription_result, branches, stage_metrics
+
+def make_progress_logger(job_id: Optional[str] = None):
+    """
+    log_progress(msg, stage=None, fraction=None, **data) for one run: prints the message and,
+    inside a job, publishes it to the job's progress bus. When `fraction` of `stage` is
+    known it is turned into the job's overall percentage (see progress.STAGE_RANGES).
+    """
+    job_id = job_id or current_job_id.get()
+    bus = get_progress_bus()
+    def log_progress(msg, stage=None, fraction=None, **data):
+        print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+        if job_id:
+            percent = stage_percent(stage, fraction) if stage and fraction is not None else None
+            bus.publish(job_id, 'progress', message=msg, stage=stage, percent=percent, **data)
+    return log_progress
+
+async def run_pipeline_multi(youtube_url: Optional[str], targets, input_file: Optional[str] = None, streaming: Optional[bool] = None, output_mode: str = 'dub'):
+    """
+    Dub one source into several languages. `targets` is a list of (target_lang, voice_id);
+    download and ASR run once, then each language's translate/TTS/mux branch runs in parallel.
+    With streaming (default STREAMING_PIPELINE) the ASR, translation and TTS stages overlap.
+    output_mode 'subtitles' returns SRT/WebVTT only (no video download, TTS or mux) and
+    'softsub' adds them to the video as a subtitle track; both skip the streaming path.
+    """
+    # Intermediate files (PCM, TTS clips) live in a scratch directory of this run's own;
+    # cached clips and downloads handed to this run stay pinned until it finishes
+    with job_scratch(current_job_id.get()), cache_leases():
+        return await _run_pipeline_multi(youtube_url, targets, input_file, streaming, output_mode)
+
+async def _run_pipeline_multi(youtube_url: Optional[str], targets, input_file: Optional[str], streaming: Optional[bool], output_mode: str):
+    if streaming is None:
+        streaming = STREAMING_PIPELINE
+    if output_mode != 'dub':
+        # Nothing to overlap once TTS is gone
+        streaming = False
+    pipeline_start = time.time()
+    log_progress = make_progress_logger()
+
+    log_progress(f"PIPELINE STARTED for {youtube_url or input_file} -> {', '.join(lang for lang, _ in targets)}")
+    
+    # 1. Download or Prep (ASR can start as soon as the audio stream has landed)
+    stage_start = time.time()
+    video_task, source_audio, audio_file = await prepare_media(youtube_url, input_file, log_progress, need_video=output_mode != 'subtitles')
+    timings = {'download_seconds': round(time.time() - stage_start, 2)}
     
-    # Cleanup
+    stage_metrics = None
+    try:
+        if streaming:
+            # 2-5. Segments flow from ASR into translation and TTS as they finalize
+            transcription_result, branches, stage_metrics = await run_streaming_stages(video_task, source_audio, audio_file, targets, log_progress)
+            timings['streamed_seconds'] = stage_metrics['streamed_stages_seconds']
+        else:
+            # 2. Transcribe (once for every target language)
+            stage_start = time.time()
+            transcription_result = await transcribe_media(audio_file, log_progress)
+            timings['transcribe_seconds'] = round(time.time() - stage_start, 2)
+            log_progress(f"Transcription complete ({len(transcription_result['segments'])} segments)", stage='transcribe', fraction=1.0)
+            
+            # 3-5. One translate/TTS/mux branch per target language
+            branches = await asyncio.gather(*(
+                render_translation(video_task, source_audio, transcription_result['segments'], transcription_result['language'], target_lang, voice_id, log_progress, output_mode)
+                for target_lang, voice_id in targets
+            ))
+    except BaseException:
+        video_task.cancel()
+        raise
+    original_text = transcription_result['text']
+    source_lang = transcription_result['language']
+    
+    # Cleanup (cached downloads stay for the next job)
     print(f"[{time.strftime('%H:%M:%S')}] Starting cleanup...", flush=True)
     try:
-        time.sleep(1)
-        if not input_file and os.path.exists(video_file): os.remove(video_file)
+        await asyncio.sleep(1)
+        media_cache = get_media_cache()
+        if not input_file:
+            for path in {video_task.result(), source_audio}:
+                if not path or (media_cache and media_cache.owns(path)):
+                    continue
+                if os.path.exists(path): os.remove(path)
         if os.path.exists(audio_file): os.remove(audio_file)
         print(f"[{time.strftime('%H:%M:%S')}] Cleanup complete.", flush=True)
     except Exception as e:
         print(f"[{time.strftime('%H:%M:%S')}] Cleanup warning: {e}", flush=True)
         
     print(f"[{time.strftime('%H:%M:%S')}] PIPELINE COMPLETE in {time.time() - pipeline_start:.2f}s", flush=True)
-    return {
+    timings['total_seconds'] = round(time.time() - pipeline_start, 2)
+    result = {
         "original_text": original_text,
-        "translated_text": translated_text,
-        "output_video_url": video_url,
-        "source_lang": source_lang
+        "source_lang": source_lang,
+        "outputs": {target_lang: branch for (target_lang, _), branch in zip(targets, branches)},
+        "timings": timings
+    }
+    if stage_metrics:
+        result["stage_metrics"] = stage_metrics
+    return result
+
+async def run_pipeline(youtube_url: str, target_lang: str, voice_id: str = "female", input_file: Optional[str] = None, streaming: Optional[bool] = None, output_mode: str = 'dub'):
+    result = await run_pipeline_multi(youtube_url, [(target_lang, voice_id)], input_file=input_file, streaming=streaming, output_mode=output_mode)
+    branch = result['outputs'][target_lang]
+    single = {
+        "original_text": result['original_text'],
+        "translated_text": branch['translated_text'],
+        "output_video_url": branch['output_video_url'],
+        "source_lang": result['source_lang'],
+        "translation_memory": branch['translation_memory']
     }
+    if 'subtitle_urls' in branch:
+        single['subtitle_urls'] = branch['subtitle_urls']
+    if 'stage_metrics' in result:
+        single['stage_metrics'] = result['stage_metrics']
+    return single
@@ -0,0 +1,128 @@
+import os
+import time
+import asyncio
+
+# Events kept per job so late or reconnecting subscribers can catch up
+PROGRESS_HISTORY_LIMIT = int(os.getenv('PROGRESS_HISTORY_LIMIT', 500))
+# Subscribers that fall this far behind lose the oldest undelivered events
+PROGRESS_SUBSCRIBER_BUFFER = int(os.getenv('PROGRESS_SUBSCRIBER_BUFFER', 100))
+
+TERMINAL_EVENTS = ('completed', 'failed')
+
+# Share of the job's overall percentage taken by each stage
+STAGE_RANGES = {
+    'download': (0, 10),
+    'transcribe': (10, 40),
+    'translate': (40, 50),
+    'tts': (50, 90),
+    'mix': (90, 99),
+}
+
+def stage_percent(stage: str, fraction: float = 0.0):
+    low, high = STAGE_RANGES[stage]
+    return round(low + (high - low) * min(1.0, max(0.0, fraction)), 1)
+
+class _Channel:
+    def __init__(self):
+        self.events = []
+        self.subscribers = set()
+        self.seq = 0
+        self.percent = 0.0
+        self.closed = False
+
+class ProgressBus:
+    """
+    In-memory per-job event channels. Publishers append events (with a sequence number,
+    so SSE clients can resume from Last-Event-ID); each subscriber gets its own bounded
+    queue, so one slow client never blocks the pipeline or other clients.
+    """
+
+    def __init__(self, history_limit: int = PROGRESS_HISTORY_LIMIT, buffer: int = PROGRESS_SUBSCRIBER_BUFFER):
+        self.history_limit = history_limit
+        self.buffer = buffer
+        self._channels = {}
+        self._loop = None
+
+    def publish(self, job_id: str, event_type: str, **data):
+        """Safe to call from worker threads; the event is handed to the event loop"""
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._publish, job_id, event_type, data)
+            return
+        self._publish(job_id, event_type, data)
+
+    def _publish(self, job_id, event_type, data):
+        channel = self._channels.setdefault(job_id, _Channel())
+        if channel.closed:
+            return
+        channel.seq += 1
+        # The overall percentage never goes backwards, even when parallel branches report out of step
+        if data.get('percent') is not None:
+            channel.percent = max(channel.percent, data['percent'])
+        if event_type == 'completed':
+            channel.percent = 100.0
+        event = dict(data, id=channel.seq, type=event_type, time=round(time.time(), 3), percent=channel.percent)
+        channel.events.append(event)
+        del channel.events[:-self.history_limit]
+        if event_type in TERMINAL_EVENTS:
+            channel.closed = True
+        for queue in channel.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def history(self, job_id: str, after: int = 0):
+        channel = self._channels.get(job_id)
+        return [event for event in channel.events if event['id'] > after] if channel else []
+
+    async def subscribe(self, job_id: str, after: int = 0, heartbeat: float = None):
+        """
+        Yield the job's events after sequence `after`, then live ones until a terminal event.
+        With `heartbeat`, None is yielded after that many idle seconds (for SSE keep-alives).
+        """
+        channel = self._channels.setdefault(job_id, _Channel())
+        queue = asyncio.Queue(maxsize=self.buffer)
+        channel.subscribers.add(queue)
+        try:
+            last = after
+            for event in self.history(job_id, after):
+                last = event['id']
+                yield event
+                if event['type'] in TERMINAL_EVENTS:
+                    return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event['id'] <= last:
+                    continue
+                last = event['id']
+                yield event
+                if event['type'] in TERMINAL_EVENTS:
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+
+    def discard(self, job_id: str):
+        channel = self._channels.get(job_id)
+        if channel and not channel.subscribers:
+            del self._channels[job_id]
+
+    def stats(self):
+        return {
+            'channels': len(self._channels),
+            'subscribers': sum(len(channel.subscribers) for channel in self._channels.values())
+        }
+
+_bus = None
+
+def get_progress_bus():
+    global _bus
+    if _bus is None:
+        _bus = ProgressBus()
+    return _bus
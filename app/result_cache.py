@@ -0,0 +1,142 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from urllib.parse import urlparse, parse_qs
+from app.output_store import get_output_store
+
+# Result cache configuration
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', '1') == '1'
+RESULT_CACHE_PATH = os.getenv('RESULT_CACHE_PATH', os.path.join('cache', 'results.db'))
+
+_YOUTUBE_ID = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+def _on_domain(host: str, domain: str):
+    return host == domain or host.endswith('.' + domain)
+
+def youtube_video_id(url: str):
+    """Extract the 11-character video id from any common YouTube URL form"""
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or '').lower()
+    if _on_domain(host, 'youtu.be'):
+        candidate = parsed.path.lstrip('/').split('/')[0]
+    elif _on_domain(host, 'youtube.com') or _on_domain(host, 'youtube-nocookie.com'):
+        candidate = parse_qs(parsed.query).get('v', [''])[0]
+        if not candidate:
+            parts = [p for p in parsed.path.split('/') if p]
+            if len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+                candidate = parts[1]
+    else:
+        return None
+    return candidate if _YOUTUBE_ID.match(candidate or '') else None
+
+def source_key_for_url(url: str) -> str:
+    video_id = youtube_video_id(url)
+    if video_id:
+        return f"youtube:{video_id}"
+    return f"url:{url.strip()}"
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_key_for_file(path: str) -> str:
+    return f"sha256:{sha256_file(path)}"
+
+def media_hash_for_source(source_key: str) -> str:
+    """Fixed-width hash of a source key for the history table: an upload's own sha256, else the key's"""
+    if source_key.startswith('sha256:'):
+        return source_key[len('sha256:'):]
+    return hashlib.sha256(source_key.encode('utf-8')).hexdigest()
+
+def result_cache_key(source_key: str, target_lang: str, voice_id: str, output_mode: str = 'dub', asr_model: str = None) -> str:
+    """
+    Results depend on the ASR engine and model as well (a new WHISPER_MODEL or ASR_BACKEND
+    must not serve dubs made from the old transcripts); asr_model defaults to the configured one.
+    """
+    if asr_model is None:
+        from app.pipeline import get_asr_backend
+        asr_model = get_asr_backend().model_id
+    if output_mode != 'dub':
+        # Subtitle outputs don't depend on the voice
+        return f"{source_key}|{asr_model}|{target_lang}|{output_mode}"
+    return f"{source_key}|{asr_model}|{target_lang}|{voice_id}"
+
+def output_path_for_url(output_video_url: str) -> str:
+    """Map a served URL like /outputs/video/x.mp4 (or a legacy /static/video/x.mp4) back to its file on disk"""
+    return get_output_store().path_for_url(output_video_url) or output_video_url.lstrip('/')
+
+def result_output_urls(result: dict):
+    """Every output file a cached result links to"""
+    urls = [result.get('output_video_url')] + list((result.get('subtitle_urls') or {}).values())
+    return [url for url in urls if url]
+
+class ResultCache:
+    """Completed job results keyed on source media, ASR model, target language and voice"""
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS job_results (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._db.execute("SELECT result FROM job_results WHERE cache_key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[0])
+        # The outputs may have been cleaned up since; a stale entry is a miss
+        paths = [output_path_for_url(url) for url in result_output_urls(result)]
+        if not paths or not all(os.path.exists(path) for path in paths):
+            self.delete(key)
+            return None
+        # A hit is a use of the outputs, so the output store's LRU keeps them
+        for path in paths:
+            get_output_store().touch(path)
+        return result
+
+    def put(self, key: str, result: dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO job_results (cache_key, result, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result), time.time())
+            )
+            self._db.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM job_results WHERE cache_key = ?", (key,))
+            self._db.commit()
+
+    def delete_outputs(self, urls):
+        """Drop every entry that links to one of the given output URLs (called when outputs are evicted)"""
+        with self._lock:
+            for url in urls:
+                pattern = json.dumps(url).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                self._db.execute("DELETE FROM job_results WHERE result LIKE ? ESCAPE '\\'", (f"%{pattern}%",))
+            self._db.commit()
+
+_result_cache = None
+
+def get_result_cache():
+    """Shared cache instance, or None when RESULT_CACHE_ENABLED=0"""
+    global _result_cache
+    if _result_cache is None and RESULT_CACHE_ENABLED:
+        _result_cache = ResultCache(RESULT_CACHE_PATH)
+    return _result_cache
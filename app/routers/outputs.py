@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from app.output_store import get_output_store
+import os
+
+router = APIRouter(
+    prefix="/outputs",
+    tags=["outputs"]
+)
+
+MEDIA_TYPES = {
+    '.mp4': 'video/mp4',
+    '.srt': 'application/x-subrip',
+    '.vtt': 'text/vtt',
+}
+
+@router.api_route("/{kind}/{name}", methods=["GET", "HEAD"])
+async def serve_output(kind: str, name: str):
+    """
+    Serve a finished output. FileResponse answers Range requests with 206 partial content
+    (so players can seek) and hands the whole file to the server's sendfile when it
+    supports the ASGI pathsend extension; output names are unique, so they cache forever.
+    """
+    store = get_output_store()
+    try:
+        path = store.path(kind, name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Output not found")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Output not found")
+    store.touch(path)
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES.get(os.path.splitext(name)[1], 'application/octet-stream'),
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Form, UploadFile, File
+from fastapi import APIRouter, HTTPException, Form, UploadFile, File, Query, Header, Request
+from fastapi.responses import StreamingResponse, Response
 from typing import Optional
-from app.pipeline import run_pipeline
-from app.database import get_db_connection
+from app.pipeline import run_pipeline_multi, run_blocking, is_bark_voice
+from app.database import get_write_queue, fetch_all
+from app.jobs import submit_job, get_job, record_completed_job, current_job_id, QueueFullError
+from app.result_cache import get_result_cache, result_cache_key, source_key_for_url, media_hash_for_source
+from app.translation_memory import get_translation_memory
+from app.progress import get_progress_bus
+from app.uploads import save_upload, get_upload_sessions, UploadTooLargeError, UnsupportedMediaError, UploadOffsetError
+from app.subtitles import OUTPUT_MODES
+from app.voices import get_voice_catalog
 import os
+import json
 import time
-import shutil
 import uuid
 
 router = APIRouter(
@@ -12,69 +20,368 @@ router = APIRouter(
     tags=["translation"]
 )
 
-@router.post("/translate")
-async def translate_video(
-    video_url: Optional[str] = Form(None),
-    target_language: str = Form(...),
-    voice_id: str = Form("female"),
-    video_file: Optional[UploadFile] = File(None)
-):
-    print(f"[{time.strftime('%H:%M:%S')}] Incoming Request: URL={video_url}, Target={target_language}, Voice={voice_id}", flush=True)
+# Idle seconds between SSE keep-alive comments (keeps proxies from closing the stream)
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+
+# Job timings stored per translation row (see init_db.py)
+TIMING_COLUMNS = ('download_seconds', 'transcribe_seconds', 'translate_seconds', 'tts_seconds', 'mix_seconds', 'total_seconds')
+
+def record_running_translations(job_id: str, db_url: str, media_hash: str, targets):
+    """Insert one 'running' history row per language as the job starts"""
+    sql = """INSERT INTO translations 
+             (job_id, video_url, target_language, voice_id, media_hash, status) 
+             VALUES (%s, %s, %s, %s, %s, 'running')"""
+    for target_language, voice_id in targets:
+        get_write_queue().enqueue(sql, (job_id, db_url, target_language, voice_id, media_hash))
+
+def save_translation(job_id: str, target_language: str, result: dict, timings: dict):
+    """Queue the completed row and its texts; the write queue batches them onto the pool off the event loop"""
+    sql = f"""UPDATE translations SET status = 'completed', source_language = %s, audio_path = %s, 
+             {', '.join(f'{column} = %s' for column in TIMING_COLUMNS)}, updated_at = CURRENT_TIMESTAMP 
+             WHERE job_id = %s AND target_language = %s"""
+    val = (
+        result['source_lang'], 
+        result['output_video_url'] or result['subtitle_urls']['srt'],
+        *(timings.get(column) for column in TIMING_COLUMNS),
+        job_id,
+        target_language
+    )
+    get_write_queue().enqueue(sql, val, coalesce_key=(job_id, target_language))
+    # Transcript and translation go to the side table so history lookups stay narrow
+    sql = """INSERT INTO translation_texts (translation_id, original_text, translated_text) 
+             SELECT id, %s, %s FROM translations WHERE job_id = %s AND target_language = %s"""
+    get_write_queue().enqueue(sql, (result['original_text'], result['translated_text'], job_id, target_language))
+
+def mark_translations_failed(job_id: str, targets, error: str):
+    sql = """UPDATE translations SET status = 'failed', error = %s, updated_at = CURRENT_TIMESTAMP 
+             WHERE job_id = %s AND target_language = %s"""
+    for target_language, _ in targets:
+        get_write_queue().enqueue(sql, (error[:512], job_id, target_language), coalesce_key=(job_id, target_language))
+
+def parse_targets(target_language: Optional[str], target_languages: Optional[str], voice_id: str, voice_ids: Optional[str]):
+    """
+    Build the (target_lang, voice_id) list for a request. target_languages is a
+    comma-separated list; voice_ids optionally gives one voice per language.
+    """
+    langs = list(dict.fromkeys(lang.strip() for lang in (target_languages or "").split(",") if lang.strip()))
+    if target_language and target_language not in langs:
+        langs.insert(0, target_language)
+    if not langs:
+        raise HTTPException(status_code=400, detail="target_language or target_languages must be provided")
+    voices = [voice.strip() for voice in (voice_ids or "").split(",") if voice.strip()]
+    if voices and len(voices) != len(langs):
+        raise HTTPException(status_code=400, detail="voice_ids must list one voice per target language")
+    targets = [(lang, voices[i] if voices else voice_id) for i, lang in enumerate(langs)]
+    catalog = get_voice_catalog()
+    for _, voice in targets:
+        # Unknown names used to fall back to a default voice without a word
+        if not is_bark_voice(voice) and not catalog.knows(voice):
+            raise HTTPException(status_code=400, detail=f"Unknown voice '{voice}' (see /api/voices)")
+    return targets
+
+def combine_results(db_url: str, targets, results: dict):
+    """Single-language requests keep the flat response shape; multi-language ones nest per language"""
+    if len(targets) == 1:
+        return results[targets[0][0]]
+    first = results[targets[0][0]]
+    return {
+        "status": "completed",
+        "video_url": db_url,
+        "original_text": first['original_text'],
+        "outputs": {lang: results[lang] for lang, _ in targets}
+    }
+
+async def run_translation_job(video_url: Optional[str], targets, input_file: Optional[str], db_url: str, cache_keys: dict, cached_results: dict, media_hash: Optional[str] = None, output_mode: str = 'dub'):
+    pending = [(lang, voice) for lang, voice in targets if lang not in cached_results]
+    job_id = current_job_id.get() or str(uuid.uuid4())
+    record_running_translations(job_id, db_url, media_hash, pending)
     try:
-        if video_file and video_file.filename:
-            print(f"[{time.strftime('%H:%M:%S')}] Processing Uploaded File: {video_file.filename}", flush=True)
-            # Save uploaded file
-            os.makedirs("downloads", exist_ok=True)
-            input_file = os.path.join("downloads", f"{uuid.uuid4()}_{video_file.filename}")
-            with open(input_file, "wb") as buffer:
-                shutil.copyfileobj(video_file.file, buffer)
-            
-            # Run the pipeline with local file
-            result = await run_pipeline(None, target_language, voice_id=voice_id, input_file=input_file)
-        elif video_url:
-            print(f"[{time.strftime('%H:%M:%S')}] Processing YouTube URL: {video_url}", flush=True)
-            # Run the pipeline with YouTube URL
-            result = await run_pipeline(video_url, target_language, voice_id=voice_id)
-        else:
-            print(f"[{time.strftime('%H:%M:%S')}] Error: No input provided", flush=True)
-            raise HTTPException(status_code=400, detail="Either video_url or video_file must be provided")
-        
-        print(f"[{time.strftime('%H:%M:%S')}] Pipeline finished successfully. Result: {result.get('output_video_url')}", flush=True)
-        
-        # Save to database (Using URL if available, else filename)
-        db_url = video_url if video_url else video_file.filename
-        
-        # Save to database
-        db = get_db_connection()
-        if db:
-            cursor = db.cursor()
-            sql = """INSERT INTO translations 
-                     (video_url, source_language, target_language, original_text, translated_text, audio_path) 
-                     VALUES (%s, %s, %s, %s, %s, %s)"""
-            val = (
-                db_url, 
-                result['source_lang'], 
-                target_language, 
-                result['original_text'], 
-                result['translated_text'], 
-                result['output_video_url']
-            )
-            cursor.execute(sql, val)
-            db.commit()
-            cursor.close()
-            db.close()
-
-        return {
+        result = await run_pipeline_multi(video_url, pending, input_file=input_file, output_mode=output_mode)
+    except Exception as e:
+        mark_translations_failed(job_id, pending, str(e))
+        raise
+    finally:
+        # The uploaded copy belongs to this job; nothing reads it once the pipeline is done
+        discard_upload(input_file)
+    print(f"[{time.strftime('%H:%M:%S')}] Pipeline finished successfully. Outputs: {[branch['output_video_url'] or branch['subtitle_urls'] for branch in result['outputs'].values()]}", flush=True)
+    
+    cache = get_result_cache()
+    results = dict(cached_results)
+    for target_language, _ in pending:
+        branch = result['outputs'][target_language]
+        response = {
             "status": "completed",
             "video_url": db_url,
             "original_text": result['original_text'],
-            "translated_text": result['translated_text'],
-            "output_video_url": result['output_video_url']
+            "translated_text": branch['translated_text'],
+            "output_video_url": branch['output_video_url']
         }
-    except Exception as e:
-        import traceback
-        with open("error_log.txt", "a") as f:
-            f.write(f"\n--- Error at {time.ctime()} ---\n")
-            f.write(traceback.format_exc())
-            f.write("\n")
-        raise HTTPException(status_code=500, detail=str(e))
+        if 'subtitle_urls' in branch:
+            response['subtitle_urls'] = branch['subtitle_urls']
+        # Save to database (Using URL if available, else filename)
+        timings = dict(result['timings'], **branch.get('timings', {}))
+        save_translation(job_id, target_language, dict(response, source_lang=result['source_lang']), timings)
+        if cache:
+            await run_blocking(cache.put, cache_keys[target_language], response)
+        results[target_language] = response
+    combined = combine_results(db_url, targets, results)
+    if 'stage_metrics' in result:
+        # Per-stage queue depth/wait figures from the streaming pipeline (not cached)
+        combined = dict(combined, stage_metrics=result['stage_metrics'])
+    return combined
+
+@router.post("/translate", status_code=202)
+async def translate_video(
+    video_url: Optional[str] = Form(None),
+    target_language: Optional[str] = Form(None),
+    voice_id: str = Form("female"),
+    video_file: Optional[UploadFile] = File(None),
+    target_languages: Optional[str] = Form(None),
+    voice_ids: Optional[str] = Form(None),
+    upload_id: Optional[str] = Form(None),
+    output_mode: str = Form("dub")
+):
+    print(f"[{time.strftime('%H:%M:%S')}] Incoming Request: URL={video_url}, Target={target_language or target_languages}, Voice={voice_ids or voice_id}", flush=True)
+    targets = parse_targets(target_language, target_languages, voice_id, voice_ids)
+    if output_mode not in OUTPUT_MODES:
+        raise HTTPException(status_code=400, detail=f"output_mode must be one of: {', '.join(OUTPUT_MODES)}")
+    if upload_id:
+        # A finished resumable upload (PUT /api/uploads/{id}); its hash is already known
+        try:
+            stored = await run_blocking(get_upload_sessions().claim, upload_id)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        except UploadOffsetError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        print(f"[{time.strftime('%H:%M:%S')}] Processing Resumable Upload: {stored.filename}", flush=True)
+        input_file = stored.path
+        db_url = stored.filename
+        source_key = stored.source_key
+    elif video_file and video_file.filename:
+        print(f"[{time.strftime('%H:%M:%S')}] Processing Uploaded File: {video_file.filename}", flush=True)
+        # Streamed to disk in chunks and hashed on the way, so the cache key needs no second read
+        stored = await store_upload(video_file)
+        input_file = stored.path
+        db_url = stored.filename
+        source_key = stored.source_key
+    elif video_url:
+        print(f"[{time.strftime('%H:%M:%S')}] Processing YouTube URL: {video_url}", flush=True)
+        input_file = None
+        db_url = video_url
+        source_key = source_key_for_url(video_url)
+    else:
+        print(f"[{time.strftime('%H:%M:%S')}] Error: No input provided", flush=True)
+        raise HTTPException(status_code=400, detail="Either video_url or video_file must be provided")
+    
+    # Same media, language and voice already dubbed: answer from the cache
+    cache_keys = {lang: result_cache_key(source_key, lang, voice, output_mode) for lang, voice in targets}
+    cache = get_result_cache()
+    cached_results = {}
+    if cache:
+        for lang, key in cache_keys.items():
+            cached = await run_blocking(cache.get, key)
+            if cached:
+                print(f"[{time.strftime('%H:%M:%S')}] Result cache hit for {key}", flush=True)
+                cached_results[lang] = dict(cached, video_url=db_url)
+    dedupe_key = "+".join(cache_keys[lang] for lang, _ in targets if lang not in cached_results)
+    if not dedupe_key:
+        discard_upload(input_file)
+        job = record_completed_job(combine_results(db_url, targets, cached_results))
+        return job_response(job, cached=True)
+    
+    try:
+        job = submit_job(
+            run_translation_job, video_url if not input_file else None, targets, input_file, db_url, cache_keys, cached_results,
+            media_hash=media_hash_for_source(source_key), output_mode=output_mode, dedupe_key=dedupe_key
+        )
+    except QueueFullError as e:
+        discard_upload(input_file)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    
+    if job.get('attached'):
+        # The running job already has its own copy of this media
+        discard_upload(input_file)
+    return job_response(job, attached=job.get('attached', False))
+
+async def store_upload(video_file: UploadFile):
+    try:
+        return await save_upload(video_file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedMediaError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+def discard_upload(input_file: Optional[str]):
+    if input_file and os.path.exists(input_file):
+        os.remove(input_file)
+
+def job_response(job: dict, cached: bool = False, attached: bool = False):
+    response = {
+        "job_id": job['id'],
+        "status": job['status'],
+        "status_url": f"/api/jobs/{job['id']}",
+        "cached": cached,
+        "attached": attached
+    }
+    if job['status'] == 'completed':
+        response['result'] = job['result']
+        response['metrics'] = job.get('metrics')
+    return response
+
+@router.get("/voices")
+async def list_voices(if_none_match: Optional[str] = Header(None)):
+    """
+    The Edge-TTS voice catalog grouped by language, with each language's default
+    female/male voice. The body only changes with voices.txt, so clients revalidate
+    with If-None-Match and usually get a 304.
+    """
+    catalog = get_voice_catalog()
+    headers = {"ETag": catalog.etag, "Cache-Control": "public, max-age=3600"}
+    if if_none_match and catalog.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=catalog.payload, media_type="application/json", headers=headers)
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/uploads", status_code=201)
+async def create_upload(filename: str = Form(...), size: int = Form(...)):
+    """
+    Start a resumable upload of `size` bytes. Send the file with PUT /api/uploads/{id}
+    in one or more chunks, each with an Upload-Offset header; after a dropped
+    connection, GET the upload to learn the offset to continue from.
+    """
+    try:
+        state = await run_blocking(get_upload_sessions().create, filename, size)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedMediaError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return dict(state, upload_url=f"/api/uploads/{state['upload_id']}")
+
+@router.get("/uploads/{upload_id}")
+async def upload_status(upload_id: str):
+    try:
+        return await run_blocking(get_upload_sessions().status, upload_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+@router.put("/uploads/{upload_id}")
+async def upload_chunk(upload_id: str, request: Request, upload_offset: int = Header(...)):
+    """Append the request body at Upload-Offset (409 with the current offset if it doesn't match)"""
+    try:
+        return await get_upload_sessions().append(upload_id, upload_offset, request.stream())
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadOffsetError as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedMediaError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+@router.delete("/uploads/{upload_id}")
+async def cancel_upload(upload_id: str):
+    try:
+        await run_blocking(get_upload_sessions().status, upload_id)
+        await run_blocking(get_upload_sessions().discard, upload_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return {"removed": True}
+
+def sse_message(event: dict):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events stream of the job's progress (stage, message, overall percent),
+    ending with a `completed` event carrying the result or a `failed` event.
+    Reconnecting clients resume after the Last-Event-ID they saw.
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    bus = get_progress_bus()
+    
+    async def stream():
+        if job['status'] in ('completed', 'failed') and not bus.history(job_id):
+            # Finished before this process kept events for it; replay the outcome only
+            yield sse_message({
+                'id': 1, 'type': job['status'], 'percent': 100.0 if job['status'] == 'completed' else None,
+                'result': job['result'], 'error': job['error'], 'metrics': job.get('metrics')
+            })
+            return
+        async for event in bus.subscribe(job_id, after, heartbeat=SSE_HEARTBEAT_SECONDS):
+            yield sse_message(event) if event else ": keep-alive\n\n"
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # Stop nginx-style proxies from buffering the stream
+        "X-Accel-Buffering": "no"
+    })
+
+HISTORY_COLUMNS = (
+    "t.id, t.job_id, t.video_url, t.source_language, t.target_language, t.voice_id, t.status, "
+    "t.audio_path, t.media_hash, t.created_at, t.updated_at, t.total_seconds"
+)
+
+@router.get("/translations")
+async def translation_history(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[int] = None,
+    video_url: Optional[str] = None,
+    target_language: Optional[str] = None,
+    status: Optional[str] = None,
+    include_text: bool = False
+):
+    """
+    Newest-first history with keyset pagination: pass the returned next_cursor to get
+    the following page. Seeks on the primary key instead of OFFSET, so deep pages stay cheap.
+    """
+    conditions = []
+    params = []
+    for column, value in (('video_url', video_url), ('target_language', target_language), ('status', status)):
+        if value:
+            conditions.append(f"t.{column} = %s")
+            params.append(value)
+    if cursor is not None:
+        conditions.append("t.id < %s")
+        params.append(cursor)
+    columns = HISTORY_COLUMNS
+    joins = ""
+    if include_text:
+        columns += ", x.original_text, x.translated_text"
+        joins = " LEFT JOIN translation_texts x ON x.translation_id = t.id"
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"SELECT {columns} FROM translations t{joins}{where} ORDER BY t.id DESC LIMIT %s"
+    # One extra row tells us whether another page exists
+    rows = await run_blocking(fetch_all, sql, tuple(params) + (limit + 1,))
+    if rows is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": rows,
+        "next_cursor": rows[-1]['id'] if has_more else None
+    }
+
+@router.delete("/translation-memory")
+async def invalidate_translation_memory(
+    source_text: Optional[str] = None,
+    source_language: Optional[str] = None,
+    target_language: Optional[str] = None
+):
+    """Drop remembered translations matching the filters; at least one is required, so one call can't wipe the memory"""
+    if not (source_text or source_language or target_language):
+        raise HTTPException(status_code=400, detail="Pass source_text, source_language or target_language")
+    memory = get_translation_memory()
+    if memory is None:
+        raise HTTPException(status_code=404, detail="Translation memory is disabled")
+    removed = await run_blocking(memory.invalidate, source_text or None, source_language or None, target_language or None)
+    return {"removed": removed}
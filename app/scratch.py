@@ -0,0 +1,76 @@
+import os
+import time
+import uuid
+import shutil
+import contextvars
+from contextlib import contextmanager
+
+# Per-job scratch space for intermediate files (16 kHz PCM, TTS clips before the mux).
+# Defaults to tmpfs (/dev/shm) when it has SCRATCH_TMPFS_MIN_FREE_MB free, else local disk.
+SCRATCH_DIR = os.getenv('SCRATCH_DIR', '')
+SCRATCH_TMPFS_MIN_FREE_MB = float(os.getenv('SCRATCH_TMPFS_MIN_FREE_MB', 512))
+SCRATCH_DISK_DIR = os.path.join('downloads', 'scratch')
+TMPFS_DIR = '/dev/shm'
+# Scratch directories left behind by a crashed process are removed after this long
+SCRATCH_MAX_AGE_SECONDS = 6 * 3600
+
+# Scratch directory of the run the current task belongs to
+current_scratch_dir = contextvars.ContextVar('current_scratch_dir', default=None)
+
+_scratch_root = None
+
+def _tmpfs_free_mb():
+    try:
+        stat = os.statvfs(TMPFS_DIR)
+    except (OSError, AttributeError):
+        return 0
+    return stat.f_bavail * stat.f_frsize / (1024 * 1024)
+
+def scratch_root():
+    """Where job scratch directories are created (chosen once per process)"""
+    global _scratch_root
+    if _scratch_root is None:
+        if SCRATCH_DIR:
+            _scratch_root = SCRATCH_DIR
+        elif os.access(TMPFS_DIR, os.W_OK) and _tmpfs_free_mb() >= SCRATCH_TMPFS_MIN_FREE_MB:
+            _scratch_root = os.path.join(TMPFS_DIR, 'translate-scratch')
+        else:
+            _scratch_root = SCRATCH_DISK_DIR
+        print(f"[{time.strftime('%H:%M:%S')}] Job scratch space: {_scratch_root}", flush=True)
+    return _scratch_root
+
+@contextmanager
+def job_scratch(job_id: str = None):
+    """Create a scratch directory for one pipeline run and delete it (with anything left in it) afterwards"""
+    path = os.path.join(scratch_root(), job_id or uuid.uuid4().hex)
+    os.makedirs(path, exist_ok=True)
+    token = current_scratch_dir.set(path)
+    try:
+        yield path
+    finally:
+        current_scratch_dir.reset(token)
+        shutil.rmtree(path, ignore_errors=True)
+
+def scratch_dir():
+    """The current run's scratch directory (a shared one outside job_scratch)"""
+    path = current_scratch_dir.get() or os.path.join(SCRATCH_DISK_DIR, 'shared')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def sweep_scratch(max_age_seconds: float = SCRATCH_MAX_AGE_SECONDS):
+    """Remove scratch directories that have not been written to for max_age_seconds"""
+    root = scratch_root()
+    if not os.path.isdir(root):
+        return 0
+    removed = 0
+    now = time.time()
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if now - os.path.getmtime(path) <= max_age_seconds:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
@@ -0,0 +1,173 @@
+import os
+import re
+import math
+
+# Segment planning: Whisper segments are regrouped into sentence-sized units before
+# translation and TTS, so each unit is one TTS call with a time budget of its own
+SEGMENT_MERGE_GAP_SECONDS = float(os.getenv('SEGMENT_MERGE_GAP_SECONDS', 0.4))
+SEGMENT_MAX_SECONDS = float(os.getenv('SEGMENT_MAX_SECONDS', 12.0))
+# Units shorter than this are merged with the next one even across a sentence end
+SEGMENT_MIN_SECONDS = float(os.getenv('SEGMENT_MIN_SECONDS', 1.5))
+# Silence kept between one unit's speech and the next unit's start
+SEGMENT_BREATH_SECONDS = float(os.getenv('SEGMENT_BREATH_SECONDS', 0.15))
+# Budget past the end of the last unit (nothing follows it)
+SEGMENT_TAIL_SECONDS = float(os.getenv('SEGMENT_TAIL_SECONDS', 1.0))
+SEGMENT_PLANNING = os.getenv('SEGMENT_PLANNING', '1') == '1'
+
+SENTENCE_END = re.compile(r'[.!?。！？…]["\')\]]*$')
+# Split points for over-long segments: after sentence or clause punctuation
+CLAUSE_BREAK = re.compile(r'(?<=[.!?;:,。！？；，])\s+')
+
+OVERFLOW_BUCKETS = (0.25, 0.5, 1.0, 2.0)
+
+def _unit(start, end, text, sources):
+    return {'start': start, 'end': end, 'text': text.strip(), 'sources': list(sources)}
+
+def split_segment(seg, max_seconds: float = SEGMENT_MAX_SECONDS):
+    """
+    Break a segment longer than max_seconds at clause boundaries (or, failing that, between
+    words) into the fewest parts of about max_seconds or less, timed in proportion to their
+    characters.
+    """
+    duration = seg['end'] - seg['start']
+    text = seg['text'].strip()
+    if duration <= max_seconds or not text:
+        return [_unit(seg['start'], seg['end'], text, [seg['id']])]
+    parts = math.ceil(duration / max_seconds)
+    pieces = CLAUSE_BREAK.split(text)
+    if len(pieces) < parts:
+        pieces = text.split()
+    # Cut at the piece boundary nearest each even share of the characters: packing greedily
+    # up to a limit leaves a short trailing part, i.e. one more TTS call than needed
+    share = len(text) / parts
+    groups = [[]]
+    position = 0
+    for piece in pieces:
+        if groups[-1] and len(groups) < parts and position + len(piece) / 2 > share * len(groups):
+            groups.append([])
+        groups[-1].append(piece)
+        position += len(piece) + 1
+    units = []
+    start = seg['start']
+    total_chars = sum(len(" ".join(group)) for group in groups)
+    for group in groups:
+        part = " ".join(group)
+        end = start + duration * len(part) / total_chars
+        units.append(_unit(start, end, part, [seg['id']]))
+        start = end
+    units[-1]['end'] = seg['end']
+    return units
+
+class SegmentPlanner:
+    """
+    Incremental planner: feed() Whisper segments in time order and get back finished units.
+    Short adjacent segments within SEGMENT_MERGE_GAP_SECONDS are merged (up to
+    SEGMENT_MAX_SECONDS, stopping at sentence ends once a unit is SEGMENT_MIN_SECONDS long),
+    over-long ones are split. A unit is only released once the next one starts, because its
+    budget runs up to the next unit's start: speech may use the silence that follows it.
+    """
+
+    def __init__(self):
+        self._open = None
+        self._held = None
+        self._next_id = 0
+        self.source_segments = 0
+        self.merged = 0
+        self.split = 0
+
+    def _can_merge(self, unit, part):
+        if part['start'] - unit['end'] > SEGMENT_MERGE_GAP_SECONDS:
+            return False
+        if part['end'] - unit['start'] > SEGMENT_MAX_SECONDS:
+            return False
+        return unit['end'] - unit['start'] < SEGMENT_MIN_SECONDS or not SENTENCE_END.search(unit['text'])
+
+    def _close(self, unit):
+        """Finish the open unit; returns the previously held one, now that its budget is known"""
+        released = []
+        if self._held is not None:
+            self._held['budget'] = max(unit['start'] - SEGMENT_BREATH_SECONDS, self._held['end']) - self._held['start']
+            released.append(self._held)
+        unit['id'] = self._next_id
+        self._next_id += 1
+        self._held = unit
+        return released
+
+    def feed(self, seg):
+        self.source_segments += 1
+        if not SEGMENT_PLANNING:
+            # One unit per segment, budgeted to the segment's own duration
+            self._next_id += 1
+            return [dict(seg, budget=seg['end'] - seg['start'], sources=[seg['id']])]
+        parts = split_segment(seg)
+        if len(parts) > 1:
+            self.split += 1
+        released = []
+        for part in parts:
+            if not part['text']:
+                continue
+            if self._open is not None and self._can_merge(self._open, part):
+                self._open['end'] = part['end']
+                self._open['text'] = f"{self._open['text']} {part['text']}"
+                if part['sources'][0] not in self._open['sources']:
+                    self._open['sources'].extend(part['sources'])
+                    self.merged += 1
+                continue
+            if self._open is not None:
+                released += self._close(self._open)
+            self._open = part
+        return released
+
+    def flush(self):
+        released = []
+        if self._open is not None:
+            released += self._close(self._open)
+            self._open = None
+        if self._held is not None:
+            self._held['budget'] = self._held['end'] - self._held['start'] + SEGMENT_TAIL_SECONDS
+            released.append(self._held)
+            self._held = None
+        return released
+
+    def stats(self):
+        return {
+            'source_segments': self.source_segments,
+            'tts_calls': self._next_id,
+            'tts_calls_saved': self.source_segments - self._next_id,
+            'merged_segments': self.merged,
+            'split_segments': self.split,
+        }
+
+def plan_segments(segments):
+    """Plan a complete segment list; returns (units, stats). SEGMENT_PLANNING=0 keeps one unit per segment."""
+    planner = SegmentPlanner()
+    units = []
+    for seg in segments:
+        units += planner.feed(seg)
+    units += planner.flush()
+    return units, planner.stats()
+
+def overflow_summary(fits):
+    """
+    Distribution of how clips fit their budgets. `fits` is the mixer's (speed, overflow seconds)
+    per clip; overflow is speech still running past the budget after the capped speed-up.
+    """
+    overflows = sorted(overflow for _, overflow in fits if overflow > 0)
+    buckets = {f"<={bound}s": 0 for bound in OVERFLOW_BUCKETS}
+    buckets[f">{OVERFLOW_BUCKETS[-1]}s"] = 0
+    for seconds in overflows:
+        label = next((f"<={bound}s" for bound in OVERFLOW_BUCKETS if seconds <= bound), f">{OVERFLOW_BUCKETS[-1]}s")
+        buckets[label] += 1
+    def percentile(q):
+        # Nearest-rank percentile
+        return round(overflows[max(0, math.ceil(q * len(overflows)) - 1)], 3) if overflows else 0.0
+    return {
+        'clips': len(fits),
+        'stretched': sum(1 for speed, _ in fits if speed > 1.0),
+        'overflowed': len(overflows),
+        'p50_seconds': percentile(0.5),
+        'p90_seconds': percentile(0.9),
+        'max_seconds': round(overflows[-1], 3) if overflows else 0.0,
+        'total_seconds': round(sum(overflows, 0.0), 3),
+        'buckets': buckets,
+    }
@@ -0,0 +1,66 @@
+import time
+import asyncio
+from collections import deque
+
+# Marks the end of a stream on a StageQueue
+END_OF_STREAM = object()
+
+class StageQueue(asyncio.Queue):
+    """
+    Bounded asyncio queue that records its depth on every put, plus how long
+    items waited, so a streaming run can show which stage is the bottleneck.
+    END_OF_STREAM sentinels pass through but are left out of every figure.
+    """
+
+    def __init__(self, name: str, maxsize: int = 0):
+        super().__init__(maxsize=maxsize)
+        self.name = name
+        self.items = 0
+        self.taken = 0
+        self.max_depth = 0
+        # Sentinels currently in the queue, so depths count real items only
+        self._sentinels = 0
+        self._depth_total = 0
+        self._wait_total = 0.0
+        self._enqueued_at = deque()
+        # Time producers spent blocked on a full queue (back-pressure from the consumer)
+        self.blocked_seconds = 0.0
+
+    async def put(self, item):
+        # asyncio.Queue.put finishes through put_nowait, which records the depth
+        start = time.monotonic()
+        await super().put(item)
+        self.blocked_seconds += time.monotonic() - start
+
+    def put_nowait(self, item):
+        super().put_nowait(item)
+        if item is END_OF_STREAM:
+            self._sentinels += 1
+            return
+        self._record_put()
+
+    def _record_put(self):
+        depth = self.qsize() - self._sentinels
+        self.items += 1
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+        self._enqueued_at.append(time.monotonic())
+
+    def get_nowait(self):
+        item = super().get_nowait()
+        if item is END_OF_STREAM:
+            self._sentinels -= 1
+        elif self._enqueued_at:
+            self._wait_total += time.monotonic() - self._enqueued_at.popleft()
+            self.taken += 1
+        return item
+
+    def stats(self):
+        return {
+            'items': self.items,
+            'max_depth': self.max_depth,
+            'avg_depth': round(self._depth_total / self.items, 2) if self.items else 0.0,
+            'avg_wait_seconds': round(self._wait_total / self.taken, 3) if self.taken else 0.0,
+            'producer_blocked_seconds': round(self.blocked_seconds, 3),
+            'capacity': self.maxsize,
+        }
@@ -0,0 +1,82 @@
+import os
+import uuid
+import subprocess
+from app.ffmpeg_tools import ffmpeg_cmd
+from app.metrics import span
+from app.output_store import get_output_store
+
+# Output modes for /api/translate: a full dub, caption files only, or captions muxed as a soft track
+OUTPUT_MODES = ('dub', 'subtitles', 'softsub')
+
+# ISO 639-2 codes for the track language tag (mp4 wants three letters)
+ISO_639_2 = {
+    'en': 'eng', 'hi': 'hin', 'ta': 'tam', 'ml': 'mal', 'es': 'spa', 'fr': 'fra',
+    'de': 'deu', 'ja': 'jpn', 'te': 'tel', 'kn': 'kan', 'bn': 'ben', 'mr': 'mar',
+    'gu': 'guj', 'pa': 'pan', 'ur': 'urd', 'zh': 'zho', 'ko': 'kor', 'ar': 'ara',
+    'ru': 'rus', 'pt': 'por', 'it': 'ita',
+}
+
+def format_timestamp(seconds: float, separator: str = ','):
+    millis = max(0, int(round(seconds * 1000)))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+def subtitle_cues(segments, translations):
+    """(start, end, text) for every segment with a translation, in time order"""
+    cues = []
+    for seg in segments:
+        text = " ".join((translations.get(seg['id']) or "").split())
+        if text:
+            cues.append((seg['start'], max(seg['end'], seg['start'] + 0.1), text))
+    return cues
+
+def to_srt(cues):
+    blocks = [
+        f"{index}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n"
+        for index, (start, end, text) in enumerate(cues, start=1)
+    ]
+    return "\n".join(blocks)
+
+def to_vtt(cues):
+    blocks = [f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n" for start, end, text in cues]
+    return "WEBVTT\n\n" + "\n".join(blocks)
+
+def write_subtitles(segments, translations):
+    """Write SRT and WebVTT files for the translated segments to the output store; returns their URLs as {'srt': ..., 'vtt': ...}"""
+    store = get_output_store()
+    cues = subtitle_cues(segments, translations)
+    name = f"subtitles_{uuid.uuid4()}"
+    urls = {}
+    for ext, render in (('srt', to_srt), ('vtt', to_vtt)):
+        path = store.path('subtitles', f"{name}.{ext}")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render(cues))
+        store.added(path)
+        urls[ext] = store.url('subtitles', f"{name}.{ext}")
+    return urls
+
+def mux_soft_subtitles(video_path: str, audio_path: str, subtitle_path: str, output_path: str, language: str):
+    """
+    Add the subtitles as a selectable mov_text track. Video and audio are stream-copied,
+    so this is a container remux, not a re-encode. `audio_path` may be the video file
+    itself or the separately downloaded audio stream.
+    """
+    cmd = [ffmpeg_cmd, '-y', '-i', video_path]
+    audio_input = 0
+    if audio_path and audio_path != video_path:
+        cmd += ['-i', audio_path]
+        audio_input = 1
+    cmd += [
+        '-i', subtitle_path,
+        '-map', '0:v?', '-map', f'{audio_input}:a?', '-map', f'{audio_input + 1}:s',
+        '-c:v', 'copy', '-c:a', 'copy',
+        '-c:s', 'mov_text',
+        '-metadata:s:s:0', f"language={ISO_639_2.get(language.lower()[:2], 'und')}",
+        output_path
+    ]
+    with span('mux') as stage:
+        subprocess.run(cmd, check=True)
+        stage.add_file(output_path)
+    return output_path
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+
+# Transcript cache configuration
+TRANSCRIPT_CACHE_ENABLED = os.getenv('TRANSCRIPT_CACHE_ENABLED', '1') == '1'
+TRANSCRIPT_CACHE_DIR = os.getenv('TRANSCRIPT_CACHE_DIR', os.path.join('cache', 'transcripts'))
+TRANSCRIPT_CACHE_MAX_MB = float(os.getenv('TRANSCRIPT_CACHE_MAX_MB', 256))
+TRANSCRIPT_CACHE_MAX_AGE_DAYS = float(os.getenv('TRANSCRIPT_CACHE_MAX_AGE_DAYS', 30))
+# Temp files older than this belong to a writer that died before its rename
+STALE_TMP_SECONDS = 600
+
+def transcript_cache_key(media_hash: str, model_name: str, options: dict) -> str:
+    payload = json.dumps({'media': media_hash, 'model': model_name, 'options': options}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class TranscriptCache:
+    """
+    Whisper results ({'text', 'language', 'segments'}) stored as JSON, keyed on media hash + model + options.
+    Hits refresh the mtime; evict() drops expired entries, then least recently used ones until
+    the directory is under max_bytes (the output janitor calls it periodically).
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age_seconds: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str):
+        path = self.path_for(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+                raise FileNotFoundError(path)
+            with open(path, encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: dict):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            'text': result['text'],
+            'language': result['language'],
+            'segments': result['segments'],
+        }
+        # Write then rename so concurrent jobs never read a half-written file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, default=float)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes; returns the number removed"""
+        now = time.time()
+        entries = []
+        total = 0
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith('.tmp'):
+                    # Leftover from a crashed writer
+                    if now - stat.st_mtime > STALE_TMP_SECONDS:
+                        removed += self._remove(path)
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds:
+                    removed += self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+        return removed
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            return 0
+        with self._lock:
+            self.evictions += 1
+        return 1
+
+_transcript_cache = None
+
+def get_transcript_cache():
+    """Shared cache instance, or None when TRANSCRIPT_CACHE_ENABLED=0"""
+    global _transcript_cache
+    if _transcript_cache is None and TRANSCRIPT_CACHE_ENABLED:
+        _transcript_cache = TranscriptCache(
+            TRANSCRIPT_CACHE_DIR,
+            max_bytes=int(TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024),
+            max_age_seconds=TRANSCRIPT_CACHE_MAX_AGE_DAYS * 86400
+        )
+    return _transcript_cache
@@ -0,0 +1,121 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from app.tts_cache import normalize_text
+
+# Translation memory configuration
+TM_ENABLED = os.getenv('TM_ENABLED', '1') == '1'
+TM_PATH = os.getenv('TM_PATH', os.path.join('cache', 'translation_memory.db'))
+TM_LRU_SIZE = int(os.getenv('TM_LRU_SIZE', 10000))
+TM_TTL_DAYS = float(os.getenv('TM_TTL_DAYS', 90))  # 0 keeps entries forever
+
+class TranslationMemory:
+    """
+    Segment-level translation cache: an in-process LRU in front of a SQLite table
+    keyed on (normalized source text, source language, target language).
+    """
+
+    def __init__(self, path: str, lru_size: int, ttl_seconds: float):
+        self.path = path
+        self.lru_size = lru_size
+        self.ttl_seconds = ttl_seconds
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # WAL lets several workers and processes read while one writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS translation_memory (
+                source_text TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                translated_text TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (source_text, source_lang, target_lang)
+            )
+        """)
+        self._db.commit()
+
+    def _expired(self, created_at):
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key, value):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get_many(self, texts, source_lang: str, target_lang: str):
+        """Return {text: translation} for every text found in memory"""
+        found = {}
+        missing = []
+        with self._lock:
+            for text in texts:
+                key = (normalize_text(text), source_lang, target_lang)
+                entry = self._lru.get(key)
+                if entry and not self._expired(entry[1]):
+                    self._lru.move_to_end(key)
+                    found[text] = entry[0]
+                else:
+                    missing.append(text)
+            for text in missing:
+                key = (normalize_text(text), source_lang, target_lang)
+                row = self._db.execute(
+                    "SELECT translated_text, created_at FROM translation_memory "
+                    "WHERE source_text = ? AND source_lang = ? AND target_lang = ?",
+                    key
+                ).fetchone()
+                if row and not self._expired(row[1]):
+                    self._remember(key, row)
+                    found[text] = row[0]
+        return found
+
+    def put_many(self, pairs, source_lang: str, target_lang: str):
+        """Store (source text, translation) pairs"""
+        now = time.time()
+        rows = [(normalize_text(text), source_lang, target_lang, translated, now) for text, translated in pairs]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO translation_memory "
+                "(source_text, source_lang, target_lang, translated_text, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._db.commit()
+            for row in rows:
+                self._remember(row[:3], (row[3], row[4]))
+
+    def invalidate(self, source_text: str = None, source_lang: str = None, target_lang: str = None):
+        """Delete matching entries (all entries when no filter is given); returns the number removed"""
+        clauses = []
+        params = []
+        if source_text is not None:
+            clauses.append("source_text = ?")
+            params.append(normalize_text(source_text))
+        if source_lang is not None:
+            clauses.append("source_lang = ?")
+            params.append(source_lang)
+        if target_lang is not None:
+            clauses.append("target_lang = ?")
+            params.append(target_lang)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            removed = self._db.execute(f"DELETE FROM translation_memory{where}", params).rowcount
+            if self.ttl_seconds > 0:
+                self._db.execute("DELETE FROM translation_memory WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self._db.commit()
+            # Cheaper to drop the whole LRU than to filter it
+            self._lru.clear()
+        return removed
+
+_translation_memory = None
+
+def get_translation_memory():
+    """Shared memory instance, or None when TM_ENABLED=0"""
+    global _translation_memory
+    if _translation_memory is None and TM_ENABLED:
+        _translation_memory = TranslationMemory(TM_PATH, TM_LRU_SIZE, TM_TTL_DAYS * 86400)
+    return _translation_memory
@@ -0,0 +1,104 @@
+import os
+import time
+
+# Google rejects payloads over 5000 characters per request
+GOOGLE_MAX_CHARS = 5000
+# Segments are packed one per line; Google keeps line breaks stable across a request
+SEGMENT_DELIMITER = "\n"
+
+class TranslatorBackend:
+    """
+    Translation provider interface. Subclasses implement translate_chunk for one
+    request; translate_batch packs many texts into as few requests as possible.
+    """
+    name = "base"
+    max_chars = GOOGLE_MAX_CHARS
+
+    def translate_chunk(self, text: str, source_lang: str, target_lang: str) -> str:
+        raise NotImplementedError
+
+    def translate_batch(self, texts, source_lang: str, target_lang: str):
+        """Translate a list of texts, returning translations in the same order"""
+        texts = [" ".join(t.split()) for t in texts]
+        results = list(texts)
+        for chunk in pack_texts(texts, self.max_chars):
+            payload = SEGMENT_DELIMITER.join(texts[i] for i in chunk)
+            try:
+                lines = self.translate_chunk(payload, source_lang, target_lang).split(SEGMENT_DELIMITER)
+            except Exception as e:
+                print(f"[{time.strftime('%H:%M:%S')}] Translation error: {e}", flush=True)
+                continue # Fallback to original
+            if len(lines) != len(chunk):
+                # The provider merged or split lines, so the mapping is ambiguous; retry one by one
+                lines = [self._translate_single(texts[i], source_lang, target_lang) for i in chunk]
+            for i, line in zip(chunk, lines):
+                results[i] = line.strip()
+        return results
+
+    def _translate_single(self, text, source_lang, target_lang):
+        try:
+            return self.translate_chunk(text, source_lang, target_lang)
+        except Exception as e:
+            print(f"[{time.strftime('%H:%M:%S')}] Translation error: {e}", flush=True)
+            return text
+
+class GoogleTranslatorBackend(TranslatorBackend):
+    name = "google"
+
+    def __init__(self):
+        self._translators = {}
+
+    def translate_chunk(self, text, source_lang, target_lang):
+        from deep_translator import GoogleTranslator
+        key = (source_lang, target_lang)
+        if key not in self._translators:
+            self._translators[key] = GoogleTranslator(source=source_lang, target=target_lang)
+        return self._translators[key].translate(text)
+
+class FakeTranslatorBackend(TranslatorBackend):
+    """Offline backend for tests: prefixes every line with the target language and records each request"""
+    name = "fake"
+
+    def __init__(self, max_chars: int = GOOGLE_MAX_CHARS):
+        self.max_chars = max_chars
+        self.requests = []
+
+    def translate_chunk(self, text, source_lang, target_lang):
+        self.requests.append(text)
+        return SEGMENT_DELIMITER.join(f"[{target_lang}] {line}" for line in text.split(SEGMENT_DELIMITER))
+
+def pack_texts(texts, max_chars: int):
+    """Group text indices into chunks whose delimited payload stays within max_chars"""
+    chunks = []
+    current = []
+    size = 0
+    for i, text in enumerate(texts):
+        added = len(text) + (len(SEGMENT_DELIMITER) if current else 0)
+        if current and size + added > max_chars:
+            chunks.append(current)
+            current = []
+            added = len(text)
+            size = 0
+        # A single text longer than the limit still goes out on its own
+        current.append(i)
+        size += added
+    if current:
+        chunks.append(current)
+    return chunks
+
+_backends = {
+    'google': GoogleTranslatorBackend,
+    'fake': FakeTranslatorBackend,
+}
+_backend = None
+
+def get_translator_backend():
+    global _backend
+    if _backend is None:
+        name = os.getenv('TRANSLATOR_BACKEND', 'google')
+        _backend = _backends.get(name, GoogleTranslatorBackend)()
+    return _backend
+
+def set_translator_backend(backend: TranslatorBackend):
+    global _backend
+    _backend = backend
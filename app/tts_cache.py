@@ -0,0 +1,198 @@
+import os
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+import contextvars
+import unicodedata
+from contextlib import contextmanager
+
+# TTS cache configuration
+TTS_CACHE_ENABLED = os.getenv('TTS_CACHE_ENABLED', '1') == '1'
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join('cache', 'tts'))
+TTS_CACHE_MAX_MB = float(os.getenv('TTS_CACHE_MAX_MB', 1024))
+TTS_CACHE_MAX_AGE_DAYS = float(os.getenv('TTS_CACHE_MAX_AGE_DAYS', 30))
+
+# Files used within this window are not evicted for space (covers other processes sharing the
+# directory); entries handed out inside cache_leases() are pinned until the block exits
+EVICTION_GRACE_SECONDS = 600
+# Rescan the directory for eviction after this many new entries
+SCAN_EVERY_PUTS = 50
+
+# Cache entries handed out during the current pipeline run, as (cache, path)
+current_leases = contextvars.ContextVar('current_leases', default=None)
+
+@contextmanager
+def cache_leases():
+    """Pin every cache entry returned by get()/put() inside the block until the block exits"""
+    leases = []
+    token = current_leases.set(leases)
+    try:
+        yield leases
+    finally:
+        current_leases.reset(token)
+        for cache, path in leases:
+            cache.release(path)
+
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize('NFC', " ".join(text.split()))
+
+def cache_key(text: str, voice: str, engine: str, preset: str = "") -> str:
+    payload = "\x1f".join([engine, voice, preset or "", normalize_text(text)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class TTSCache:
+    """
+    Content-addressed store of synthesized clips. Entries are written atomically
+    (temp file + os.replace) so concurrent jobs and processes can share the directory;
+    hits refresh the mtime, which eviction uses as the LRU clock. Entries a running job
+    holds (see cache_leases) are never evicted, however long the job takes to read them.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age_seconds: float):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._puts_since_scan = SCAN_EVERY_PUTS
+        self._pins = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}{ext}")
+
+    def owns(self, path: str) -> bool:
+        return os.path.abspath(path).startswith(self.directory + os.sep)
+
+    def _lease(self, path: str):
+        leases = current_leases.get()
+        if leases is None:
+            return
+        with self._lock:
+            self._pins[path] = self._pins.get(path, 0) + 1
+        leases.append((self, path))
+
+    def _unlease(self, path: str):
+        leases = current_leases.get()
+        if leases is None:
+            return
+        leases.remove((self, path))
+        self.release(path)
+
+    def release(self, path: str):
+        with self._lock:
+            count = self._pins.get(path, 0) - 1
+            if count > 0:
+                self._pins[path] = count
+            else:
+                self._pins.pop(path, None)
+
+    def pinned(self, path: str) -> bool:
+        with self._lock:
+            return path in self._pins
+
+    def get(self, key: str, ext: str):
+        path = self.path_for(key, ext)
+        # Pinned before the mtime check, so a concurrent evict() can't remove it in between
+        self._lease(path)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age > self.max_age_seconds:
+                raise FileNotFoundError(path)
+            os.utime(path)
+        except OSError:
+            self._unlease(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, key: str, ext: str, source_path: str) -> str:
+        """Move a freshly synthesized clip into the cache and return its cached path"""
+        path = self.path_for(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        shutil.move(source_path, tmp_path)
+        self._lease(path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.stores += 1
+            self._puts_since_scan += 1
+            scan = self._puts_since_scan >= SCAN_EVERY_PUTS
+            if scan:
+                self._puts_since_scan = 0
+        if scan:
+            self.evict()
+        return path
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        now = time.time()
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith('.tmp'):
+                    # Leftover from a crashed writer
+                    if now - stat.st_mtime > EVICTION_GRACE_SECONDS:
+                        self._remove(path)
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds and not self.pinned(path):
+                    self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if now - mtime < EVICTION_GRACE_SECONDS:
+                break
+            if self.pinned(path):
+                continue
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+            }
+
+_tts_cache = None
+
+def get_tts_cache():
+    """Shared cache instance, or None when TTS_CACHE_ENABLED=0"""
+    global _tts_cache
+    if _tts_cache is None and TTS_CACHE_ENABLED:
+        _tts_cache = TTSCache(
+            TTS_CACHE_DIR,
+            max_bytes=int(TTS_CACHE_MAX_MB * 1024 * 1024),
+            max_age_seconds=TTS_CACHE_MAX_AGE_DAYS * 86400
+        )
+    return _tts_cache
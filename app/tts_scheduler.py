@@ -0,0 +1,92 @@
+import os
+import time
+import random
+import asyncio
+
+# TTS scheduling configuration
+TTS_MAX_IN_FLIGHT = int(os.getenv('TTS_MAX_IN_FLIGHT', 8))
+TTS_RATE_PER_SEC = float(os.getenv('TTS_RATE_PER_SEC', 10))
+TTS_BURST = int(os.getenv('TTS_BURST', TTS_MAX_IN_FLIGHT))
+TTS_MAX_RETRIES = int(os.getenv('TTS_MAX_RETRIES', 4))
+TTS_BACKOFF_BASE = float(os.getenv('TTS_BACKOFF_BASE', 0.5))
+TTS_BACKOFF_MAX = float(os.getenv('TTS_BACKOFF_MAX', 10))
+
+# Errors worth retrying: dropped sockets, timeouts and edge-tts throttling. Other OSErrors
+# (missing files, permissions, a full disk) won't go away by waiting, so they fail at once.
+RETRYABLE_ERRORS = (ConnectionError, TimeoutError, asyncio.TimeoutError)
+try:
+    import aiohttp
+    RETRYABLE_ERRORS += (aiohttp.ClientError,)
+except ImportError:
+    pass
+try:
+    from edge_tts.exceptions import NoAudioReceived, WebSocketError
+    RETRYABLE_ERRORS += (NoAudioReceived, WebSocketError)
+except ImportError:
+    pass
+
+class TokenBucket:
+    """Async token bucket: allows `rate` acquisitions per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def backoff_delay(attempt: int, base: float = TTS_BACKOFF_BASE, cap: float = TTS_BACKOFF_MAX):
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+async def call_with_retry(synth_fn, item, bucket: TokenBucket, semaphore: asyncio.Semaphore, max_retries: int = None, label=""):
+    """
+    Run synth_fn(item) under the semaphore and rate limit, retrying connection
+    failures with jittered exponential backoff.
+    """
+    max_retries = TTS_MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        async with semaphore:
+            await bucket.acquire()
+            try:
+                return await synth_fn(item)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"[{time.strftime('%H:%M:%S')}] TTS segment {label} failed ({e!r}), retrying in {delay:.2f}s", flush=True)
+        # Sleep outside the semaphore so a backing-off segment doesn't hold a slot
+        await asyncio.sleep(delay)
+        attempt += 1
+
+def make_limits(max_in_flight: int = None, rate: float = None):
+    """Semaphore and token bucket shared by every synthesis call of one job"""
+    max_in_flight = max_in_flight or TTS_MAX_IN_FLIGHT
+    rate = TTS_RATE_PER_SEC if rate is None else rate
+    return asyncio.Semaphore(max_in_flight), TokenBucket(rate, min(TTS_BURST, max_in_flight))
+
+async def synthesize_in_order(items, synth_fn, max_in_flight: int = None, rate: float = None, max_retries: int = None):
+    """
+    Run synth_fn(item) for every item concurrently, at most max_in_flight at a time and
+    no faster than `rate` starts per second. Connection failures are retried with
+    jittered exponential backoff. Results come back in the order of `items`.
+    """
+    semaphore, bucket = make_limits(max_in_flight, rate)
+    return await asyncio.gather(*(
+        call_with_retry(synth_fn, item, bucket, semaphore, max_retries, label=i)
+        for i, item in enumerate(items)
+    ))
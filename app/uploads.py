@@ -0,0 +1,337 @@
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+
+# Upload configuration
+UPLOAD_DIR = os.getenv('UPLOAD_DIR', os.path.join('downloads', 'uploads'))
+UPLOAD_MAX_MB = float(os.getenv('UPLOAD_MAX_MB', 2048))
+UPLOAD_CHUNK_BYTES = int(os.getenv('UPLOAD_CHUNK_BYTES', 1024 * 1024))
+# Unfinished resumable uploads are deleted after this long without a new chunk
+UPLOAD_SESSION_TTL_HOURS = float(os.getenv('UPLOAD_SESSION_TTL_HOURS', 24))
+
+# Bytes needed to recognise every container in sniff_media_type
+SNIFF_BYTES = 512
+
+class UploadTooLargeError(Exception):
+    pass
+
+class UnsupportedMediaError(Exception):
+    pass
+
+class UploadOffsetError(Exception):
+    """A chunk did not start where the stored upload ends; `offset` is where it should"""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+def max_upload_bytes():
+    return int(UPLOAD_MAX_MB * 1024 * 1024)
+
+def sniff_media_type(header: bytes):
+    """Container extension from the file's leading bytes, or None if it isn't audio/video we can decode"""
+    if len(header) >= 12 and header[4:8] == b'ftyp':
+        brand = header[8:12]
+        if brand in (b'qt  ',):
+            return '.mov'
+        if brand.startswith(b'M4A') or brand.startswith(b'M4B'):
+            return '.m4a'
+        return '.mp4'
+    if header.startswith(b'\x1a\x45\xdf\xa3'):
+        return '.webm' if b'webm' in header[:64] else '.mkv'
+    if header.startswith(b'RIFF') and header[8:12] == b'AVI ':
+        return '.avi'
+    if header.startswith(b'RIFF') and header[8:12] == b'WAVE':
+        return '.wav'
+    if header.startswith(b'FLV'):
+        return '.flv'
+    if header.startswith(b'OggS'):
+        return '.ogg'
+    if header.startswith(b'fLaC'):
+        return '.flac'
+    if header.startswith(b'ID3'):
+        return '.mp3'
+    if header.startswith(b'\x00\x00\x01\xba'):
+        return '.mpg'
+    if len(header) > 188 and header[0] == 0x47 and header[188] == 0x47:
+        return '.ts'
+    if len(header) >= 2 and header[0] == 0xff:
+        # MPEG audio frame sync: 0xFFF (AAC ADTS) or 0xFFE (MP3)
+        if header[1] & 0xf6 == 0xf0:
+            return '.aac'
+        if header[1] & 0xe0 == 0xe0:
+            return '.mp3'
+    return None
+
+def display_name(filename: str):
+    """The client's file name reduced to something safe to store and show (never used as a path)"""
+    name = os.path.basename((filename or '').replace('\\', '/'))
+    name = re.sub(r'[^\w.\- ]', '_', name).strip(' .')
+    return name[:120] or 'upload'
+
+class StoredUpload:
+    def __init__(self, path: str, filename: str, size: int, sha256: str, extension: str):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.extension = extension
+
+    @property
+    def source_key(self):
+        # Same form as result_cache.source_key_for_file, without re-reading the file
+        return f"sha256:{self.sha256}"
+
+def _append(f, digest, chunk):
+    f.write(chunk)
+    digest.update(chunk)
+
+async def save_upload(upload, directory: str = UPLOAD_DIR, max_bytes: int = None):
+    """
+    Stream a multipart UploadFile to disk in UPLOAD_CHUNK_BYTES chunks off the event loop,
+    hashing as it goes. The first chunk is sniffed, so non-media is rejected before the
+    rest is copied; the stored name is a uuid plus the sniffed extension.
+    Raises UploadTooLargeError / UnsupportedMediaError (the partial file is removed).
+    """
+    max_bytes = max_bytes or max_upload_bytes()
+    os.makedirs(directory, exist_ok=True)
+    partial = os.path.join(directory, f"{uuid.uuid4()}.part")
+    digest = hashlib.sha256()
+    size = 0
+    extension = None
+    f = await asyncio.to_thread(open, partial, 'wb')
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            if extension is None:
+                extension = sniff_media_type(chunk[:SNIFF_BYTES])
+                if extension is None:
+                    raise UnsupportedMediaError("Uploaded file is not a supported audio or video format")
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+            await asyncio.to_thread(_append, f, digest, chunk)
+        if extension is None:
+            raise UnsupportedMediaError("Uploaded file is empty")
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        _remove(partial)
+        raise
+    await asyncio.to_thread(f.close)
+    path = partial[:-len('.part')] + extension
+    os.replace(partial, path)
+    return StoredUpload(path, display_name(upload.filename), size, digest.hexdigest(), extension)
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class UploadSessions:
+    """
+    Resumable uploads: a session is created with the total size, then chunks are PUT at
+    increasing offsets. The bytes received so far live in `<id>.part` (its size is the
+    offset, so sessions survive restarts) next to a small `<id>.json` with the metadata.
+    The running SHA-256 is kept in memory and rebuilt from the part file if lost.
+    """
+
+    def __init__(self, directory: str = UPLOAD_DIR):
+        self.directory = directory
+        self._digests = {}
+        self._locks = {}
+
+    def _paths(self, upload_id: str):
+        if not re.fullmatch(r'[0-9a-f]{32}', upload_id or ''):
+            raise KeyError(upload_id)
+        base = os.path.join(self.directory, upload_id)
+        return base + '.part', base + '.json'
+
+    def _lock(self, upload_id: str):
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    def _read_meta(self, upload_id: str):
+        _, meta_path = self._paths(upload_id)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise KeyError(upload_id)
+
+    def _write_meta(self, upload_id: str, meta: dict):
+        _, meta_path = self._paths(upload_id)
+        temp_path = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, meta_path)
+
+    def create(self, filename: str, size: int):
+        if size <= 0:
+            raise UnsupportedMediaError("Upload size must be positive")
+        if size > max_upload_bytes():
+            raise UploadTooLargeError(f"Upload exceeds the {UPLOAD_MAX_MB:.0f} MB limit")
+        os.makedirs(self.directory, exist_ok=True)
+        self.expire()
+        upload_id = uuid.uuid4().hex
+        part_path, _ = self._paths(upload_id)
+        open(part_path, 'wb').close()
+        meta = {'filename': display_name(filename), 'size': size, 'created_at': time.time(), 'extension': None, 'sha256': None}
+        self._write_meta(upload_id, meta)
+        self._digests[upload_id] = (0, hashlib.sha256())
+        return self.status(upload_id)
+
+    def status(self, upload_id: str):
+        meta = self._read_meta(upload_id)
+        part_path, _ = self._paths(upload_id)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else meta['size']
+        return {
+            'upload_id': upload_id,
+            'filename': meta['filename'],
+            'size': meta['size'],
+            'offset': offset,
+            'complete': meta['sha256'] is not None,
+            'sha256': meta['sha256'],
+        }
+
+    def _digest_at(self, upload_id: str, offset: int):
+        known = self._digests.get(upload_id)
+        if known and known[0] == offset:
+            return known[1]
+        # Restarted (or out of sync): rebuild from what is on disk
+        part_path, _ = self._paths(upload_id)
+        digest = hashlib.sha256()
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b''):
+                digest.update(chunk)
+        return digest
+
+    async def append(self, upload_id: str, offset: int, chunks):
+        """
+        Write the async iterable `chunks` at `offset`, which must equal the bytes already
+        stored (UploadOffsetError otherwise). Finishes the upload once all bytes are in.
+        """
+        async with self._lock(upload_id):
+            state = await asyncio.to_thread(self.status, upload_id)
+            if state['complete']:
+                return state
+            if offset != state['offset']:
+                raise UploadOffsetError(f"Upload is at offset {state['offset']}, not {offset}", state['offset'])
+            meta = await asyncio.to_thread(self._read_meta, upload_id)
+            part_path, _ = self._paths(upload_id)
+            digest = await asyncio.to_thread(self._digest_at, upload_id, offset)
+            f = await asyncio.to_thread(open, part_path, 'ab')
+            try:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if offset + len(chunk) > meta['size']:
+                        raise UploadTooLargeError(f"Chunk runs past the declared size of {meta['size']} bytes")
+                    await asyncio.to_thread(_append, f, digest, chunk)
+                    offset += len(chunk)
+                    if meta['extension'] is None and (offset >= SNIFF_BYTES or offset == meta['size']):
+                        # Enough of the header is in: reject non-media before taking the rest
+                        await asyncio.to_thread(f.flush)
+                        meta['extension'] = await asyncio.to_thread(self._sniff, part_path)
+                        if meta['extension'] is None:
+                            raise UnsupportedMediaError("Uploaded file is not a supported audio or video format")
+                        await asyncio.to_thread(self._write_meta, upload_id, meta)
+            except UnsupportedMediaError:
+                await asyncio.to_thread(f.close)
+                self.discard(upload_id)
+                raise
+            finally:
+                if not f.closed:
+                    await asyncio.to_thread(f.close)
+                    self._digests[upload_id] = (offset, digest)
+
+            if offset == meta['size']:
+                meta['sha256'] = digest.hexdigest()
+                os.replace(part_path, self.media_path(upload_id, meta))
+                await asyncio.to_thread(self._write_meta, upload_id, meta)
+                self._digests.pop(upload_id, None)
+            return self.status(upload_id)
+
+    def _sniff(self, part_path: str):
+        with open(part_path, 'rb') as f:
+            return sniff_media_type(f.read(SNIFF_BYTES))
+
+    def media_path(self, upload_id: str, meta: dict = None):
+        meta = meta or self._read_meta(upload_id)
+        return os.path.join(self.directory, f"{upload_id}{meta['extension']}")
+
+    def claim(self, upload_id: str):
+        """Hand a completed upload to a job: returns its StoredUpload and forgets the session"""
+        meta = self._read_meta(upload_id)
+        if meta['sha256'] is None:
+            raise UploadOffsetError("Upload is not complete", self.status(upload_id)['offset'])
+        _, meta_path = self._paths(upload_id)
+        _remove(meta_path)
+        self._locks.pop(upload_id, None)
+        return StoredUpload(self.media_path(upload_id, meta), meta['filename'], meta['size'], meta['sha256'], meta['extension'])
+
+    def discard(self, upload_id: str):
+        """Delete a session and its bytes, whether still partial or completed but never claimed"""
+        part_path, meta_path = self._paths(upload_id)
+        try:
+            meta = self._read_meta(upload_id)
+        except KeyError:
+            meta = None
+        if meta and meta['sha256'] is not None:
+            _remove(self.media_path(upload_id, meta))
+        _remove(part_path)
+        _remove(meta_path)
+        self._digests.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+
+    def expire(self, max_age_seconds: float = UPLOAD_SESSION_TTL_HOURS * 3600):
+        """
+        Delete sessions (finished or not) that have not been written to within max_age_seconds,
+        and any other file in the directory that old with no session: uploads a job never got
+        to delete because the server stopped while it was queued or running.
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        removed = 0
+        now = time.time()
+        names = os.listdir(self.directory)
+        sessions = {name[:-len('.json')] for name in names if name.endswith('.json')}
+        for name in names:
+            if name.partition('.')[0] in sessions:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) <= max_age_seconds:
+                    continue
+            except OSError:
+                continue
+            _remove(path)
+            removed += 1
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            upload_id = name[:-len('.json')]
+            try:
+                part_path, meta_path = self._paths(upload_id)
+                meta = self._read_meta(upload_id)
+                data_path = part_path if meta['sha256'] is None else self.media_path(upload_id, meta)
+                last_write = os.path.getmtime(data_path) if os.path.exists(data_path) else os.path.getmtime(meta_path)
+            except (KeyError, OSError):
+                continue
+            if now - last_write > max_age_seconds:
+                self.discard(upload_id)
+                removed += 1
+        return removed
+
+_sessions = None
+
+def get_upload_sessions():
+    global _sessions
+    if _sessions is None:
+        _sessions = UploadSessions()
+    return _sessions
@@ -0,0 +1,107 @@
+import os
+import re
+import json
+import hashlib
+
+# Voice catalog configuration: `voices.txt` is the `edge-tts --list-voices` table (UTF-16)
+VOICES_FILE = os.getenv('VOICES_FILE', 'voices.txt')
+
+GENDERS = ('female', 'male')
+# Voices used for a plain 'female'/'male' voice_id, per language; other languages get the
+# first catalog voice of that gender (English when the language has no voices at all)
+DEFAULT_VOICES = {
+    'hi': {'male': 'hi-IN-MadhurNeural', 'female': 'hi-IN-SwaraNeural'},
+    'ta': {'male': 'ta-IN-ValluvarNeural', 'female': 'ta-IN-PallaviNeural'},
+    'ml': {'male': 'ml-IN-MidhunNeural', 'female': 'ml-IN-SobhanaNeural'},
+    'es': {'male': 'es-MX-JorgeNeural', 'female': 'es-MX-DaliaNeural'},
+    'fr': {'male': 'fr-FR-HenriNeural', 'female': 'fr-FR-DeniseNeural'},
+    'de': {'male': 'de-DE-KillianNeural', 'female': 'de-DE-KatjaNeural'},
+    'ja': {'male': 'ja-JP-KeitaNeural', 'female': 'ja-JP-NanamiNeural'},
+    'en': {'male': 'en-US-AndrewNeural', 'female': 'en-US-EmmaNeural'},
+}
+FALLBACK_LANGUAGE = 'en'
+
+_COLUMNS = re.compile(r'\s{2,}')
+
+def _split_list(value: str):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def parse_voices(text: str):
+    """Voice records from the edge-tts table: Name, Gender, ContentCategories, VoicePersonalities"""
+    voices = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(('Name', '---')):
+            continue
+        columns = _COLUMNS.split(line)
+        name = columns[0]
+        # Locales can carry a script or region part, e.g. iu-Latn-CA or zh-CN-liaoning
+        locale = name.rsplit('-', 1)[0]
+        voices.append({
+            'name': name,
+            'locale': locale,
+            'language': locale.split('-')[0].lower(),
+            'gender': columns[1].lower() if len(columns) > 1 else '',
+            'categories': _split_list(columns[2]) if len(columns) > 2 else [],
+            'personalities': _split_list(columns[3]) if len(columns) > 3 else [],
+        })
+    return voices
+
+class VoiceCatalog:
+    """
+    Edge-TTS voices indexed by name, locale and language, with the default voice per
+    (language, gender) resolved up front. `payload` and `etag` are the /api/voices body.
+    """
+
+    def __init__(self, voices):
+        self.voices = voices
+        self.by_name = {voice['name']: voice for voice in voices}
+        self.by_locale = {}
+        self.by_language = {}
+        for voice in voices:
+            self.by_locale.setdefault(voice['locale'], []).append(voice)
+            self.by_language.setdefault(voice['language'], []).append(voice)
+        self.defaults = {}
+        for language, language_voices in self.by_language.items():
+            preferred = DEFAULT_VOICES.get(language, {})
+            for gender in GENDERS:
+                name = preferred.get(gender)
+                if name not in self.by_name:
+                    name = next((voice['name'] for voice in language_voices if voice['gender'] == gender), None)
+                self.defaults[(language, gender)] = name or language_voices[0]['name']
+        self.payload = json.dumps({
+            'languages': {
+                language: {
+                    'default': {gender: self.defaults[(language, gender)] for gender in GENDERS},
+                    'voices': [{key: voice[key] for key in ('name', 'locale', 'gender', 'personalities')} for voice in language_voices]
+                }
+                for language, language_voices in sorted(self.by_language.items())
+            }
+        }, separators=(',', ':')).encode('utf-8')
+        self.etag = f'"{hashlib.sha256(self.payload).hexdigest()[:32]}"'
+
+    def knows(self, voice_id: str):
+        """True for catalog voice names and the generic 'female'/'male'"""
+        return voice_id in self.by_name or (voice_id or '').lower() in GENDERS
+
+    def resolve(self, voice_id: str, language: str):
+        """Edge-TTS voice name for a voice_id: a catalog name as-is, or the language's default for a gender"""
+        if voice_id in self.by_name:
+            return voice_id
+        gender = (voice_id or '').lower()
+        if gender not in GENDERS:
+            gender = 'female'
+        language = (language or '').lower().split('-')[0]
+        return self.defaults.get((language, gender)) or self.defaults[(FALLBACK_LANGUAGE, gender)]
+
+def load_voice_catalog(path: str = VOICES_FILE):
+    with open(path, encoding='utf-16') as f:
+        return VoiceCatalog(parse_voices(f.read()))
+
+_voice_catalog = None
+
+def get_voice_catalog():
+    global _voice_catalog
+    if _voice_catalog is None:
+        _voice_catalog = load_voice_catalog()
+    return _voice_catalog
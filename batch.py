@@ -0,0 +1,221 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add the current directory to sys.path so we can import app
+sys.path.append(os.getcwd())
+
+# Each batch worker is already a separate process; run ASR and Bark inside it rather than
+# giving every worker its own CPU pool (set before app.pipeline reads it on import)
+os.environ["CPU_WORKERS"] = "0"
+
+from app.result_cache import source_key_for_url, source_key_for_file
+
+# Offline dubbing of many inputs. The manifest (CSV or JSONL) has one row per source with
+# `source` (URL or local file), `target_languages` (comma-separated or a JSON list) and
+# optional `voice_ids` (one per language) or `voice_id`. Usage:
+#   python batch.py manifest.csv [--workers 2] [--state batch_state.jsonl] [--retry-failed]
+# Every stage keeps its artifact in the shared on-disk caches (downloaded streams,
+# transcripts, translation memory, TTS clips), so a rerun after a crash or Ctrl-C skips
+# finished outputs and resumes unfinished ones from their last completed stage.
+
+def split_list(value):
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value or "").replace(";", ",").split(",") if item.strip()]
+
+def read_manifest(path: str):
+    """Rows of {'source', 'targets': [(lang, voice), ...]} from a .csv or .jsonl manifest"""
+    with open(path, encoding="utf-8-sig") as f:
+        if path.lower().endswith((".jsonl", ".json")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    jobs = []
+    for number, row in enumerate(rows, start=1):
+        source = (row.get("source") or row.get("video_url") or row.get("input_file") or "").strip()
+        langs = split_list(row.get("target_languages") or row.get("target_language"))
+        if not source or not langs:
+            raise ValueError(f"{path} row {number}: needs a source and at least one target language")
+        voices = split_list(row.get("voice_ids")) or [row.get("voice_id") or "female"] * len(langs)
+        if len(voices) != len(langs):
+            raise ValueError(f"{path} row {number}: voice_ids must list one voice per target language")
+        jobs.append({"source": source, "targets": list(zip(langs, voices))})
+    return jobs
+
+def is_url(source: str):
+    return source.startswith(("http://", "https://"))
+
+def output_key(source: str, lang: str, voice: str):
+    return f"{source}|{lang}|{voice}"
+
+def load_state(path: str):
+    """Latest checkpoint record per output key (the state file is append-only JSONL)"""
+    state = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+                state[record["key"]] = record
+    return state
+
+def append_state(path: str, records):
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+# Worker process state: one event loop per process, so models, the Bark batcher and
+# other loop-bound singletons are reused by every job the worker runs
+_loop = None
+
+def init_worker(threads: int):
+    global _loop
+    import torch
+    torch.set_num_threads(threads)
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+
+def run_job(job: dict):
+    """Dub one source into its pending languages; runs inside a worker process"""
+    from app.pipeline import run_pipeline_multi
+    from app.result_cache import get_result_cache, result_cache_key
+    source = job["source"]
+    start = time.time()
+    result = _loop.run_until_complete(run_pipeline_multi(
+        source if is_url(source) else None, job["targets"],
+        input_file=None if is_url(source) else source
+    ))
+    cache = get_result_cache()
+    outputs = {}
+    for lang, voice in job["targets"]:
+        branch = result["outputs"][lang]
+        response = {
+            "status": "completed",
+            "video_url": source,
+            "original_text": result["original_text"],
+            "translated_text": branch["translated_text"],
+            "output_video_url": branch["output_video_url"]
+        }
+        # Shared with the web app, so the server answers these from cache as well
+        if cache:
+            cache.put(result_cache_key(job["source_key"], lang, voice), response)
+        outputs[lang] = branch["output_video_url"]
+    return {"outputs": outputs, "timings": result.get("timings", {}), "seconds": round(time.time() - start, 2)}
+
+def cached_outputs(job: dict):
+    """Outputs the result cache already holds for this source (e.g. dubbed through the web app)"""
+    from app.result_cache import get_result_cache, result_cache_key
+    cache = get_result_cache()
+    if not cache:
+        return {}
+    found = {}
+    for lang, voice in job["targets"]:
+        cached = cache.get(result_cache_key(job["source_key"], lang, voice))
+        if cached:
+            found[lang] = cached["output_video_url"]
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Dub every source in a manifest, resuming from checkpoints")
+    parser.add_argument("manifest", help="CSV or JSONL manifest")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BATCH_WORKERS", 1)), help="worker processes")
+    parser.add_argument("--state", help="checkpoint file (default: <manifest>.state.jsonl)")
+    parser.add_argument("--retry-failed", action="store_true", help="run outputs that failed last time again")
+    args = parser.parse_args()
+    state_path = args.state or f"{os.path.splitext(args.manifest)[0]}.state.jsonl"
+    workers = max(1, args.workers)
+
+    state = load_state(state_path)
+    done_statuses = ("completed",) if args.retry_failed else ("completed", "failed")
+    jobs = []
+    skipped = 0
+    for job in read_manifest(args.manifest):
+        source = job["source"]
+        if not is_url(source) and not os.path.exists(source):
+            append_state(state_path, [
+                {"key": output_key(source, lang, voice), "status": "failed", "error": "file not found", "time": time.time()}
+                for lang, voice in job["targets"]
+            ])
+            print(f"[{time.strftime('%H:%M:%S')}] Missing input {source}", flush=True)
+            continue
+        pending = [(lang, voice) for lang, voice in job["targets"]
+                   if state.get(output_key(source, lang, voice), {}).get("status") not in done_statuses]
+        skipped += len(job["targets"]) - len(pending)
+        if not pending:
+            continue
+        job["targets"] = pending
+        job["source_key"] = source_key_for_url(source) if is_url(source) else source_key_for_file(source)
+        hits = cached_outputs(job)
+        if hits:
+            append_state(state_path, [
+                {"key": output_key(source, lang, voice), "status": "completed", "output": hits[lang], "cached": True, "time": time.time()}
+                for lang, voice in pending if lang in hits
+            ])
+            job["targets"] = [(lang, voice) for lang, voice in pending if lang not in hits]
+            skipped += len(hits)
+        if job["targets"]:
+            jobs.append(job)
+
+    total_outputs = sum(len(job["targets"]) for job in jobs)
+    print(f"[{time.strftime('%H:%M:%S')}] {len(jobs)} sources ({total_outputs} outputs) to dub on {workers} workers; "
+          f"{skipped} outputs already done. Checkpoints: {state_path}", flush=True)
+    if not jobs:
+        return
+
+    start = time.time()
+    completed = failed = sources_done = 0
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(threads,)
+    )
+    try:
+        futures = {executor.submit(run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += len(job["targets"])
+                append_state(state_path, [
+                    {"key": output_key(job["source"], lang, voice), "status": "failed", "error": str(e), "time": time.time()}
+                    for lang, voice in job["targets"]
+                ])
+                print(f"[{time.strftime('%H:%M:%S')}] FAILED {job['source']}: {e}", flush=True)
+                continue
+            completed += len(job["targets"])
+            sources_done += 1
+            append_state(state_path, [
+                {"key": output_key(job["source"], lang, voice), "status": "completed", "output": result["outputs"][lang],
+                 "timings": result["timings"], "time": time.time()}
+                for lang, voice in job["targets"]
+            ])
+            elapsed = time.time() - start
+            print(f"[{time.strftime('%H:%M:%S')}] Done {job['source']} in {result['seconds']:.1f}s "
+                  f"({completed + failed}/{total_outputs} outputs, {completed / elapsed * 3600:.1f} outputs/hour)", flush=True)
+    except KeyboardInterrupt:
+        print(f"[{time.strftime('%H:%M:%S')}] Interrupted; rerun the same command to resume", flush=True)
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    elapsed = time.time() - start
+    print(f"\nBatch finished in {elapsed:.1f}s: {completed} outputs completed, {failed} failed, {skipped} skipped")
+    print(f"Throughput: {sources_done / elapsed * 3600:.1f} jobs/hour ({completed / elapsed * 3600:.1f} outputs/hour)")
+
+if __name__ == "__main__":
+    main()
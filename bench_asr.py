@@ -0,0 +1,67 @@
+import os
+import re
+import sys
+import time
+
+# Add the current directory to sys.path so we can import app
+sys.path.append(os.getcwd())
+
+from app.ffmpeg_tools import get_audio_duration
+from app.pipeline import ASR_BACKENDS, WHISPER_MODEL_NAME
+
+# Real-time factor (processing seconds / audio seconds) and word error rate per ASR backend.
+# Usage: python bench_asr.py [clip reference.txt]
+# Without arguments it runs on the bundled clip: 25 s of a LibriVox (public domain) reading of
+# Sense and Sensibility, ch. 1, as shipped in the pocketsphinx test data, with its verbatim
+# transcript; no network or TTS service is involved, so runs are comparable across machines.
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_data")
+DEFAULT_CLIP = os.path.join(BENCH_DIR, "asr_clip.flac")
+DEFAULT_REFERENCE = os.path.join(BENCH_DIR, "asr_clip.txt")
+
+# Spoken forms the reference transcript spells out
+WORD_FORMS = {"mr": "mister", "mrs": "missus", "dr": "doctor"}
+
+def normalize_words(text):
+    return [WORD_FORMS.get(word, word) for word in re.sub(r"[^\w\s']", " ", text.lower()).split()]
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length"""
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+    return previous[-1] / max(1, len(ref))
+
+def bench():
+    clip_path, reference_path = sys.argv[1:3] if len(sys.argv) > 2 else (DEFAULT_CLIP, DEFAULT_REFERENCE)
+    with open(reference_path, encoding="utf-8") as f:
+        reference = f.read()
+    duration = get_audio_duration(clip_path)
+    print(f"Clip: {clip_path} ({duration:.1f}s), model size {WHISPER_MODEL_NAME}")
+    print(f"{'backend':>15} {'first run':>10} {'transcribe':>11} {'RTF':>6} {'WER':>6}")
+    for name, backend_class in ASR_BACKENDS.items():
+        backend = backend_class(WHISPER_MODEL_NAME)
+        try:
+            start = time.perf_counter()
+            # Load and warm on the clip once so the timed run measures decoding only
+            backend.transcribe(clip_path)
+            load = time.perf_counter() - start
+            start = time.perf_counter()
+            result = backend.transcribe(clip_path)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            print(f"{name:>15} skipped ({e})")
+            continue
+        wer = word_error_rate(reference, result['text'])
+        print(f"{name:>15} {load:>9.1f}s {elapsed:>10.1f}s {elapsed / duration:>6.2f} {wer:>6.1%}")
+
+if __name__ == "__main__":
+    bench()
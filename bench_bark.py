@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import scipy.io.wavfile as wavfile
+
+# Add the current directory to sys.path so we can import app
+sys.path.append(os.getcwd())
+
+# Run Bark in this process so the timings exclude pool start-up
+os.environ.setdefault('CPU_WORKERS', '0')
+
+from app.pipeline import _bark_generate_batch_to_files, get_bark_model
+
+# CPU benchmark: seconds of audio generated per wall-clock second, one segment at a time
+# versus batched. Usage: python bench_bark.py [segments] [batch sizes...]
+SEGMENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+BATCH_SIZES = [int(n) for n in sys.argv[2:]] or [1, 4, 8]
+VOICE_PRESET = "v2/en_speaker_0"
+SENTENCES = [
+    "Hello and welcome back to the channel.",
+    "Today we are going to look at something new.",
+    "Let's get started.",
+    "This part is a little longer, so take your time and follow along carefully.",
+    "Thanks for watching.",
+    "If you have any questions, leave them in the comments below.",
+]
+
+def audio_seconds(paths):
+    total = 0.0
+    for path in paths:
+        rate, data = wavfile.read(path)
+        total += len(data) / rate
+    return total
+
+def run(batch_size, directory):
+    texts = [SENTENCES[i % len(SENTENCES)] for i in range(SEGMENTS)]
+    # Same length-sorted grouping the pipeline's batcher uses
+    order = sorted(range(SEGMENTS), key=lambda i: len(texts[i]))
+    paths = []
+    start = time.perf_counter()
+    for i in range(0, SEGMENTS, batch_size):
+        chunk = order[i:i + batch_size]
+        chunk_paths = [os.path.join(directory, f"b{batch_size}_{j}.wav") for j in chunk]
+        paths += _bark_generate_batch_to_files([texts[j] for j in chunk], VOICE_PRESET, chunk_paths)
+    elapsed = time.perf_counter() - start
+    return elapsed, audio_seconds(paths)
+
+def bench():
+    print(f"Loading Bark (threads={os.getenv('BARK_NUM_THREADS', 'default')}, quantize={os.getenv('BARK_QUANTIZE') or 'off'})...")
+    get_bark_model()
+    print(f"{'batch':>6} {'wall':>8} {'audio':>8} {'audio s / wall s':>17}")
+    for batch_size in BATCH_SIZES:
+        directory = tempfile.mkdtemp()
+        try:
+            elapsed, audio = run(batch_size, directory)
+            print(f"{batch_size:>6} {elapsed:>7.1f}s {audio:>7.1f}s {audio / elapsed:>17.2f}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    bench()
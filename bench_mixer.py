@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import wave
+import shutil
+import tempfile
+import subprocess
+import numpy as np
+
+# Add the current directory to sys.path so we can import app
+sys.path.append(os.getcwd())
+
+from app.ffmpeg_tools import ffmpeg_cmd
+from app.mixer import mix_segments_numpy, mix_segments_filtergraph
+
+# Synthetic dub: one clip every SPACING seconds, each with a SLOT-second window
+SIZES = [int(n) for n in sys.argv[1:]] or [50, 500, 2000]
+SPACING = 1.0
+SLOT = 0.8
+SAMPLE_RATE = 24000
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes())
+
+def make_fixtures(directory, segments):
+    rng = np.random.default_rng(0)
+    duration = segments * SPACING + 1
+    video_path = os.path.join(directory, "video.mp4")
+    subprocess.run([
+        ffmpeg_cmd, '-y', '-v', 'error', '-f', 'lavfi', '-i', f'color=c=black:s=64x36:r=1:d={duration}',
+        '-c:v', 'libx264', '-preset', 'ultrafast', video_path
+    ], check=True)
+
+    background_path = os.path.join(directory, "background.wav")
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    write_wav(background_path, 0.3 * np.sin(2 * np.pi * 110 * t) + 0.05 * rng.standard_normal(len(t)))
+
+    placements = []
+    for i in range(segments):
+        # Roughly a third of the clips overrun their slot and need stretching
+        length = rng.uniform(0.5, 1.2)
+        t = np.arange(int(length * SAMPLE_RATE)) / SAMPLE_RATE
+        clip_path = os.path.join(directory, f"clip_{i}.wav")
+        write_wav(clip_path, 0.5 * np.sin(2 * np.pi * rng.uniform(150, 300) * t))
+        placements.append({'start': i * SPACING, 'duration': SLOT, 'path': clip_path})
+    return video_path, background_path, placements
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    try:
+        fn(*args)
+    except Exception as e:
+        return f"failed ({type(e).__name__})"
+    return f"{time.perf_counter() - start:.2f}s"
+
+def bench():
+    print(f"{'segments':>9} {'ffmpeg filtergraph':>20} {'numpy mixer':>12}")
+    for segments in SIZES:
+        directory = tempfile.mkdtemp()
+        try:
+            video_path, background_path, placements = make_fixtures(directory, segments)
+            legacy = timed(mix_segments_filtergraph, video_path, background_path, placements, os.path.join(directory, "legacy.mp4"))
+            numpy_mix = timed(mix_segments_numpy, video_path, background_path, placements, os.path.join(directory, "numpy.mp4"))
+            print(f"{segments:>9} {legacy:>20} {numpy_mix:>12}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add the current directory to sys.path so we can import app
+sys.path.append(os.getcwd())
+
+from app.tts_scheduler import synthesize_in_order
+
+# Stub TTS server: each request takes LATENCY seconds and FAILURE_RATE of them drop the connection
+SEGMENTS = 120
+LATENCY = 0.25
+FAILURE_RATE = 0.05
+CLIP_BYTES = 16000
+
+async def handle_request(reader, writer):
+    await reader.readline()
+    await asyncio.sleep(LATENCY * random.uniform(0.8, 1.2))
+    if random.random() < FAILURE_RATE:
+        writer.close()
+        return
+    writer.write(os.urandom(CLIP_BYTES))
+    await writer.drain()
+    writer.close()
+
+async def stub_tts(port, text, output_dir):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(text.encode() + b"\n")
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    if not data:
+        raise ConnectionError("Stub TTS server dropped the connection")
+    output_path = os.path.join(output_dir, f"{abs(hash(text))}.mp3")
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return output_path
+
+async def bench():
+    server = await asyncio.start_server(handle_request, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    texts = [f"segment {i}" for i in range(SEGMENTS)]
+
+    print(f"{SEGMENTS} segments, {LATENCY * 1000:.0f} ms per request, {FAILURE_RATE:.0%} dropped connections")
+    print(f"Legacy serial loop (+0.5 s sleep per segment), estimated: {SEGMENTS * (LATENCY + 0.5):.1f}s")
+    print(f"{'concurrency':>12} {'wall time':>10} {'segments/s':>11}")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for concurrency in (1, 2, 4, 8, 16, 32):
+            start = time.perf_counter()
+            paths = await synthesize_in_order(
+                texts, lambda text: stub_tts(port, text, output_dir),
+                max_in_flight=concurrency, rate=0
+            )
+            elapsed = time.perf_counter() - start
+            assert paths == [os.path.join(output_dir, f"{abs(hash(t))}.mp3") for t in texts]
+            print(f"{concurrency:>12} {elapsed:>9.2f}s {SEGMENTS / elapsed:>11.1f}")
+
+    server.close()
+    await server.wait_closed()
+
+if __name__ == "__main__":
+    asyncio.run(bench())
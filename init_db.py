@@ -4,6 +4,99 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Columns added to `translations` by the job/status migration (name -> (mysql type, postgresql type))
+JOB_COLUMNS = {
+    'job_id': ("VARCHAR(36)", "VARCHAR(36)"),
+    'status': ("VARCHAR(16) NOT NULL DEFAULT 'completed'", "VARCHAR(16) NOT NULL DEFAULT 'completed'"),
+    'media_hash': ("CHAR(64)", "CHAR(64)"),
+    'voice_id': ("VARCHAR(64)", "VARCHAR(64)"),
+    'error': ("VARCHAR(512)", "VARCHAR(512)"),
+    'download_seconds': ("FLOAT", "REAL"),
+    'transcribe_seconds': ("FLOAT", "REAL"),
+    'translate_seconds': ("FLOAT", "REAL"),
+    'tts_seconds': ("FLOAT", "REAL"),
+    'mix_seconds': ("FLOAT", "REAL"),
+    'total_seconds': ("FLOAT", "REAL"),
+    'updated_at': ("TIMESTAMP NULL DEFAULT NULL", "TIMESTAMP"),
+}
+
+# Composite indexes on the lookup keys (history by URL, cache by content hash, keyset paging)
+INDEXES = {
+    'idx_translations_url_lang': "video_url, target_language, status",
+    'idx_translations_media': "media_hash, target_language, voice_id",
+    'idx_translations_job': "job_id, target_language",
+    'idx_translations_status': "status, id",
+}
+
+def _columns(cursor, db_type, table):
+    if db_type == 'postgresql':
+        cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name = %s", (table,))
+    else:
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = %s",
+            (table,)
+        )
+    return {row[0].lower() for row in cursor.fetchall()}
+
+def _indexes(cursor, db_type, table):
+    if db_type == 'postgresql':
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", (table,))
+    else:
+        cursor.execute(
+            "SELECT DISTINCT index_name FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = %s",
+            (table,)
+        )
+    return {row[0].lower() for row in cursor.fetchall()}
+
+def migrate(cursor, db_type):
+    """
+    Bring `translations` up to the job/status schema. Every step checks the current
+    state first, so this is safe to run on a fresh database or repeatedly on an old one.
+    """
+    dialect = 1 if db_type == 'postgresql' else 0
+
+    # Large text blobs live in a side table so history/cache lookups only touch narrow rows
+    if db_type == 'postgresql':
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS translation_texts (
+                translation_id INTEGER PRIMARY KEY REFERENCES translations(id) ON DELETE CASCADE,
+                original_text TEXT,
+                translated_text TEXT
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS translation_texts (
+                translation_id INT PRIMARY KEY,
+                original_text LONGTEXT,
+                translated_text LONGTEXT,
+                FOREIGN KEY (translation_id) REFERENCES translations(id) ON DELETE CASCADE
+            )
+        """)
+
+    columns = _columns(cursor, db_type, 'translations')
+    for name, types in JOB_COLUMNS.items():
+        if name not in columns:
+            cursor.execute(f"ALTER TABLE translations ADD COLUMN {name} {types[dialect]}")
+            print(f"  + translations.{name}")
+
+    if 'original_text' in columns:
+        # Copy the blobs of existing rows over, then drop them from the hot table
+        cursor.execute("""
+            INSERT INTO translation_texts (translation_id, original_text, translated_text)
+            SELECT t.id, t.original_text, t.translated_text FROM translations t
+            WHERE NOT EXISTS (SELECT 1 FROM translation_texts x WHERE x.translation_id = t.id)
+        """)
+        cursor.execute("ALTER TABLE translations DROP COLUMN original_text")
+        cursor.execute("ALTER TABLE translations DROP COLUMN translated_text")
+        print("  ~ moved original_text/translated_text to translation_texts")
+
+    existing = _indexes(cursor, db_type, 'translations')
+    for name, columns_sql in INDEXES.items():
+        if name not in existing:
+            cursor.execute(f"CREATE INDEX {name} ON translations ({columns_sql})")
+            print(f"  + index {name}")
+
 def init_db():
     """
     Initialize database and create tables
@@ -34,12 +127,11 @@ def init_db():
                     video_url VARCHAR(255) NOT NULL,
                     source_language VARCHAR(10),
                     target_language VARCHAR(10) NOT NULL,
-                    original_text TEXT,
-                    translated_text TEXT,
                     audio_path VARCHAR(255),
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            migrate(cursor, db_type)
             
             print("✅ PostgreSQL database 'video_translator' and table 'translations' initialized successfully!")
             
@@ -53,6 +145,7 @@ def init_db():
                 user=os.getenv('DATABASE_USER', 'root'),
                 password=os.getenv('DATABASE_PASSWORD', '')
             )
+            db.autocommit = True
             cursor = db.cursor()
             
             # Create Database
@@ -67,12 +160,11 @@ def init_db():
                     video_url VARCHAR(255) NOT NULL,
                     source_language VARCHAR(10),
                     target_language VARCHAR(10) NOT NULL,
-                    original_text LONGTEXT,
-                    translated_text LONGTEXT,
                     audio_path VARCHAR(255),
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            migrate(cursor, db_type)
             
             print(f"✅ MySQL database '{database_name}' and table 'translations' initialized successfully!")
         
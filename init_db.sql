@@ -6,8 +6,30 @@ CREATE TABLE IF NOT EXISTS translations (
     video_url VARCHAR(255) NOT NULL,
     source_language VARCHAR(10) DEFAULT 'en',
     target_language VARCHAR(10) NOT NULL,
+    audio_path VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    job_id VARCHAR(36),
+    status VARCHAR(16) NOT NULL DEFAULT 'completed',
+    media_hash CHAR(64),
+    voice_id VARCHAR(64),
+    error VARCHAR(512),
+    download_seconds FLOAT,
+    transcribe_seconds FLOAT,
+    translate_seconds FLOAT,
+    tts_seconds FLOAT,
+    mix_seconds FLOAT,
+    total_seconds FLOAT,
+    updated_at TIMESTAMP NULL DEFAULT NULL,
+    INDEX idx_translations_url_lang (video_url, target_language, status),
+    INDEX idx_translations_media (media_hash, target_language, voice_id),
+    INDEX idx_translations_job (job_id, target_language),
+    INDEX idx_translations_status (status, id)
+);
+
+-- Transcript and translation blobs, kept out of the hot lookup table
+CREATE TABLE IF NOT EXISTS translation_texts (
+    translation_id INT PRIMARY KEY,
     original_text LONGTEXT,
     translated_text LONGTEXT,
-    audio_path VARCHAR(255),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    FOREIGN KEY (translation_id) REFERENCES translations(id) ON DELETE CASCADE
 );
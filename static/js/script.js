@@ -1,50 +1,40 @@
-const voiceData = {
-    en: [
-        { id: "en-US-EmmaNeural", name: "Female" },
-        { id: "en-US-AndrewNeural", name: "Male" }
-    ],
-    hi: [
-        { id: "hi-IN-SwaraNeural", name: "Female" },
-        { id: "hi-IN-MadhurNeural", name: "Male" }
-    ],
-    es: [
-        { id: "es-MX-DaliaNeural", name: "Female" },
-        { id: "es-MX-JorgeNeural", name: "Male" }
-    ],
-    ja: [
-        { id: "ja-JP-NanamiNeural", name: "Female" },
-        { id: "ja-JP-KeitaNeural", name: "Male" }
-    ],
-    fr: [
-        { id: "fr-FR-DeniseNeural", name: "Female" },
-        { id: "fr-FR-HenriNeural", name: "Male" }
-    ],
-    de: [
-        { id: "de-DE-KatjaNeural", name: "Female" },
-        { id: "de-DE-ConradNeural", name: "Male" }
-    ],
-    ta: [
-        { id: "ta-IN-SaranyaNeural", name: "Female" },
-        { id: "ta-IN-AnbuNeural", name: "Male" }
-    ],
-    ml: [
-        { id: "ml-IN-SobhanaNeural", name: "Female" },
-        { id: "ml-IN-MidhunNeural", name: "Male" }
-    ]
-};
+// Voice catalog from /api/voices (served with an ETag, so reloads revalidate instead of refetching)
+let voiceCatalog = null;
+
+async function loadVoiceCatalog() {
+    if (voiceCatalog) return voiceCatalog;
+    try {
+        const response = await fetch('/api/voices');
+        if (response.ok) voiceCatalog = await response.json();
+    } catch (e) {
+        console.error('Could not load voices:', e);
+    }
+    return voiceCatalog;
+}
+
+function voiceLabel(voice) {
+    // "ta-IN-PallaviNeural" -> "Pallavi (Female, ta-IN)"
+    const shortName = voice.name.slice(voice.locale.length + 1).replace(/Neural$/, '');
+    const gender = voice.gender.charAt(0).toUpperCase() + voice.gender.slice(1);
+    return `${shortName} (${gender}, ${voice.locale})`;
+}
 
-function updateVoices() {
+async function updateVoices() {
     const targetLang = document.getElementById('targetLang').value;
     const voiceSelect = document.getElementById('voiceSelect');
 
-    // Default options if language not in our detailed list
+    // Generic choices: the server picks the language's default voice of that gender
     let voices = [
         { id: 'female', name: 'Standard Female' },
         { id: 'male', name: 'Standard Male' }
     ];
+    let selected = 'female';
 
-    if (voiceData[targetLang]) {
-        voices = voiceData[targetLang];
+    const catalog = await loadVoiceCatalog();
+    const language = catalog && catalog.languages[targetLang];
+    if (language) {
+        voices = language.voices.map(voice => ({ id: voice.name, name: voiceLabel(voice) }));
+        selected = language.default.female;
     }
 
     voiceSelect.innerHTML = '';
@@ -52,6 +42,7 @@ function updateVoices() {
         const option = document.createElement('option');
         option.value = voice.id;
         option.textContent = voice.name;
+        option.selected = voice.id === selected;
         voiceSelect.appendChild(option);
     });
 }
@@ -93,35 +84,24 @@ document.getElementById('translatorForm').addEventListener('submit', async funct
 
     try {
         const loadingText = loadingOverlay.querySelector('p');
-        const messages = [
-            "DUBBING VIDEO...",
-            "TRANSCRIBING AUDIO...",
-            "TRANSLATING TEXT...",
-            "GENERATING AI VOICE...",
-            "MIXING VIDEO & AUDIO..."
-        ];
-        let msgIdx = 0;
-        const interval = setInterval(() => {
-            if (!loadingOverlay.classList.contains('hidden')) {
-                loadingText.textContent = messages[msgIdx];
-                msgIdx = (msgIdx + 1) % messages.length;
-            } else {
-                clearInterval(interval);
-            }
-        }, 5000);
 
         const response = await fetch('/api/translate', {
             method: 'POST',
             body: formData
         });
 
+        if (response.status === 429) {
+            throw new Error("The server is busy with other videos. Please try again in a minute.");
+        }
         if (!response.ok) {
             const error = await response.json();
             throw new Error(error.detail || 'Translation failed');
         }
 
-        const data = await response.json();
-        if (data.output_video_url) {
+        const job = await response.json();
+        // Cache hits come back already completed
+        const data = job.status === 'completed' ? job.result : await waitForJob(job.job_id, loadingText);
+        if (data.output_video_url || data.subtitle_urls) {
             displayResult(data);
         } else {
             throw new Error("No video URL returned from server");
@@ -138,6 +118,66 @@ document.getElementById('translatorForm').addEventListener('submit', async funct
     }
 });
 
+const STAGE_LABELS = {
+    download: "DOWNLOADING VIDEO",
+    transcribe: "TRANSCRIBING AUDIO",
+    translate: "TRANSLATING TEXT",
+    tts: "GENERATING AI VOICE",
+    mix: "MIXING VIDEO & AUDIO"
+};
+
+// Follow the job's progress events until the pipeline finishes
+function waitForJob(jobId, loadingText) {
+    if (!window.EventSource) {
+        return pollJob(jobId);
+    }
+    return new Promise((resolve, reject) => {
+        const events = new EventSource(`/api/jobs/${jobId}/events`);
+        let stage = null;
+        events.addEventListener('progress', (e) => {
+            const event = JSON.parse(e.data);
+            stage = event.stage || stage;
+            const label = STAGE_LABELS[stage] || "DUBBING VIDEO";
+            loadingText.textContent = `${label}... ${Math.round(event.percent)}%`;
+        });
+        events.addEventListener('queued', () => {
+            loadingText.textContent = "WAITING IN QUEUE...";
+        });
+        events.addEventListener('completed', (e) => {
+            events.close();
+            resolve(JSON.parse(e.data).result);
+        });
+        events.addEventListener('failed', (e) => {
+            events.close();
+            reject(new Error(JSON.parse(e.data).error || 'Translation failed'));
+        });
+        events.onerror = () => {
+            // EventSource retries on its own (resuming via Last-Event-ID); only a closed stream needs the fallback
+            if (events.readyState === EventSource.CLOSED) {
+                pollJob(jobId).then(resolve, reject);
+            }
+        };
+    });
+}
+
+// Poll the job status endpoint until the pipeline finishes
+async function pollJob(jobId) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        const response = await fetch(`/api/jobs/${jobId}`);
+        if (!response.ok) {
+            throw new Error("Lost track of the translation job");
+        }
+        const job = await response.json();
+        if (job.status === 'completed') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Translation failed');
+        }
+    }
+}
+
 // Clear Button
 document.getElementById('clearBtn').addEventListener('click', () => {
     document.getElementById('translatorForm').reset();
@@ -148,6 +188,14 @@ document.getElementById('clearBtn').addEventListener('click', () => {
 });
 
 function displayResult(data) {
+    showSubtitleLinks(data.subtitle_urls);
+    if (!data.output_video_url) {
+        // Subtitles-only result: nothing to play
+        loadingOverlay.classList.add('hidden');
+        showResultText(data);
+        return;
+    }
+
     // Set Video
     const videoPlayer = document.getElementById('videoPlayer');
     const videoSource = document.getElementById('videoSource');
@@ -173,6 +221,25 @@ function displayResult(data) {
         }
     }, 2000);
 
+    showResultText(data);
+}
+
+function showSubtitleLinks(subtitleUrls) {
+    const links = document.getElementById('subtitleLinks');
+    links.replaceChildren();
+    links.classList.toggle('hidden', !subtitleUrls);
+    if (!subtitleUrls) return;
+    links.append('Download subtitles: ');
+    for (const [format, url] of Object.entries(subtitleUrls)) {
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = '';
+        link.textContent = format.toUpperCase();
+        links.append(link, ' ');
+    }
+}
+
+function showResultText(data) {
     // Set Text Section
     const resultSection = document.getElementById('resultTextSection');
     resultSection.classList.remove('hidden');
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+import pytest
+import app.pipeline as pipeline
+from app.pipeline import FasterWhisperASRBackend, WhisperASRBackend
+
+def fake_segment(seek, start, end, text):
+    return SimpleNamespace(
+        seek=seek, start=start, end=end, text=text, tokens=(50364, 2425), temperature=0.0,
+        avg_logprob=-0.2, compression_ratio=1.1, no_speech_prob=0.01
+    )
+
+class FakeFasterWhisperModel:
+    """Yields segments lazily, like faster-whisper's generator"""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(options)
+        segments = (fake_segment(0, s, s + 1.5, f" Line {i}.") for i, s in enumerate((0.0, 2.0)))
+        return segments, SimpleNamespace(language=options.get('language') or 'en')
+
+class FakeRegistry:
+    def __init__(self, model):
+        self.model = model
+        self.names = []
+
+    def get(self, name):
+        self.names.append(name)
+        return self.model
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeFasterWhisperModel()
+    monkeypatch.setattr(pipeline, 'get_model_registry', lambda: FakeRegistry(model))
+    return model
+
+def test_faster_whisper_result_has_whisper_shape(monkeypatch, model):
+    monkeypatch.setattr(pipeline, 'BatchedInferencePipeline', None)
+    result = FasterWhisperASRBackend("small").transcribe("audio.wav", language='ta')
+    assert result['text'] == " Line 0. Line 1."
+    assert result['language'] == 'ta'
+    assert [s['id'] for s in result['segments']] == [0, 1]
+    assert [(s['start'], s['end']) for s in result['segments']] == [(0.0, 1.5), (2.0, 3.5)]
+    assert result['segments'][0]['tokens'] == [50364, 2425]
+    assert model.calls == [{'language': 'ta', 'vad_filter': pipeline.ASR_VAD}]
+
+def test_batched_decoding_when_available(monkeypatch, model):
+    batches = []
+
+    class FakeBatchedPipeline:
+        def __init__(self, model):
+            self.model = model
+
+        def transcribe(self, audio, language=None, batch_size=1):
+            batches.append(batch_size)
+            return self.model.transcribe(audio, language=language)
+
+    monkeypatch.setattr(pipeline, 'BatchedInferencePipeline', FakeBatchedPipeline)
+    monkeypatch.setattr(pipeline, 'ASR_BATCH_SIZE', 4)
+    result = FasterWhisperASRBackend("small").transcribe("audio.wav")
+    assert batches == [4]
+    assert result['language'] == 'en' and len(result['segments']) == 2
+
+def test_model_ids_keep_cached_transcripts_apart():
+    # Plain whisper keeps the bare size so transcripts cached before the option still hit
+    assert WhisperASRBackend("small").model_id == "small"
+    assert FasterWhisperASRBackend("small").model_id.startswith("faster-whisper:small:")
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setattr(pipeline, 'ASR_BACKEND', 'nope')
+    monkeypatch.setattr(pipeline, '_asr_backend', None)
+    with pytest.raises(ValueError):
+        pipeline.get_asr_backend()
@@ -0,0 +1,86 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import batch
+
+class InlineExecutor(ThreadPoolExecutor):
+    """Stands in for the spawn-context process pool"""
+
+    def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+        super().__init__(max_workers)
+
+def write_manifest(tmp_path):
+    path = tmp_path / 'manifest.jsonl'
+    rows = [
+        {"source": "https://youtu.be/aaaaaaaaaaa", "target_languages": ["ta", "fr"]},
+        {"source": "https://youtu.be/bbbbbbbbbbb", "target_languages": "es", "voice_id": "male"},
+        {"source": str(tmp_path / 'missing.mp4'), "target_languages": "de"},
+    ]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    return str(path)
+
+def test_read_csv_manifest(tmp_path):
+    path = tmp_path / 'manifest.csv'
+    path.write_text("source,target_languages,voice_ids\nclip.mp4,\"ta, fr\",\"female;male\"\n")
+    assert batch.read_manifest(str(path)) == [{"source": "clip.mp4", "targets": [("ta", "female"), ("fr", "male")]}]
+    path.write_text("source,target_languages,voice_ids\nclip.mp4,ta,\"female,male\"\n")
+    with pytest.raises(ValueError):
+        batch.read_manifest(str(path))
+
+def test_state_keeps_the_latest_record_and_skips_torn_lines(tmp_path):
+    path = str(tmp_path / 'state.jsonl')
+    batch.append_state(path, [{"key": "a|ta|female", "status": "failed"}, {"key": "a|ta|female", "status": "completed"}])
+    with open(path, 'a') as f:
+        f.write('{"key": "a|fr|fem')
+    assert batch.load_state(path) == {"a|ta|female": {"key": "a|ta|female", "status": "completed"}}
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    calls = []
+    failing = set()
+
+    def run_job(job):
+        calls.append((job["source"], job["targets"]))
+        if job["source"] in failing:
+            raise RuntimeError("download failed")
+        return {"outputs": {lang: f"/outputs/video/{lang}.mp4" for lang, _ in job["targets"]}, "timings": {}, "seconds": 1.0}
+
+    monkeypatch.setattr(batch, 'ProcessPoolExecutor', InlineExecutor)
+    monkeypatch.setattr(batch, 'run_job', run_job)
+    monkeypatch.setattr(batch, 'cached_outputs', lambda job: {})
+    manifest = write_manifest(tmp_path)
+
+    def run(*flags):
+        calls.clear()
+        monkeypatch.setattr('sys.argv', ["batch.py", manifest, "--state", str(tmp_path / 'state.jsonl'), *flags])
+        batch.main()
+        return list(calls), batch.load_state(str(tmp_path / 'state.jsonl'))
+    run.failing = failing
+    return run
+
+def test_rerun_resumes_where_the_last_run_stopped(runner):
+    runner.failing.add("https://youtu.be/bbbbbbbbbbb")
+    calls, state = runner()
+    assert sorted(source for source, _ in calls) == ["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"]
+    assert state["https://youtu.be/aaaaaaaaaaa|fr|female"]["status"] == "completed"
+    assert state["https://youtu.be/bbbbbbbbbbb|es|male"]["status"] == "failed"
+
+    # Completed and failed outputs are both settled for a plain rerun
+    calls, _ = runner()
+    assert calls == []
+
+    runner.failing.clear()
+    calls, state = runner("--retry-failed")
+    assert calls == [("https://youtu.be/bbbbbbbbbbb", [("es", "male")])]
+    assert state["https://youtu.be/bbbbbbbbbbb|es|male"]["status"] == "completed"
+
+def test_missing_files_are_recorded_not_run(runner, tmp_path):
+    calls, state = runner()
+    assert all(source != str(tmp_path / 'missing.mp4') for source, _ in calls)
+    assert state[f"{tmp_path / 'missing.mp4'}|de|female"]["error"] == "file not found"
+
+def test_outputs_in_the_result_cache_are_not_redubbed(runner, monkeypatch):
+    monkeypatch.setattr(batch, 'cached_outputs', lambda job: {"ta": "/outputs/video/web.mp4"} if "aaaa" in job["source"] else {})
+    calls, state = runner()
+    assert ("https://youtu.be/aaaaaaaaaaa", [("fr", "female")]) in calls
+    assert state["https://youtu.be/aaaaaaaaaaa|ta|female"]["cached"] is True
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from app.batcher import MicroBatcher
+
+class Recorder:
+    def __init__(self, fail_on=None, drop_last=False):
+        self.batches = []
+        self.fail_on = fail_on
+        self.drop_last = drop_last
+
+    async def __call__(self, group, items):
+        self.batches.append((group, list(items)))
+        await asyncio.sleep(0)
+        if self.fail_on in items:
+            raise RuntimeError(f"cannot synthesize {self.fail_on}")
+        results = [f"{group}:{item}" for item in items]
+        return results[:-1] if self.drop_last else results
+
+def test_each_caller_gets_its_own_result_in_sorted_batches():
+    run = Recorder()
+    batcher = MicroBatcher(run, max_batch=2, max_wait=0.01, sort_key=len)
+
+    async def main():
+        texts = ["a much longer text", "hi", "medium text", "yo"]
+        return texts, await asyncio.gather(*(batcher.submit("voice", text) for text in texts))
+    texts, results = asyncio.run(main())
+    assert results == [f"voice:{text}" for text in texts]
+    # Similar lengths share a batch, short ones first
+    assert run.batches == [("voice", ["hi", "yo"]), ("voice", ["medium text", "a much longer text"])]
+
+def test_groups_are_batched_separately():
+    run = Recorder()
+    batcher = MicroBatcher(run, max_batch=8, max_wait=0.01)
+
+    async def main():
+        return await asyncio.gather(batcher.submit("a", 1), batcher.submit("b", 2), batcher.submit("a", 3))
+    assert asyncio.run(main()) == ["a:1", "b:2", "a:3"]
+    assert sorted(run.batches) == [("a", [1, 3]), ("b", [2])]
+
+def test_full_queue_flushes_without_waiting():
+    run = Recorder()
+    batcher = MicroBatcher(run, max_batch=2, max_wait=60, max_pending=3)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit("g", n) for n in range(3))), 1)
+    assert asyncio.run(main()) == ["g:0", "g:1", "g:2"]
+    assert [items for _, items in run.batches] == [[0, 1], [2]]
+
+def test_a_failed_batch_fails_only_its_callers():
+    run = Recorder(fail_on=1)
+    batcher = MicroBatcher(run, max_batch=2, max_wait=0.01)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit("g", n) for n in range(4)), return_exceptions=True)
+    results = asyncio.run(main())
+    assert isinstance(results[0], RuntimeError) and isinstance(results[1], RuntimeError)
+    assert results[2:] == ["g:2", "g:3"]
+
+def test_missing_results_fail_instead_of_hanging():
+    batcher = MicroBatcher(Recorder(drop_last=True), max_batch=4, max_wait=0.01)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(batcher.submit("g", 1), batcher.submit("g", 2), return_exceptions=True), 1)
+    first, second = asyncio.run(main())
+    assert first == "g:1"
+    assert isinstance(second, RuntimeError)
@@ -0,0 +1,114 @@
+import sys
+import types
+import pytest
+import app.database as database
+from app.database import DatabasePool
+
+class FakeConnection:
+    """Raw driver connection: counts pings and can be made to drop its socket"""
+
+    def __init__(self):
+        self.connected = True
+        self.pings = 0
+        self.reconnects = 0
+        self.fail_ping = False
+        self.fail_rollback = False
+
+    def ping(self, reconnect=False, attempts=1):
+        self.pings += 1
+        if self.fail_ping:
+            raise ConnectionError("server has gone away")
+
+    def rollback(self):
+        if self.fail_rollback:
+            raise ConnectionError("lost connection during query")
+
+    def disconnect(self):
+        self.connected = False
+
+class FakePooledConnection:
+    """Like mysql-connector's PooledMySQLConnection: a new wrapper per checkout, close() returns the connection"""
+
+    def __init__(self, pool, cnx):
+        self._cnx_pool = pool
+        self._cnx = cnx
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def close(self):
+        self._cnx_pool.idle.append(self._cnx)
+        self._cnx = None
+
+class FakeMySQLConnectionPool:
+    def __init__(self, pool_size, **kwargs):
+        self.idle = [FakeConnection() for _ in range(pool_size)]
+
+    def get_connection(self):
+        cnx = self.idle.pop(0)
+        if not cnx.connected:
+            # mysql-connector reconnects a disconnected pooled connection on checkout
+            cnx.connected = True
+            cnx.reconnects += 1
+        return FakePooledConnection(self, cnx)
+
+@pytest.fixture
+def pool(monkeypatch):
+    pooling = types.ModuleType('mysql.connector.pooling')
+    pooling.MySQLConnectionPool = FakeMySQLConnectionPool
+    connector = types.ModuleType('mysql.connector')
+    connector.pooling = pooling
+    mysql = types.ModuleType('mysql')
+    mysql.connector = connector
+    monkeypatch.setitem(sys.modules, 'mysql', mysql)
+    monkeypatch.setitem(sys.modules, 'mysql.connector', connector)
+    monkeypatch.setitem(sys.modules, 'mysql.connector.pooling', pooling)
+    monkeypatch.setenv('DB_TYPE', 'mysql')
+    return DatabasePool(size=1, timeout=1)
+
+def test_recently_used_connection_is_not_pinged(pool):
+    for _ in range(5):
+        with pool.connection() as conn:
+            raw = conn._cnx
+    # Only the first checkout (never used before) needs a ping
+    assert raw.pings == 1
+    assert len(pool._last_used) == 1
+
+def test_broken_connection_is_discarded(pool, monkeypatch):
+    with pool.connection() as conn:
+        raw = conn._cnx
+    monkeypatch.setattr(database, 'DB_HEALTH_CHECK_SECONDS', 0)
+    raw.fail_ping = True
+    with pool.connection() as conn:
+        assert conn._cnx is raw and raw.connected
+        assert raw.reconnects == 1
+    assert pool.stats()['health_check_failures'] == 1
+
+def test_connection_lost_mid_query_is_discarded(pool):
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            raw = conn._cnx
+            raw.fail_rollback = True
+            raise RuntimeError("query failed")
+    assert not raw.connected
+    with pool.connection() as conn:
+        assert conn._cnx.reconnects == 1
+
+def test_unreachable_database_is_not_retried_on_every_call(monkeypatch):
+    attempts = []
+
+    def unreachable():
+        attempts.append(1)
+        raise ConnectionError("Can't connect to MySQL server")
+
+    monkeypatch.setattr(database, 'DatabasePool', unreachable)
+    monkeypatch.setattr(database, '_pool', None)
+    monkeypatch.setattr(database, '_pool_retry_at', 0.0)
+    assert database.get_db_pool() is None
+    assert database.get_db_pool() is None
+    assert database.execute_batch([("INSERT", ())]) is False
+    assert database.fetch_all("SELECT 1") is None
+    assert len(attempts) == 1
+    monkeypatch.setattr(database, '_pool_retry_at', 0.0)
+    assert database.get_db_pool() is None
+    assert len(attempts) == 2
@@ -0,0 +1,52 @@
+import asyncio
+import app.database as database
+from app.database import WriteQueue
+from app.result_cache import media_hash_for_source, source_key_for_url
+
+INSERT = "INSERT INTO translations (job_id, media_hash) VALUES (%s, %s)"
+
+def test_media_hash_fits_the_column():
+    upload = media_hash_for_source("sha256:" + "ab" * 32)
+    assert upload == "ab" * 32
+    long_url = source_key_for_url("https://example.com/video.mp4?" + "x" * 500)
+    assert len(media_hash_for_source(long_url)) == 64
+    assert media_hash_for_source(long_url) != media_hash_for_source(source_key_for_url("https://example.com/other.mp4"))
+
+def test_bad_row_fails_alone(monkeypatch):
+    committed = []
+
+    def execute_batch(statements):
+        # Like the database: any bad row aborts the whole transaction
+        if any(params[1] is None for _, params in statements):
+            raise ValueError("Data too long for column 'media_hash'")
+        committed.extend(statements)
+        return True
+
+    monkeypatch.setattr(database, 'execute_batch', execute_batch)
+    queue = WriteQueue(batch_size=10)
+    for job in ('a', 'b', 'c'):
+        queue.enqueue(INSERT, (job, None if job == 'b' else 'hash'))
+    asyncio.run(queue.flush())
+    assert [params[0] for _, params in committed] == ['a', 'c']
+    assert queue.stats()['written'] == 2
+    assert queue.stats()['failed'] == 1
+
+def test_no_database_counts_batch_as_failed(monkeypatch):
+    monkeypatch.setattr(database, 'execute_batch', lambda statements: False)
+    queue = WriteQueue(batch_size=2)
+    for job in ('a', 'b', 'c'):
+        queue.enqueue(INSERT, (job, 'hash'))
+    asyncio.run(queue.flush())
+    assert queue.stats()['failed'] == 3
+    assert queue.stats()['written'] == 0
+
+def test_coalesced_writes_keep_first_position(monkeypatch):
+    committed = []
+    monkeypatch.setattr(database, 'execute_batch', lambda statements: committed.extend(statements) or True)
+    queue = WriteQueue()
+    queue.enqueue("UPDATE 1", ('running',), coalesce_key=('job', 'ta'))
+    queue.enqueue("INSERT 2", ('texts',))
+    queue.enqueue("UPDATE 1", ('completed',), coalesce_key=('job', 'ta'))
+    asyncio.run(queue.flush())
+    assert committed == [("UPDATE 1", ('completed',)), ("INSERT 2", ('texts',))]
+    assert queue.stats()['coalesced'] == 1
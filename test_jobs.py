@@ -0,0 +1,133 @@
+import io
+import os
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import app.jobs as jobs
+from app.jobs import submit_job, get_job, QueueFullError
+from app.routers import translation
+
+@pytest.fixture(autouse=True)
+def fresh_queue(monkeypatch):
+    monkeypatch.setattr(jobs, '_jobs', {})
+    monkeypatch.setattr(jobs, '_active_by_key', {})
+    monkeypatch.setattr(jobs, '_queue', None)
+    monkeypatch.setattr(jobs, '_workers', [])
+    monkeypatch.setattr(jobs, 'JOB_QUEUE_DEPTH', 2)
+
+async def echo(value, fail=False):
+    await asyncio.sleep(0)
+    if fail:
+        raise RuntimeError("pipeline broke")
+    return {'value': value, 'job_id': jobs.current_job_id.get()}
+
+def test_queue_is_bounded():
+    async def run():
+        first = submit_job(echo, 1)
+        second = submit_job(echo, 2)
+        with pytest.raises(QueueFullError):
+            submit_job(echo, 3)
+        return first, second
+    first, second = asyncio.run(run())
+    assert get_job(first['id'])['queue_position'] == 1
+    assert get_job(second['id'])['queue_position'] == 2
+    assert len(jobs._jobs) == 2
+
+def test_same_key_attaches_to_the_job_in_flight():
+    async def run():
+        first = submit_job(echo, 1, dedupe_key="youtube:x|ta|female")
+        again = submit_job(echo, 1, dedupe_key="youtube:x|ta|female")
+        # Attaching queues nothing, so it works even with the queue full
+        submit_job(echo, 2)
+        full = submit_job(echo, 1, dedupe_key="youtube:x|ta|female")
+        await jobs.start_workers()
+        await jobs.get_queue().join()
+        after = submit_job(echo, 1, dedupe_key="youtube:x|ta|female")
+        await jobs.stop_workers()
+        return first, again, full, after
+    first, again, full, after = asyncio.run(run())
+    assert again['attached'] and again['id'] == first['id']
+    assert full['id'] == first['id']
+    assert 'attached' not in first
+    # Once it has finished, the key is free for a new job
+    assert after['id'] != first['id'] and 'attached' not in after
+    assert get_job(first['id'])['result'] == {'value': 1, 'job_id': first['id']}
+
+def test_failed_job_records_the_error(monkeypatch, tmp_path):
+    # Failed jobs append their traceback to error_log.txt in the working directory
+    monkeypatch.chdir(tmp_path)
+    async def run():
+        job = submit_job(echo, 1, fail=True, dedupe_key="k")
+        await jobs.start_workers()
+        await jobs.get_queue().join()
+        await jobs.stop_workers()
+        return job
+    job = get_job(asyncio.run(run())['id'])
+    assert job['status'] == 'failed' and job['error'] == "pipeline broke"
+    assert job['metrics'] is not None
+    assert jobs.find_active_job("k") is None
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(translation, 'get_result_cache', lambda: None)
+    monkeypatch.setattr(translation, 'record_running_translations', lambda *args: None)
+    monkeypatch.setattr(translation.get_upload_sessions(), 'directory', str(tmp_path / 'uploads'))
+    api = FastAPI()
+    api.include_router(translation.router)
+    return TestClient(api)
+
+def test_full_queue_answers_429_and_drops_the_upload(client, monkeypatch, tmp_path):
+    saved = []
+    original = translation.save_upload
+
+    async def save_into_tmp(upload):
+        stored = await original(upload, str(tmp_path / 'uploads'))
+        saved.append(stored.path)
+        return stored
+
+    monkeypatch.setattr(translation, 'save_upload', save_into_tmp)
+    for n in range(2):
+        assert client.post("/api/translate", data={'video_url': f"https://youtu.be/aaaaaaaaaa{n}", 'target_language': 'ta'}).status_code == 202
+    response = client.post(
+        "/api/translate", data={'target_language': 'ta'},
+        files={'video_file': ("clip.wav", io.BytesIO(b'RIFF\x24\x00\x00\x00WAVEfmt ' + b'\0' * 64), "audio/wav")}
+    )
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == "30"
+    assert len(saved) == 1 and not os.path.exists(saved[0])
+
+def test_duplicate_request_attaches(client):
+    form = {'video_url': "https://youtu.be/aaaaaaaaaaa", 'target_language': 'ta'}
+    first = client.post("/api/translate", data=form).json()
+    second = client.post("/api/translate", data=dict(form, video_url="https://www.youtube.com/watch?v=aaaaaaaaaaa")).json()
+    assert second['attached'] and second['job_id'] == first['job_id']
+    assert len(jobs._jobs) == 1
+
+@pytest.mark.parametrize('fail', [False, True])
+def test_job_deletes_its_uploaded_input(monkeypatch, tmp_path, fail):
+    upload = tmp_path / 'upload.mp4'
+    upload.write_bytes(b"\0" * 1024)
+    seen = []
+    async def pipeline(video_url, targets, input_file=None, output_mode='dub'):
+        # The input is still there while the pipeline runs
+        seen.append(os.path.exists(input_file))
+        if fail:
+            raise RuntimeError("pipeline broke")
+        return {
+            'original_text': "hello", 'source_lang': 'en', 'timings': {},
+            'outputs': {'ta': {'translated_text': "vanakkam", 'output_video_url': "/outputs/video/x.mp4"}}
+        }
+    monkeypatch.setattr(translation, 'run_pipeline_multi', pipeline)
+    monkeypatch.setattr(translation, 'record_running_translations', lambda *args: None)
+    monkeypatch.setattr(translation, 'mark_translations_failed', lambda *args: None)
+    monkeypatch.setattr(translation, 'save_translation', lambda *args: None)
+    monkeypatch.setattr(translation, 'get_result_cache', lambda: None)
+    job = translation.run_translation_job(None, [('ta', 'female')], str(upload), "clip.mp4", {'ta': "key"}, {})
+    if fail:
+        with pytest.raises(RuntimeError):
+            asyncio.run(job)
+    else:
+        assert asyncio.run(job)['translated_text'] == "vanakkam"
+    assert seen == [True]
+    assert not upload.exists()
@@ -0,0 +1,75 @@
+import os
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import app.pipeline as pipeline
+import app.tts_cache as tts_cache
+from app.tts_cache import TTSCache, cache_leases
+from app.media_cache import media_cache_key, MEDIA_EXTENSIONS
+from app.result_cache import source_key_for_url
+
+URL = "https://youtu.be/abcdefghijk"
+
+def test_cached_stream_outlives_other_jobs_downloads(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_cache, 'EVICTION_GRACE_SECONDS', 0)
+    cache = TTSCache(str(tmp_path / 'media'), max_bytes=10 ** 9, max_age_seconds=3600)
+    monkeypatch.setattr(pipeline, 'get_media_cache', lambda: cache)
+    video = tmp_path / 'video.mp4'
+    video.write_bytes(b"\0" * 4096)
+    cache.put(media_cache_key(source_key_for_url(URL), 'video'), MEDIA_EXTENSIONS['video'], str(video))
+    # The cache is full from here on: every unpinned stream is evictable
+    cache.max_bytes = 0
+
+    with cache_leases():
+        # A running job fetches the video from the cache but only reads it at mux time...
+        path = pipeline._download_stream(URL, 'video', str(tmp_path / 'downloads'))
+        assert cache.owns(path)
+        # ...while another job's download lands and triggers eviction
+        other = tmp_path / 'other.audio'
+        other.write_bytes(b"\0" * 4096)
+        cache.put(media_cache_key("youtube:zyxwvutsrqp", 'audio'), MEDIA_EXTENSIONS['audio'], str(other))
+        cache.evict()
+        assert os.path.exists(path)
+    cache.evict()
+    assert not os.path.exists(path)
+
+class CountingHandler(SimpleHTTPRequestHandler):
+    """Static file handler that records the paths it served and keeps test output quiet"""
+    served = []
+
+    def do_GET(self):
+        self.served.append(self.path)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+def test_download_fills_the_cache_and_a_repeat_hits_it(tmp_path, monkeypatch):
+    site = tmp_path / 'site'
+    site.mkdir()
+    media = bytes(range(256)) * 64
+    (site / 'clip.mp4').write_bytes(media)
+    cache = TTSCache(str(tmp_path / 'media'), max_bytes=10 ** 9, max_age_seconds=3600)
+    monkeypatch.setattr(pipeline, 'get_media_cache', lambda: cache)
+    CountingHandler.served = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(CountingHandler, directory=str(site)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        # A direct link goes through yt-dlp's generic extractor, as any non-YouTube URL does
+        url = f"http://127.0.0.1:{server.server_address[1]}/clip.mp4"
+        first = pipeline._download_stream(url, 'video', str(tmp_path / 'downloads'))
+        assert cache.owns(first)
+        assert cache.misses == 1 and cache.hits == 0
+        requests_after_first = len(CountingHandler.served)
+        assert requests_after_first >= 1
+
+        second = pipeline._download_stream(url, 'video', str(tmp_path / 'downloads'))
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert second == first
+    assert cache.hits == 1
+    # The repeat never reached the server
+    assert len(CountingHandler.served) == requests_after_first
+    with open(second, 'rb') as f:
+        assert f.read() == media
@@ -0,0 +1,39 @@
+import os
+import sys
+import subprocess
+import pytest
+from app.metrics import JobMetrics, current_rss_bytes, peak_rss_bytes, _child_pids
+
+pytestmark = pytest.mark.skipif(not os.path.exists('/proc/self/status'), reason="needs procfs")
+
+# A worker that holds ~200 MB resident until its stdin closes
+HOG = "import sys; block = bytearray(200 * 1024 * 1024); print('ready', flush=True); sys.stdin.read()"
+
+def test_job_peak_includes_worker_processes():
+    baseline = current_rss_bytes()
+    metrics = JobMetrics(sample_seconds=0.05)
+    metrics.start_sampling()
+    worker = subprocess.Popen([sys.executable, '-c', HOG], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert worker.stdout.readline().strip() == 'ready'
+        assert worker.pid in _child_pids()
+        metrics.sample_rss()
+    finally:
+        worker.stdin.close()
+        worker.wait()
+    metrics.stop_sampling()
+    summary = metrics.summary()
+    # The server alone never held the worker's buffer
+    assert metrics.peak_rss >= baseline + 150 * 1024 * 1024
+    assert summary['peak_rss_mb'] >= 150
+
+def test_job_peak_is_not_the_process_lifetime_peak():
+    # Grow and release well past anything the next job will touch
+    block = bytearray(300 * 1024 * 1024)
+    block[::4096] = b'\x01' * len(block[::4096])
+    del block
+    metrics = JobMetrics(sample_seconds=0)
+    metrics.start_sampling()
+    metrics.stop_sampling()
+    assert metrics.peak_rss == pytest.approx(current_rss_bytes(), rel=0.2)
+    assert metrics.peak_rss < peak_rss_bytes() - 200 * 1024 * 1024
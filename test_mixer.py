@@ -0,0 +1,116 @@
+import wave
+import subprocess
+import numpy as np
+import pytest
+import app.mixer as mixer
+from app.mixer import (
+    mix_segments_numpy, open_wav_stream, read_wav_stream, time_stretch, duck_envelope, duck_in_place,
+    BACKGROUND_GAIN, BACKGROUND_DUCK_GAIN, MAX_SPEED_FACTOR
+)
+
+def write_clip(path, seconds, sample_rate=24000, frequency=440):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((0.5 * np.sin(2 * np.pi * frequency * t) * 32767).astype(np.int16).tobytes())
+    return str(path)
+
+def make_source(path, layout):
+    # Tone on the left channel only, so a downmix or a channel swap would show
+    pan = 'pan=stereo|c0=c0|c1=0*c0' if layout == 'stereo' else 'pan=mono|c0=c0'
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', 'testsrc=duration=3:size=160x120:rate=10',
+        '-f', 'lavfi', '-i', 'sine=frequency=110:duration=3:sample_rate=48000',
+        '-af', pan, '-c:v', 'libx264', '-c:a', 'aac', '-ar', '48000', '-shortest', str(path)
+    ], check=True)
+    return str(path)
+
+def decode(path):
+    process, channels, sample_rate = open_wav_stream(path)
+    return read_wav_stream(process, channels), sample_rate
+
+def rms(samples):
+    return float(np.sqrt(np.mean(samples ** 2)))
+
+@pytest.mark.parametrize('layout,channels', [('stereo', 2), ('mono', 1)])
+def test_mix_keeps_source_rate_and_layout(tmp_path, layout, channels):
+    source = make_source(tmp_path / 'source.mp4', layout)
+    clip = write_clip(tmp_path / 'clip.wav', 1.0)
+    output = str(tmp_path / 'dub.mp4')
+    fits = mix_segments_numpy(source, source, [{'start': 1.0, 'duration': 1.5, 'path': clip}], output)
+    assert fits == [(1.0, 0.0)]
+
+    pcm, sample_rate = decode(output)
+    assert sample_rate == 48000
+    assert pcm.shape[1] == channels
+    before, during = pcm[int(0.2 * sample_rate):int(0.8 * sample_rate)], pcm[int(1.2 * sample_rate):int(1.8 * sample_rate)]
+    # Speech lands on every channel
+    assert all(rms(during[:, c]) > 0.2 for c in range(channels))
+    if layout == 'stereo':
+        # The bed stays where it was: left carries it, right is silent outside speech
+        assert rms(before[:, 0]) > 0.01
+        assert rms(before[:, 1]) < 0.001
+
+def test_overrunning_clip_is_sped_up_within_cap(tmp_path):
+    source = make_source(tmp_path / 'source.mp4', 'stereo')
+    clip = write_clip(tmp_path / 'clip.wav', 2.0)
+    fits = mix_segments_numpy(source, source, [{'start': 0.0, 'duration': 0.5, 'path': clip}], str(tmp_path / 'dub.mp4'))
+    speed, overflow = fits[0]
+    assert speed == MAX_SPEED_FACTOR
+    assert overflow == pytest.approx(0.5, abs=0.01)
+
+def test_missing_source_audio_raises(tmp_path):
+    silent = tmp_path / 'video_only.mp4'
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'testsrc=duration=1:size=64x64:rate=5',
+        '-c:v', 'libx264', str(silent)
+    ], check=True)
+    with pytest.raises(subprocess.CalledProcessError):
+        open_wav_stream(str(silent))
+
+def test_time_stretch_shortens_without_resampling():
+    sample_rate = 24000
+    t = np.arange(sample_rate) / sample_rate
+    tone = np.sin(2 * np.pi * 200 * t).astype(np.float32)
+    stretched = time_stretch(tone, 1.5, sample_rate)
+    assert len(stretched) == int(sample_rate / 1.5)
+    # Pitch is kept: the dominant frequency is still 200 Hz
+    spectrum = np.abs(np.fft.rfft(stretched))
+    assert np.fft.rfftfreq(len(stretched), 1 / sample_rate)[np.argmax(spectrum)] == pytest.approx(200, abs=5)
+
+def test_duck_envelope_levels():
+    envelope = duck_envelope(24000, [(6000, 18000)], 24000)
+    assert envelope[0] == pytest.approx(BACKGROUND_GAIN)
+    assert envelope[12000] == pytest.approx(BACKGROUND_DUCK_GAIN)
+    assert envelope[-1] == pytest.approx(BACKGROUND_GAIN)
+
+def test_blocked_ducking_matches_one_pass(monkeypatch):
+    sample_rate = 8000
+    monkeypatch.setattr(mixer, 'MIX_BLOCK_SECONDS', 0.25)
+    # Regions that start, end and sit right at block boundaries, overlapping and out of order
+    regions = [(1990, 2010), (500, 1500), (3990, 6100), (1200, 1600), (7999, 8000)]
+    background = np.ones((8000, 2), dtype=np.float32)
+    duck_in_place(background, regions, sample_rate)
+    expected = duck_envelope(8000, regions, sample_rate)
+    np.testing.assert_allclose(background[:, 0], expected, atol=1e-6)
+    np.testing.assert_array_equal(background[:, 0], background[:, 1])
+
+def test_decoded_background_is_writable(tmp_path):
+    pcm, _ = decode(make_source(tmp_path / 'source.mp4', 'stereo'))
+    # Ducking scales it in place instead of allocating another full-length array
+    assert pcm.flags.writeable
+
+def test_audio_longer_than_the_video_is_cut(tmp_path):
+    video = tmp_path / 'short.mp4'
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'testsrc=duration=1:size=64x64:rate=5',
+        '-c:v', 'libx264', str(video)
+    ], check=True)
+    source = make_source(tmp_path / 'source.mp4', 'stereo')
+    output = tmp_path / 'dub.mp4'
+    mix_segments_numpy(str(video), source, [], str(output))
+    pcm, sample_rate = decode(str(output))
+    assert len(pcm) / sample_rate == pytest.approx(1.0, abs=0.1)
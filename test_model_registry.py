@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+import pytest
+import app.model_registry as model_registry
+from app.model_registry import ModelRegistry, model_nbytes
+
+MB = 1024 * 1024
+
+class FakeModel:
+    """Reports its size through parameters()/buffers() like a torch module"""
+
+    def __init__(self, mb):
+        self.mb = mb
+
+    def parameters(self):
+        return [SimpleNamespace(numel=lambda: self.mb * MB // 4, element_size=lambda: 4)]
+
+    def buffers(self):
+        return []
+
+@pytest.fixture
+def registry():
+    registry = ModelRegistry(budget_mb=1000)
+    registry.loads = []
+
+    def load(variant, device):
+        # What was resident when this model started loading
+        registry.loads.append((variant, sorted(registry.models)))
+        return FakeModel(int(variant))
+    registry.register("fake", load)
+    return registry
+
+def test_models_load_once(registry):
+    first = registry.get("fake:100")
+    assert registry.get("fake:100") is first
+    assert registry.loads == [("100", [])]
+    assert registry.resident() == {"fake:100": 100}
+
+def test_least_recently_used_model_is_evicted(registry):
+    registry.get("fake:400")
+    registry.get("fake:401")
+    registry.get("fake:400")
+    registry.get("fake:402")
+    assert registry.resident() == {"fake:400": 400, "fake:402": 402}
+
+def test_room_is_made_before_a_known_big_model_loads(registry, monkeypatch):
+    monkeypatch.setitem(model_registry.ESTIMATED_SIZES_MB, "fake:900", 900)
+    registry.get("fake:300")
+    registry.get("fake:900")
+    # The estimate evicted the small model before the big one started loading
+    assert registry.loads[-1] == ("900", [])
+    assert registry.resident() == {"fake:900": 900}
+
+def test_model_over_the_budget_still_loads(registry):
+    registry.get("fake:100")
+    assert registry.get("fake:1500").mb == 1500
+    assert registry.resident() == {"fake:1500": 1500}
+
+def test_no_budget_keeps_everything():
+    registry = ModelRegistry(budget_mb=0)
+    registry.register("fake", lambda variant, device: FakeModel(int(variant)))
+    for mb in (800, 900, 1000):
+        registry.get(f"fake:{mb}")
+    assert len(registry.resident()) == 3
+
+def test_unknown_loader(registry):
+    with pytest.raises(KeyError):
+        registry.get("nope:tiny")
+
+def test_model_nbytes():
+    assert model_nbytes(FakeModel(3)) == 3 * MB
+    # Bark's loader returns (model, processor)
+    assert model_nbytes((FakeModel(2), object())) == 2 * MB
+    assert model_nbytes(object()) == 0
@@ -0,0 +1,100 @@
+import os
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import app.result_cache as result_cache
+from app.output_store import OutputStore
+from app.routers import outputs
+
+DATA = bytes(range(256)) * 40
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = OutputStore(str(tmp_path / 'outputs'), max_bytes=10 ** 9, max_age_seconds=3600)
+    monkeypatch.setattr(outputs, 'get_output_store', lambda: store)
+    return store
+
+@pytest.fixture
+def client(store):
+    app = FastAPI()
+    app.include_router(outputs.router)
+    return TestClient(app)
+
+def write_output(store, name, data=DATA, age=0):
+    path = store.path('video', name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    if age:
+        then = time.time() - age
+        os.utime(path, (then, then))
+    return path
+
+def test_range_request_gets_partial_content(client, store):
+    write_output(store, 'dub.mp4')
+    whole = client.get('/outputs/video/dub.mp4')
+    assert whole.status_code == 200 and whole.content == DATA
+    assert whole.headers['content-type'] == 'video/mp4'
+    assert whole.headers['accept-ranges'] == 'bytes'
+
+    part = client.get('/outputs/video/dub.mp4', headers={'Range': 'bytes=100-199'})
+    assert part.status_code == 206
+    assert part.content == DATA[100:200]
+    assert part.headers['content-range'] == f"bytes 100-199/{len(DATA)}"
+
+    # Seeking from the end, as players do to find the moov atom
+    tail = client.get('/outputs/video/dub.mp4', headers={'Range': 'bytes=-16'})
+    assert tail.status_code == 206 and tail.content == DATA[-16:]
+
+    unsatisfiable = client.get('/outputs/video/dub.mp4', headers={'Range': f'bytes={len(DATA)}-'})
+    assert unsatisfiable.status_code == 416
+
+def test_serving_refreshes_only_the_access_time(client, store):
+    path = write_output(store, 'dub.mp4', age=7200)
+    mtime = os.stat(path).st_mtime
+    etag = client.head('/outputs/video/dub.mp4').headers['etag']
+    assert os.stat(path).st_mtime == mtime
+    assert time.time() - os.stat(path).st_atime < 60
+    # Range requests stay valid across serves: the ETag is built from the unchanged mtime
+    assert client.head('/outputs/video/dub.mp4').headers['etag'] == etag
+
+@pytest.mark.parametrize('url', ['/outputs/video/.hidden', '/outputs/secrets/dub.mp4', '/outputs/video/missing.mp4', '/outputs/video/..%2Fdub.mp4'])
+def test_unknown_outputs_are_404(client, store, url):
+    write_output(store, 'dub.mp4')
+    assert client.get(url).status_code == 404
+
+class FakeResultCache:
+    def __init__(self):
+        self.deleted = []
+
+    def delete_outputs(self, urls):
+        self.deleted.extend(urls)
+
+def test_sweep_expires_idle_outputs_then_evicts_lru_over_quota(store, monkeypatch):
+    cache = FakeResultCache()
+    monkeypatch.setattr(result_cache, 'get_result_cache', lambda: cache)
+    expired = write_output(store, 'expired.mp4', age=7200)
+    oldest = write_output(store, 'oldest.mp4', age=3000)
+    older = write_output(store, 'older.mp4', age=2000)
+    # Written inside the grace window: kept even though the store is over quota
+    fresh = write_output(store, 'fresh.mp4')
+    store.max_bytes = 2 * len(DATA)
+
+    removed = store.sweep()
+    assert removed == ['/outputs/video/expired.mp4', '/outputs/video/oldest.mp4']
+    assert cache.deleted == removed
+    assert not os.path.exists(expired) and not os.path.exists(oldest)
+    assert os.path.exists(older) and os.path.exists(fresh)
+    assert store.stats()['bytes'] == 2 * len(DATA)
+    assert store.stats()['evictions'] == 2
+
+def test_adding_past_the_quota_sweeps_early(store, monkeypatch):
+    monkeypatch.setattr(result_cache, 'get_result_cache', lambda: None)
+    write_output(store, 'old.mp4', age=3000)
+    store.max_bytes = len(DATA)
+    store.sweep()
+    assert store.stats()['bytes'] == len(DATA)
+    new = write_output(store, 'new.mp4')
+    store.added(new)
+    assert not os.path.exists(store.path('video', 'old.mp4'))
+    assert os.path.exists(new)
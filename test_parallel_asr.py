@@ -0,0 +1,79 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+import app.pipeline as pipeline
+from app.pipeline import find_split_points, transcribe_region, transcribe_parallel, WHISPER_SAMPLE_RATE
+
+RATE = WHISPER_SAMPLE_RATE
+FRAME = RATE // 10
+
+def speech(seconds, bursts):
+    """Silence with a constant-level burst per (start, end) second pair; burst k has level 0.04 * (k + 1)"""
+    audio = np.zeros(int(seconds * RATE), dtype=np.float32)
+    for k, (start, end) in enumerate(bursts):
+        audio[int(start * RATE):int(end * RATE)] = 0.04 * (k + 1)
+    return audio
+
+class BurstBackend:
+    """Fake ASR: one segment per burst in the slice, named by its level; burst 3 alone reads as French"""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, language=None):
+        self.calls.append(language)
+        levels = np.abs(audio[:len(audio) // FRAME * FRAME].reshape(-1, FRAME)).max(axis=1)
+        segments = []
+        for i, level in enumerate(levels):
+            if level < 0.01:
+                continue
+            k = int(round(level / 0.04)) - 1
+            if segments and segments[-1]['k'] == k and segments[-1]['end'] == i / 10:
+                segments[-1]['end'] = (i + 1) / 10
+            else:
+                segments.append({'k': k, 'start': i / 10, 'end': (i + 1) / 10, 'text': f" b{k}"})
+        detected = 'fr' if any(seg['k'] == 3 for seg in segments) else 'en'
+        return {'text': "".join(seg['text'] for seg in segments), 'language': language or detected, 'segments': segments}
+
+BURSTS = [(5 * k + 1, 5 * k + 3) for k in range(20)]
+
+def test_split_points_land_in_pauses():
+    audio = speech(100, BURSTS)
+    points = find_split_points(audio, chunk_seconds=30)
+    assert len(points) == 3
+    previous = 0
+    for point in points:
+        assert audio[point - FRAME // 2:point + FRAME // 2].max() == 0
+        assert 25 * RATE <= point - previous <= 30 * RATE
+        previous = point
+    assert find_split_points(audio[:20 * RATE], chunk_seconds=30) == []
+
+def test_split_without_pauses_still_cuts_every_chunk():
+    points = find_split_points(np.ones(70 * RATE, dtype=np.float32), chunk_seconds=30)
+    assert len(points) == 2 and all(b - a <= 30 * RATE for a, b in zip([0] + points, points))
+
+def test_region_keeps_only_segments_centred_inside_it(monkeypatch):
+    monkeypatch.setattr(pipeline, 'get_asr_backend', lambda: BurstBackend())
+    audio = speech(20, [(1, 3), (6, 8), (11, 13)])
+    # Owned region is [5 s, 10 s), padded by 4.5 s either side
+    low, high = int(0.5 * RATE), int(14.5 * RATE)
+    result = transcribe_region(audio[low:high], low, 5 * RATE, 10 * RATE)
+    assert [(seg['text'], seg['start'], seg['end']) for seg in result['segments']] == [(" b1", 6.0, 8.0)]
+    assert result['duration'] == 5.0
+
+def test_parallel_transcription_stitches_each_segment_once(monkeypatch):
+    backend = BurstBackend()
+    audio = speech(100, BURSTS)
+    monkeypatch.setattr(pipeline, 'get_asr_backend', lambda: backend)
+    monkeypatch.setattr(pipeline, 'get_asr_executor', lambda: ThreadPoolExecutor(2))
+    monkeypatch.setattr(pipeline, 'load_audio_16k', lambda path: audio)
+    monkeypatch.setattr(pipeline, 'ASR_CHUNK_SECONDS', 30)
+    monkeypatch.setattr(pipeline, 'ASR_CHUNK_OVERLAP_SECONDS', 1.0)
+    result = asyncio.run(transcribe_parallel("audio.f32", lambda *args, **kwargs: None))
+    assert [seg['text'] for seg in result['segments']] == [f" b{k}" for k in range(20)]
+    assert [seg['id'] for seg in result['segments']] == list(range(20))
+    assert [(seg['start'], seg['end']) for seg in result['segments']] == [pytest.approx(b, abs=0.11) for b in BURSTS]
+    # The chunk holding burst 3 detected French; it was redone in the majority language
+    assert result['language'] == 'en'
+    assert backend.calls.count(None) == 4 and backend.calls.count('en') == 1
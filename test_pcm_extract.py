@@ -0,0 +1,40 @@
+import subprocess
+import numpy as np
+import pytest
+import app.pipeline as pipeline
+from app.pipeline import extract_pcm_16k, load_audio_16k, WHISPER_SAMPLE_RATE
+
+@pytest.fixture
+def source(tmp_path):
+    # 3 s of a 440 Hz tone in a 48 kHz stereo AAC track, behind a video stream
+    path = tmp_path / 'source.mp4'
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', 'testsrc=duration=3:size=64x64:rate=5',
+        '-f', 'lavfi', '-i', 'sine=frequency=440:duration=3:sample_rate=48000',
+        '-ac', '2', '-c:v', 'libx264', '-c:a', 'aac', '-shortest', str(path)
+    ], check=True)
+    return str(path)
+
+def test_extract_writes_raw_16k_mono_float(source, tmp_path):
+    pcm_path = extract_pcm_16k(source, str(tmp_path / 'audio16k.f32'))
+    audio = load_audio_16k(pcm_path)
+    assert audio.dtype == np.float32
+    assert len(audio) / WHISPER_SAMPLE_RATE == pytest.approx(3.0, abs=0.05)
+    spectrum = np.abs(np.fft.rfft(audio))
+    assert np.fft.rfftfreq(len(audio), 1 / WHISPER_SAMPLE_RATE)[np.argmax(spectrum)] == pytest.approx(440, abs=2)
+    assert 0.05 < np.abs(audio).max() <= 1.0
+
+def test_asr_gets_the_samples_not_a_file(source, tmp_path, monkeypatch):
+    received = []
+
+    class Backend:
+        def transcribe(self, audio, language=None):
+            received.append(audio)
+            return {'text': "", 'language': 'en', 'segments': []}
+
+    monkeypatch.setattr(pipeline, 'get_asr_backend', lambda: Backend())
+    pcm_path = extract_pcm_16k(source, str(tmp_path / 'audio16k.f32'))
+    pipeline.transcribe_audio(pcm_path)
+    assert isinstance(received[0], np.ndarray)
+    np.testing.assert_array_equal(received[0], np.fromfile(pcm_path, dtype=np.float32))
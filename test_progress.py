@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from app.progress import ProgressBus, stage_percent
+
+async def collect(bus, job_id, after=0):
+    return [event async for event in bus.subscribe(job_id, after)]
+
+def test_stage_percent_maps_into_the_stage_range():
+    assert stage_percent('download') == 0
+    assert stage_percent('tts', 0.5) == 70
+    assert stage_percent('mix', 2.0) == 99
+
+def test_percent_never_goes_backwards():
+    async def run():
+        bus = ProgressBus()
+        bus.publish("job", 'stage', stage='tts', percent=60)
+        bus.publish("job", 'stage', stage='transcribe', percent=35)
+        bus.publish("job", 'completed')
+        return bus.history("job")
+    events = asyncio.run(run())
+    assert [e['percent'] for e in events] == [60, 60, 100]
+    assert [e['id'] for e in events] == [1, 2, 3]
+
+def test_reconnect_resumes_after_the_last_event_id():
+    async def run():
+        bus = ProgressBus()
+        for percent in (10, 20, 30):
+            bus.publish("job", 'stage', percent=percent)
+        subscriber = asyncio.create_task(collect(bus, "job", after=2))
+        await asyncio.sleep(0)
+        bus.publish("job", 'stage', percent=40)
+        bus.publish("job", 'completed')
+        # Nothing is accepted once the job has finished
+        bus.publish("job", 'stage', percent=50)
+        return await subscriber, bus
+    events, bus = asyncio.run(run())
+    assert [e['id'] for e in events] == [3, 4, 5]
+    assert events[-1]['type'] == 'completed'
+    assert bus.stats() == {'channels': 1, 'subscribers': 0}
+    bus.discard("job")
+    assert bus.stats()['channels'] == 0
+
+def test_slow_subscriber_loses_the_oldest_events_only():
+    async def run():
+        bus = ProgressBus(buffer=3)
+        stream = bus.subscribe("job")
+        first = asyncio.create_task(stream.__anext__())
+        await asyncio.sleep(0)
+        for percent in range(1, 7):
+            bus.publish("job", 'stage', percent=percent)
+        bus.publish("job", 'failed', error="boom")
+        return [await first] + [event async for event in stream]
+    events = asyncio.run(run())
+    assert [e['id'] for e in events] == [5, 6, 7]
+    assert events[-1]['error'] == "boom"
+
+def test_publish_from_a_worker_thread():
+    async def run():
+        bus = ProgressBus()
+        bus.publish("job", 'started')
+        worker = threading.Thread(target=bus.publish, args=("job", 'completed'))
+        worker.start()
+        return await collect(bus, "job"), worker
+    events, worker = asyncio.run(run())
+    worker.join()
+    assert [e['type'] for e in events] == ['started', 'completed']
@@ -0,0 +1,89 @@
+import os
+import pytest
+import app.result_cache as result_cache
+from app.output_store import OutputStore
+from app.result_cache import (
+    ResultCache, youtube_video_id, source_key_for_url, source_key_for_file, result_cache_key, sha256_file
+)
+
+@pytest.mark.parametrize('url', [
+    "https://www.youtube.com/watch?v=a1ZiLZA3v0I",
+    "https://youtube.com/watch?feature=share&v=a1ZiLZA3v0I&t=42",
+    "https://m.youtube.com/watch?v=a1ZiLZA3v0I",
+    "https://youtu.be/a1ZiLZA3v0I?si=abc",
+    "https://www.youtube.com/shorts/a1ZiLZA3v0I",
+    "https://www.youtube.com/embed/a1ZiLZA3v0I",
+    "https://www.youtube-nocookie.com/embed/a1ZiLZA3v0I",
+    "  https://www.youtube.com/live/a1ZiLZA3v0I  ",
+])
+def test_youtube_url_forms_share_a_key(url):
+    assert youtube_video_id(url) == "a1ZiLZA3v0I"
+    assert source_key_for_url(url) == "youtube:a1ZiLZA3v0I"
+
+@pytest.mark.parametrize('url', [
+    "https://www.youtube.com/watch?v=short",
+    "https://www.youtube.com/channel/UC123",
+    "https://notyoutube.com/watch?v=a1ZiLZA3v0I",
+])
+def test_other_urls_are_keyed_by_the_url(url):
+    assert youtube_video_id(url) is None
+    assert source_key_for_url(f" {url} ") == f"url:{url}"
+
+def test_result_key_parts():
+    assert result_cache_key("youtube:x", "ta", "female", asr_model="small") == "youtube:x|small|ta|female"
+    # Subtitle outputs don't depend on the voice
+    assert result_cache_key("youtube:x", "ta", "female", "softsub") == result_cache_key("youtube:x", "ta", "male", "softsub")
+    assert result_cache_key("youtube:x", "ta", "female", "subtitles") != result_cache_key("youtube:x", "ta", "female", "softsub")
+
+def test_result_key_follows_the_asr_model(monkeypatch):
+    import app.pipeline as pipeline
+    monkeypatch.setattr(pipeline, '_asr_backend', pipeline.WhisperASRBackend("small"))
+    small = result_cache_key("youtube:x", "ta", "female")
+    monkeypatch.setattr(pipeline, '_asr_backend', pipeline.WhisperASRBackend("medium"))
+    medium = result_cache_key("youtube:x", "ta", "female")
+    monkeypatch.setattr(pipeline, '_asr_backend', pipeline.FasterWhisperASRBackend("medium"))
+    faster = result_cache_key("youtube:x", "ta", "female")
+    assert len({small, medium, faster}) == 3
+
+def test_file_key_is_the_content_hash(tmp_path):
+    first, second = tmp_path / 'a.mp4', tmp_path / 'b.mp4'
+    first.write_bytes(b"same bytes")
+    second.write_bytes(b"same bytes")
+    assert source_key_for_file(str(first)) == source_key_for_file(str(second)) == f"sha256:{sha256_file(str(first))}"
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = OutputStore(str(tmp_path / 'outputs'), max_bytes=10 ** 9, max_age_seconds=3600)
+    monkeypatch.setattr(result_cache, 'get_output_store', lambda: store)
+    return store
+
+def write_output(store, kind, name):
+    path = store.path(kind, name)
+    with open(path, 'w') as f:
+        f.write("output")
+    return store.url(kind, name)
+
+def test_hit_needs_every_output_on_disk(tmp_path, store):
+    cache = ResultCache(str(tmp_path / 'results.db'))
+    video = write_output(store, 'video', 'dub.mp4')
+    srt = write_output(store, 'subtitles', 'dub.srt')
+    cache.put("k", {'output_video_url': video, 'subtitle_urls': {'srt': srt}})
+    assert cache.get("k")['output_video_url'] == video
+    os.remove(store.path_for_url(srt))
+    assert cache.get("k") is None
+    # The stale entry is gone for good, even once the file is back
+    write_output(store, 'subtitles', 'dub.srt')
+    assert cache.get("k") is None
+
+def test_evicted_outputs_drop_their_entries(tmp_path, store):
+    cache = ResultCache(str(tmp_path / 'results.db'))
+    kept = write_output(store, 'video', 'kept.mp4')
+    evicted = write_output(store, 'video', 'evicted_1.mp4')
+    # "_" must not act as a LIKE wildcard
+    lookalike = write_output(store, 'video', 'evictedX1.mp4')
+    cache.put("kept", {'output_video_url': kept})
+    cache.put("evicted", {'output_video_url': evicted})
+    cache.put("lookalike", {'output_video_url': lookalike})
+    cache.delete_outputs([evicted])
+    assert cache.get("kept") and cache.get("lookalike")
+    assert cache.get("evicted") is None
@@ -0,0 +1,95 @@
+import pytest
+import app.segment_planner as segment_planner
+from app.segment_planner import (
+    SegmentPlanner, plan_segments, split_segment, overflow_summary,
+    SEGMENT_MAX_SECONDS, SEGMENT_BREATH_SECONDS, SEGMENT_TAIL_SECONDS
+)
+
+def seg(id, start, end, text):
+    return {'id': id, 'start': start, 'end': end, 'text': text}
+
+CONVERSATION = [
+    seg(0, 0.0, 1.0, "Hello there"),
+    seg(1, 1.2, 2.5, "my friend."),
+    seg(2, 3.5, 5.0, "How are you?"),
+    seg(3, 5.1, 6.0, "Fine."),
+]
+
+def test_close_fragments_are_merged_until_a_sentence_ends():
+    units, stats = plan_segments(CONVERSATION)
+    assert [u['text'] for u in units] == ["Hello there my friend.", "How are you?", "Fine."]
+    assert [u['sources'] for u in units] == [[0, 1], [2], [3]]
+    assert [u['id'] for u in units] == [0, 1, 2]
+    assert stats == {
+        'source_segments': 4, 'tts_calls': 3, 'tts_calls_saved': 1, 'merged_segments': 1, 'split_segments': 0
+    }
+
+def test_budgets_run_into_the_following_silence():
+    first, second, last = plan_segments(CONVERSATION)[0]
+    # Up to the next unit's start, less a breath
+    assert first['budget'] == pytest.approx(3.5 - SEGMENT_BREATH_SECONDS)
+    # Never shorter than the unit's own speech when the next one follows closely
+    assert second['budget'] == pytest.approx(5.0 - 3.5)
+    # Nothing follows the last unit
+    assert last['budget'] == pytest.approx(6.0 - 5.1 + SEGMENT_TAIL_SECONDS)
+
+def test_units_are_released_once_the_next_one_starts():
+    planner = SegmentPlanner()
+    assert planner.feed(CONVERSATION[0]) == []
+    assert planner.feed(CONVERSATION[1]) == []
+    assert planner.feed(CONVERSATION[2]) == []
+    released = planner.feed(CONVERSATION[3])
+    assert [u['text'] for u in released] == ["Hello there my friend."]
+    assert [u['text'] for u in planner.flush()] == ["How are you?", "Fine."]
+    assert planner.flush() == []
+
+def test_merging_stops_at_the_length_cap():
+    words = [seg(i, i * 1.0, i * 1.0 + 0.9, f"word{i}") for i in range(30)]
+    units, stats = plan_segments(words)
+    assert all(u['end'] - u['start'] <= SEGMENT_MAX_SECONDS for u in units)
+    assert sum(len(u['sources']) for u in units) == 30
+    assert stats['tts_calls_saved'] == 30 - len(units) > 0
+
+def test_long_segment_is_split_at_clauses():
+    text = ", ".join(f"clause number {i} goes here" for i in range(12)) + "."
+    parts = split_segment(seg(7, 10.0, 10.0 + 3 * SEGMENT_MAX_SECONDS, text))
+    assert len(parts) == 3
+    assert parts[0]['start'] == 10.0 and parts[-1]['end'] == 10.0 + 3 * SEGMENT_MAX_SECONDS
+    assert all(a['end'] == pytest.approx(b['start']) for a, b in zip(parts, parts[1:]))
+    assert all(p['text'].endswith((",", ".")) for p in parts)
+    assert " ".join(p['text'] for p in parts) == text
+    assert all(p['sources'] == [7] for p in parts)
+    # Even parts rather than two full ones and a scrap
+    assert all(p['end'] - p['start'] == pytest.approx(SEGMENT_MAX_SECONDS, rel=0.1) for p in parts)
+
+def test_split_parts_are_not_merged_back():
+    text = " ".join(f"w{i}" for i in range(40))
+    units, stats = plan_segments([seg(0, 0.0, 2 * SEGMENT_MAX_SECONDS, text)])
+    assert len(units) == 2
+    assert stats['split_segments'] == 1 and stats['tts_calls_saved'] == -1
+
+def test_planning_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(segment_planner, 'SEGMENT_PLANNING', False)
+    units, stats = plan_segments(CONVERSATION)
+    assert [u['text'] for u in units] == [s['text'] for s in CONVERSATION]
+    assert [u['budget'] for u in units] == pytest.approx([s['end'] - s['start'] for s in CONVERSATION])
+    assert stats['tts_calls'] == 4 and stats['tts_calls_saved'] == 0
+
+def test_overflow_summary():
+    summary = overflow_summary([(1.0, 0.0), (1.2, 0.1), (1.25, 0.3), (1.25, 0.8), (1.25, 3.0)])
+    assert summary == {
+        'clips': 5,
+        'stretched': 4,
+        'overflowed': 4,
+        'p50_seconds': 0.3,
+        'p90_seconds': 3.0,
+        'max_seconds': 3.0,
+        'total_seconds': 4.2,
+        'buckets': {'<=0.25s': 1, '<=0.5s': 1, '<=1.0s': 1, '<=2.0s': 0, '>2.0s': 1},
+    }
+
+def test_overflow_summary_with_nothing_overflowing():
+    summary = overflow_summary([(1.0, 0.0)])
+    assert summary['overflowed'] == 0
+    assert summary['p50_seconds'] == summary['p90_seconds'] == summary['max_seconds'] == 0.0
+    assert overflow_summary([])['clips'] == 0
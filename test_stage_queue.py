@@ -0,0 +1,50 @@
+import asyncio
+from app.stage_queue import StageQueue, END_OF_STREAM
+
+def test_sentinels_are_not_counted():
+    async def run():
+        queue = StageQueue("tts:ta", maxsize=32)
+        for unit in range(6):
+            await queue.put(unit)
+        for _ in range(8):
+            # One sentinel per TTS worker
+            await queue.put(END_OF_STREAM)
+        taken = []
+        while not queue.empty():
+            taken.append(await queue.get())
+        return queue.stats(), taken
+
+    stats, taken = asyncio.run(run())
+    assert taken[:6] == list(range(6)) and taken[6:] == [END_OF_STREAM] * 8
+    assert stats['items'] == 6
+    assert stats['max_depth'] == 6
+    # Depths seen by the six puts: 1, 2, ... 6
+    assert stats['avg_depth'] == 3.5
+
+def test_depth_ignores_queued_sentinels():
+    async def run():
+        queue = StageQueue("translate:ta")
+        await queue.put(END_OF_STREAM)
+        await queue.put("late segment")
+        assert await queue.get() is END_OF_STREAM
+        await queue.put("next segment")
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    assert stats['items'] == 2
+    assert stats['max_depth'] == 2
+    assert stats['avg_depth'] == 1.5
+
+def test_wait_time_averages_taken_items():
+    async def run():
+        queue = StageQueue("translate:ta")
+        await queue.put("a")
+        await queue.put("b")
+        await asyncio.sleep(0.05)
+        await queue.get()
+        await queue.put(END_OF_STREAM)
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    # Only "a" has been taken; the average must not be diluted by "b" or the sentinel
+    assert stats['avg_wait_seconds'] >= 0.04
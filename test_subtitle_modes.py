@@ -0,0 +1,97 @@
+import os
+import re
+import shutil
+import asyncio
+import subprocess
+import pytest
+import app.pipeline as pipeline
+from app.output_store import get_output_store
+from app.translators import FakeTranslatorBackend, set_translator_backend
+from app.subtitles import format_timestamp, subtitle_cues, to_srt, to_vtt
+
+SEGMENTS = [
+    {'id': 0, 'start': 0.0, 'end': 0.8, 'text': ' Hello there.'},
+    {'id': 1, 'start': 1.0, 'end': 1.0, 'text': ' General Kenobi!'},
+    {'id': 2, 'start': 1.5, 'end': 1.9, 'text': '   '},
+]
+
+def make_media(path):
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', 'testsrc=duration=2:size=160x120:rate=10',
+        '-f', 'lavfi', '-i', 'sine=duration=2',
+        '-c:v', 'libx264', '-c:a', 'aac', '-shortest', path
+    ], check=True)
+    return path
+
+def stream_types(path):
+    # `ffmpeg -i` with no output exits non-zero but still lists the input's streams
+    probe = subprocess.run(['ffmpeg', '-hide_banner', '-i', path], capture_output=True, text=True)
+    return [kind.lower() for kind in re.findall(r'Stream #\d+:\d+\S*: (Video|Audio|Subtitle):', probe.stderr)]
+
+@pytest.fixture
+def offline_pipeline(monkeypatch, tmp_path):
+    """Pipeline with canned ASR, the fake translator and a download stub that records what was fetched"""
+    monkeypatch.chdir(tmp_path)
+    source = make_media(str(tmp_path / 'source.mp4'))
+    downloads = []
+
+    def download_stream(youtube_url, kind, output_dir="downloads"):
+        downloads.append(kind)
+        path = str(tmp_path / f"download_{len(downloads)}_{kind}.mp4")
+        shutil.copy(source, path)
+        return path
+
+    async def transcribe_media(audio_file, log_progress):
+        assert os.path.getsize(audio_file) > 0
+        return {'text': 'Hello there. General Kenobi!', 'language': 'en', 'segments': SEGMENTS}
+
+    async def no_tts(*args, **kwargs):
+        raise AssertionError("subtitle modes must not synthesize speech")
+
+    monkeypatch.setattr(pipeline, 'download_stream', download_stream)
+    monkeypatch.setattr(pipeline, 'transcribe_media', transcribe_media)
+    monkeypatch.setattr(pipeline, 'get_translation_memory', lambda: None)
+    monkeypatch.setattr(pipeline, 'get_media_cache', lambda: None)
+    monkeypatch.setattr(pipeline, 'synthesize_clip', no_tts)
+    set_translator_backend(FakeTranslatorBackend())
+    yield source, downloads
+    set_translator_backend(None)
+
+@pytest.mark.parametrize('source_kind', ['upload', 'url'])
+@pytest.mark.parametrize('output_mode', ['subtitles', 'softsub'])
+def test_subtitle_output_modes(offline_pipeline, source_kind, output_mode):
+    source, downloads = offline_pipeline
+    if source_kind == 'upload':
+        result = asyncio.run(pipeline.run_pipeline(None, 'ta', input_file=source, output_mode=output_mode))
+        assert downloads == []
+    else:
+        result = asyncio.run(pipeline.run_pipeline('https://www.youtube.com/watch?v=abcdefghijk', 'ta', output_mode=output_mode))
+        # Subtitles alone never need the video stream
+        assert sorted(downloads) == (['audio'] if output_mode == 'subtitles' else ['audio', 'video'])
+
+    store = get_output_store()
+    with open(store.path_for_url(result['subtitle_urls']['srt']), encoding='utf-8') as f:
+        assert f.read() == (
+            "1\n00:00:00,000 --> 00:00:00,800\n[ta] Hello there.\n\n"
+            "2\n00:00:01,000 --> 00:00:01,100\n[ta] General Kenobi!\n"
+        )
+    with open(store.path_for_url(result['subtitle_urls']['vtt']), encoding='utf-8') as f:
+        assert f.read().startswith("WEBVTT\n\n00:00:00.000 --> 00:00:00.800\n[ta] Hello there.\n")
+
+    if output_mode == 'subtitles':
+        assert result['output_video_url'] is None
+    else:
+        assert sorted(stream_types(store.path_for_url(result['output_video_url']))) == ['audio', 'subtitle', 'video']
+
+def test_format_timestamp():
+    assert format_timestamp(0) == "00:00:00,000"
+    assert format_timestamp(3725.4567) == "01:02:05,457"
+    assert format_timestamp(59.9996, '.') == "00:01:00.000"
+    assert format_timestamp(-1) == "00:00:00,000"
+
+def test_cues_skip_untranslated_and_normalize_whitespace():
+    cues = subtitle_cues(SEGMENTS, {0: " Bonjour \n  toi ", 1: "", 2: "ignored"})
+    assert cues == [(0.0, 0.8, "Bonjour toi"), (1.5, 1.9, "ignored")]
+    assert to_srt(cues).startswith("1\n00:00:00,000 --> 00:00:00,800\nBonjour toi\n\n2\n")
+    assert to_vtt([]) == "WEBVTT\n\n"
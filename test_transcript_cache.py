@@ -0,0 +1,68 @@
+import os
+import time
+import asyncio
+import app.output_store as output_store
+from app.transcript_cache import TranscriptCache
+
+def result(text):
+    return {'text': text, 'language': 'en', 'segments': [{'id': 0, 'start': 0.0, 'end': 1.0, 'text': text}]}
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+def test_round_trip_counts_hits(tmp_path):
+    cache = TranscriptCache(str(tmp_path), max_bytes=10 ** 6, max_age_seconds=3600)
+    assert cache.get("ab" * 32) is None
+    cache.put("ab" * 32, dict(result("hello"), extra="not stored"))
+    assert cache.get("ab" * 32) == result("hello")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_expired_entries_miss_and_are_evicted(tmp_path):
+    cache = TranscriptCache(str(tmp_path), max_bytes=10 ** 6, max_age_seconds=3600)
+    cache.put("aa" * 32, result("old"))
+    age(cache.path_for("aa" * 32), 7200)
+    assert cache.get("aa" * 32) is None
+    assert cache.evict() == 1
+    assert not os.path.exists(cache.path_for("aa" * 32))
+
+def test_least_recently_used_go_first(tmp_path):
+    cache = TranscriptCache(str(tmp_path), max_bytes=10 ** 6, max_age_seconds=3600)
+    for n, key in enumerate(("aa" * 32, "bb" * 32, "cc" * 32)):
+        cache.put(key, result("x" * 100))
+        age(cache.path_for(key), 300 - n * 100)
+    # A hit makes the oldest entry the newest
+    assert cache.get("aa" * 32)
+    cache.max_bytes = os.path.getsize(cache.path_for("aa" * 32)) * 2
+    assert cache.evict() == 1
+    assert not os.path.exists(cache.path_for("bb" * 32))
+    assert cache.get("aa" * 32) and cache.get("cc" * 32)
+
+def test_stale_temp_files_are_removed(tmp_path):
+    cache = TranscriptCache(str(tmp_path), max_bytes=10 ** 6, max_age_seconds=3600)
+    cache.put("aa" * 32, result("kept"))
+    stale = cache.path_for("aa" * 32) + ".dead.tmp"
+    fresh = cache.path_for("aa" * 32) + ".live.tmp"
+    for path in (stale, fresh):
+        with open(path, 'w') as f:
+            f.write("{")
+    age(stale, 3000)
+    cache.evict()
+    assert not os.path.exists(stale) and os.path.exists(fresh)
+    assert cache.get("aa" * 32)
+
+def test_janitor_trims_the_transcript_cache(tmp_path, monkeypatch):
+    cache = TranscriptCache(str(tmp_path / 'transcripts'), max_bytes=0, max_age_seconds=3600)
+    cache.put("aa" * 32, result("x"))
+    store = output_store.OutputStore(str(tmp_path / 'outputs'), max_bytes=10 ** 9, max_age_seconds=3600)
+    monkeypatch.setattr(output_store, 'get_output_store', lambda: store)
+    monkeypatch.setattr(output_store, 'sweep_scratch', lambda: 0)
+    monkeypatch.setattr(output_store, 'get_transcript_cache', lambda: cache)
+
+    async def one_pass():
+        janitor = asyncio.create_task(output_store.run_janitor(interval=3600))
+        while cache.evictions == 0:
+            await asyncio.sleep(0.01)
+        janitor.cancel()
+    asyncio.run(asyncio.wait_for(one_pass(), 5))
+    assert not os.path.exists(cache.path_for("aa" * 32))
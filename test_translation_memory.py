@@ -0,0 +1,33 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers import translation
+from app.translation_memory import TranslationMemory
+
+@pytest.fixture
+def memory(tmp_path):
+    memory = TranslationMemory(str(tmp_path / 'tm.db'), lru_size=100, ttl_seconds=0)
+    memory.put_many([("Hello.", "Bonjour."), ("Bye.", "Au revoir.")], 'en', 'fr')
+    memory.put_many([("Hello.", "Hola.")], 'en', 'es')
+    return memory
+
+@pytest.fixture
+def client(memory, monkeypatch):
+    monkeypatch.setattr(translation, 'get_translation_memory', lambda: memory)
+    api = FastAPI()
+    api.include_router(translation.router)
+    return TestClient(api)
+
+def test_unfiltered_delete_is_refused(client, memory):
+    for query in ("", "?source_text=&target_language="):
+        assert client.delete(f"/api/translation-memory{query}").status_code == 400
+    assert memory.get_many(["Hello.", "Bye."], 'en', 'fr') == {"Hello.": "Bonjour.", "Bye.": "Au revoir."}
+
+def test_delete_by_language(client, memory):
+    assert client.delete("/api/translation-memory?target_language=fr").json() == {"removed": 2}
+    assert memory.get_many(["Hello."], 'en', 'fr') == {}
+    assert memory.get_many(["Hello."], 'en', 'es') == {"Hello.": "Hola."}
+
+def test_delete_one_text(client, memory):
+    assert client.delete("/api/translation-memory", params={'source_text': " Hello. "}).json() == {"removed": 2}
+    assert memory.get_many(["Hello.", "Bye."], 'en', 'fr') == {"Bye.": "Au revoir."}
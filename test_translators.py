@@ -0,0 +1,64 @@
+import app.pipeline as pipeline
+from app.translators import FakeTranslatorBackend, TranslatorBackend, pack_texts
+from app.translation_memory import TranslationMemory
+
+def segments(*texts):
+    return [{'id': i, 'start': float(i), 'end': i + 0.9, 'text': text} for i, text in enumerate(texts)]
+
+def test_pack_texts_respects_the_character_limit():
+    texts = ["a" * 4, "b" * 4, "c" * 4, "d" * 12, "e"]
+    chunks = pack_texts(texts, max_chars=9)
+    # "aaaa\nbbbb" is exactly 9 characters; an over-long text goes out on its own
+    assert chunks == [[0, 1], [2], [3], [4]]
+    assert pack_texts([], max_chars=9) == []
+
+def test_batch_is_one_request_per_chunk_in_order():
+    backend = FakeTranslatorBackend(max_chars=20)
+    texts = ["one  two", "three", "four\nfive", "six"]
+    assert backend.translate_batch(texts, 'en', 'ta') == ["[ta] one two", "[ta] three", "[ta] four five", "[ta] six"]
+    # Whitespace (including line breaks) is collapsed before packing, so delimiters stay unambiguous
+    assert backend.requests == ["one two\nthree", "four five\nsix"]
+
+class MergingBackend(TranslatorBackend):
+    """A provider that merges lines in multi-line payloads and fails on one text"""
+
+    def __init__(self):
+        self.requests = []
+
+    def translate_chunk(self, text, source_lang, target_lang):
+        self.requests.append(text)
+        if text == "broken":
+            raise ConnectionError("provider down")
+        return text.upper().replace("\n", " ")
+
+def test_mismatched_lines_fall_back_to_single_requests():
+    backend = MergingBackend()
+    assert backend.translate_batch(["hello", "broken", "world"], 'en', 'fr') == ["HELLO", "broken", "WORLD"]
+    assert backend.requests == ["hello\nbroken\nworld", "hello", "broken", "world"]
+
+def test_translate_segments_dedupes_and_skips_silence(monkeypatch):
+    monkeypatch.setattr(pipeline, 'get_translation_memory', lambda: None)
+    backend = FakeTranslatorBackend()
+    translations, stats = pipeline.translate_segments(segments("Hi.", "  ", "Bye.", "Hi."), 'ta', 'en', backend=backend)
+    assert translations == {0: "[ta] Hi.", 2: "[ta] Bye.", 3: "[ta] Hi."}
+    assert backend.requests == ["Hi.\nBye."]
+    assert stats == {'hits': 0, 'misses': 3, 'hit_ratio': 0.0}
+    assert pipeline.join_translations(segments("Hi.", "  ", "Bye.", "Hi."), translations) == "[ta] Hi. [ta] Bye. [ta] Hi."
+
+def test_translate_segments_reuses_translation_memory(monkeypatch, tmp_path):
+    memory = TranslationMemory(str(tmp_path / 'tm.db'), lru_size=100, ttl_seconds=0)
+    monkeypatch.setattr(pipeline, 'get_translation_memory', lambda: memory)
+    first = FakeTranslatorBackend()
+    pipeline.translate_segments(segments("Good morning."), 'ta', 'en', backend=first)
+    second = FakeTranslatorBackend()
+    translations, stats = pipeline.translate_segments(segments("Good  morning.", "Good night."), 'ta', 'en', backend=second)
+    assert translations == {0: "[ta] Good morning.", 1: "[ta] Good night."}
+    assert second.requests == ["Good night."]
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+def test_provider_errors_are_not_remembered(monkeypatch, tmp_path):
+    memory = TranslationMemory(str(tmp_path / 'tm.db'), lru_size=100, ttl_seconds=0)
+    monkeypatch.setattr(pipeline, 'get_translation_memory', lambda: memory)
+    translations, _ = pipeline.translate_segments(segments("broken"), 'fr', 'en', backend=MergingBackend())
+    assert translations == {0: "broken"}
+    assert memory.get_many(["broken"], 'en', 'fr') == {}
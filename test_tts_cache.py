@@ -0,0 +1,70 @@
+import os
+import threading
+import app.tts_cache as tts_cache
+from app.tts_cache import TTSCache, cache_key, cache_leases
+
+def make_clip(tmp_path, name, size=1024):
+    path = tmp_path / name
+    path.write_bytes(b"\0" * size)
+    return str(path)
+
+def make_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_cache, 'EVICTION_GRACE_SECONDS', 0)
+    return TTSCache(str(tmp_path / 'cache'), max_bytes=10 ** 9, max_age_seconds=3600)
+
+def fill(cache):
+    # No grace window and no room left: anything unpinned goes on the next scan
+    cache.max_bytes = 0
+
+def test_cache_key_normalizes_text():
+    assert cache_key("  hello\n world ", "voice", "edge") == cache_key("hello world", "voice", "edge")
+    assert cache_key("hello", "voice", "edge") != cache_key("hello", "voice", "bark")
+    assert cache_key("hello", "voice", "bark", "v2/en_speaker_1") != cache_key("hello", "voice", "bark", "v2/en_speaker_2")
+
+def test_entries_held_by_a_run_survive_eviction(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch)
+    stored = cache.put("aa" * 32, ".mp3", make_clip(tmp_path, "first.mp3"))
+    fill(cache)
+    with cache_leases():
+        hit = cache.get("aa" * 32, ".mp3")
+        fresh = cache.put("bb" * 32, ".mp3", make_clip(tmp_path, "second.mp3"))
+        cache.evict()
+        assert os.path.exists(hit) and os.path.exists(fresh)
+    cache.evict()
+    assert not os.path.exists(stored)
+    assert not os.path.exists(fresh)
+    assert cache.stats()['evictions'] == 2
+
+def test_leases_are_per_run(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch)
+    cache.put("aa" * 32, ".mp3", make_clip(tmp_path, "clip.mp3"))
+    fill(cache)
+    run_started = threading.Event()
+    run_done = threading.Event()
+
+    def long_run():
+        with cache_leases():
+            cache.get("aa" * 32, ".mp3")
+            run_started.set()
+            run_done.wait(5)
+
+    thread = threading.Thread(target=long_run)
+    thread.start()
+    run_started.wait(5)
+    with cache_leases():
+        # A second run using and then releasing the same clip must not unpin it for the first
+        assert cache.get("aa" * 32, ".mp3")
+    cache.evict()
+    assert cache.pinned(cache.path_for("aa" * 32, ".mp3"))
+    run_done.set()
+    thread.join()
+    cache.evict()
+    assert not cache.pinned(cache.path_for("aa" * 32, ".mp3"))
+    assert cache.get("aa" * 32, ".mp3") is None
+
+def test_misses_are_not_pinned(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch)
+    with cache_leases() as leases:
+        assert cache.get("cc" * 32, ".mp3") is None
+        assert leases == []
+    assert cache.stats()['misses'] == 1
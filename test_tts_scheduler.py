@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+import app.tts_scheduler as tts_scheduler
+from app.tts_scheduler import synthesize_in_order, backoff_delay
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(tts_scheduler, 'backoff_delay', lambda attempt: 0)
+
+def flaky(error, failures):
+    calls = []
+
+    async def synth(item):
+        calls.append(item)
+        if len(calls) <= failures:
+            raise error
+        return f"{item}.mp3"
+    return synth, calls
+
+@pytest.mark.parametrize('error', [ConnectionResetError("reset"), TimeoutError(), asyncio.TimeoutError()])
+def test_network_errors_are_retried(error):
+    synth, calls = flaky(error, failures=2)
+    assert asyncio.run(synthesize_in_order(["a"], synth, rate=0, max_retries=3)) == ["a.mp3"]
+    assert len(calls) == 3
+
+@pytest.mark.parametrize('error', [FileNotFoundError("clip.mp3"), PermissionError("static/audio"), OSError(28, "No space left on device")])
+def test_local_os_errors_fail_at_once(error):
+    synth, calls = flaky(error, failures=1)
+    with pytest.raises(OSError):
+        asyncio.run(synthesize_in_order(["a"], synth, rate=0, max_retries=3))
+    assert len(calls) == 1
+
+def test_retries_give_up_after_max_retries():
+    synth, calls = flaky(ConnectionError("down"), failures=10)
+    with pytest.raises(ConnectionError):
+        asyncio.run(synthesize_in_order(["a"], synth, rate=0, max_retries=2))
+    assert len(calls) == 3
+
+def test_results_keep_input_order():
+    async def synth(item):
+        await asyncio.sleep(0.01 * (3 - item))
+        return item * 10
+    assert asyncio.run(synthesize_in_order([0, 1, 2], synth, max_in_flight=3, rate=0)) == [0, 10, 20]
+
+def test_backoff_is_capped():
+    assert all(0 <= backoff_delay(attempt, base=0.5, cap=2) <= 2 for attempt in range(10))
@@ -0,0 +1,159 @@
+import os
+import time
+import asyncio
+import hashlib
+import pytest
+from app.uploads import (
+    sniff_media_type, display_name, save_upload, UploadSessions,
+    UploadTooLargeError, UnsupportedMediaError, UploadOffsetError, SNIFF_BYTES
+)
+
+MP4 = b'\x00\x00\x00\x20ftypisom\x00\x00\x02\x00' + bytes(range(256)) * 8
+
+@pytest.mark.parametrize('header,extension', [
+    (MP4, '.mp4'),
+    (b'\x00\x00\x00\x1cftypM4A \x00\x00\x00\x00', '.m4a'),
+    (b'\x00\x00\x00\x14ftypqt  \x00\x00\x00\x00', '.mov'),
+    (b'\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01\x42\x82\x84webm', '.webm'),
+    (b'\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01\x42\x82\x88matroska', '.mkv'),
+    (b'RIFF\x24\x00\x00\x00WAVEfmt ', '.wav'),
+    (b'RIFF\x24\x00\x00\x00AVI LIST', '.avi'),
+    (b'ID3\x04\x00\x00\x00\x00\x00\x00', '.mp3'),
+    (b'\xff\xfb\x90\x00', '.mp3'),
+    (b'\xff\xf1\x50\x80', '.aac'),
+    (b'OggS\x00\x02', '.ogg'),
+    (b'fLaC\x00\x00', '.flac'),
+    (b'\x47' + b'\x00' * 187 + b'\x47' + b'\x00' * 10, '.ts'),
+])
+def test_sniff_recognises_containers(header, extension):
+    assert sniff_media_type(header) == extension
+
+@pytest.mark.parametrize('header', [b'', b'<html><body>', b'%PDF-1.7', b'PK\x03\x04', b'\x47\x00\x00'])
+def test_sniff_rejects_non_media(header):
+    assert sniff_media_type(header) is None
+
+def test_display_name_is_never_a_path():
+    assert display_name("../../etc/passwd") == "passwd"
+    assert display_name("C:\\videos\\my clip (1).mp4") == "my clip _1_.mp4"
+    assert display_name("...") == "upload"
+    assert display_name(None) == "upload"
+
+class FakeUpload:
+    """The parts of Starlette's UploadFile that save_upload uses"""
+
+    def __init__(self, data: bytes, filename: str = "clip.mp4", chunk: int = 1000):
+        self.data = data
+        self.filename = filename
+        self.chunk = chunk
+        self.reads = 0
+
+    async def read(self, size):
+        start = self.reads * self.chunk
+        self.reads += 1
+        return self.data[start:start + min(size, self.chunk)]
+
+def test_save_upload_hashes_while_streaming(tmp_path):
+    stored = asyncio.run(save_upload(FakeUpload(MP4), str(tmp_path)))
+    assert stored.extension == '.mp4' and stored.path.endswith('.mp4')
+    assert stored.size == len(MP4)
+    assert stored.source_key == f"sha256:{hashlib.sha256(MP4).hexdigest()}"
+    with open(stored.path, 'rb') as f:
+        assert f.read() == MP4
+    assert os.listdir(tmp_path) == [os.path.basename(stored.path)]
+
+def test_save_upload_rejects_non_media_after_the_first_chunk(tmp_path):
+    upload = FakeUpload(b'<html>' + b'x' * 5000)
+    with pytest.raises(UnsupportedMediaError):
+        asyncio.run(save_upload(upload, str(tmp_path)))
+    assert upload.reads == 1
+    assert os.listdir(tmp_path) == []
+
+def test_save_upload_enforces_the_size_limit(tmp_path):
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(save_upload(FakeUpload(MP4), str(tmp_path), max_bytes=1500))
+    assert os.listdir(tmp_path) == []
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+def test_resumable_upload_survives_a_restart(tmp_path):
+    sessions = UploadSessions(str(tmp_path))
+    upload_id = sessions.create("clip.mp4", len(MP4))['upload_id']
+    first = asyncio.run(sessions.append(upload_id, 0, chunks(MP4[:300], MP4[300:700])))
+    assert first['offset'] == 700 and not first['complete']
+
+    # A chunk that doesn't start where the stored bytes end is refused with the right offset
+    with pytest.raises(UploadOffsetError) as error:
+        asyncio.run(sessions.append(upload_id, 300, chunks(MP4[300:])))
+    assert error.value.offset == 700
+
+    # A new process has no in-memory digest: it is rebuilt from the part file
+    restarted = UploadSessions(str(tmp_path))
+    assert restarted.status(upload_id)['offset'] == 700
+    done = asyncio.run(restarted.append(upload_id, 700, chunks(MP4[700:])))
+    assert done['complete'] and done['offset'] == len(MP4)
+    assert done['sha256'] == hashlib.sha256(MP4).hexdigest()
+
+    stored = restarted.claim(upload_id)
+    with open(stored.path, 'rb') as f:
+        assert f.read() == MP4
+    with pytest.raises(KeyError):
+        restarted.status(upload_id)
+
+def test_resumable_upload_sniffs_once_the_header_is_in(tmp_path):
+    sessions = UploadSessions(str(tmp_path))
+    data = b'MZ' + b'\x00' * (SNIFF_BYTES * 2)
+    upload_id = sessions.create("setup.exe", len(data))['upload_id']
+    # Below SNIFF_BYTES nothing can be decided yet
+    assert asyncio.run(sessions.append(upload_id, 0, chunks(data[:100])))['offset'] == 100
+    with pytest.raises(UnsupportedMediaError):
+        asyncio.run(sessions.append(upload_id, 100, chunks(data[100:])))
+    assert os.listdir(tmp_path) == []
+
+def test_incomplete_upload_cannot_be_claimed(tmp_path):
+    sessions = UploadSessions(str(tmp_path))
+    upload_id = sessions.create("clip.mp4", len(MP4))['upload_id']
+    asyncio.run(sessions.append(upload_id, 0, chunks(MP4[:SNIFF_BYTES])))
+    with pytest.raises(UploadOffsetError) as error:
+        sessions.claim(upload_id)
+    assert error.value.offset == SNIFF_BYTES
+
+def test_chunks_past_the_declared_size_are_refused(tmp_path):
+    sessions = UploadSessions(str(tmp_path))
+    upload_id = sessions.create("clip.mp4", 600)['upload_id']
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(sessions.append(upload_id, 0, chunks(MP4[:700])))
+
+def test_discarding_a_completed_upload_removes_its_media(tmp_path):
+    sessions = UploadSessions(str(tmp_path))
+    upload_id = sessions.create("clip.mp4", len(MP4))['upload_id']
+    assert asyncio.run(sessions.append(upload_id, 0, chunks(MP4)))['complete']
+    assert os.path.exists(sessions.media_path(upload_id))
+    sessions.discard(upload_id)
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(KeyError):
+        sessions.status(upload_id)
+
+def test_claimed_media_is_left_to_the_job(tmp_path):
+    sessions = UploadSessions(str(tmp_path))
+    upload_id = sessions.create("clip.mp4", len(MP4))['upload_id']
+    asyncio.run(sessions.append(upload_id, 0, chunks(MP4)))
+    stored = sessions.claim(upload_id)
+    # Once claimed, the session is gone and a late DELETE must not pull the file from under the job
+    sessions.discard(upload_id)
+    assert os.listdir(tmp_path) == [os.path.basename(stored.path)]
+
+def test_expire_removes_uploads_left_behind_by_a_stopped_server(tmp_path):
+    sessions = UploadSessions(str(tmp_path))
+    upload_id = sessions.create("clip.mp4", len(MP4))['upload_id']
+    stray = tmp_path / '0b6e1c2a-0000-4000-8000-000000000000.mp4'
+    stray.write_bytes(MP4)
+    recent = tmp_path / '1c7f2d3b-0000-4000-8000-000000000000.mp4'
+    recent.write_bytes(MP4)
+    old = time.time() - 7200
+    os.utime(stray, (old, old))
+    assert sessions.expire(max_age_seconds=3600) == 1
+    assert not stray.exists() and recent.exists()
+    # A live session's own files are only judged by their session
+    assert sessions.status(upload_id)['offset'] == 0
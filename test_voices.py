@@ -0,0 +1,88 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.voices import parse_voices, VoiceCatalog, load_voice_catalog
+from app.routers import translation
+
+TABLE = """Name                               Gender    ContentCategories      VoicePersonalities
+---------------------------------  --------  ---------------------  --------------------------------------
+en-US-AndrewNeural                 Male      Conversation, Copilot  Warm, Confident, Authentic, Honest
+en-US-EmmaNeural                   Female    Conversation, Copilot  Cheerful, Clear, Conversational
+iu-Latn-CA-SiqiniqNeural           Female    General                Friendly, Positive
+ta-IN-PallaviNeural                Female    General                Friendly, Positive
+ta-IN-ValluvarNeural               Male      General                Friendly, Positive
+zh-CN-liaoning-XiaobeiNeural       Female    Dialect                Humorous
+sw-KE-RafikiNeural                 Male
+"""
+
+@pytest.fixture
+def catalog():
+    return VoiceCatalog(parse_voices(TABLE))
+
+def test_parse_reads_every_column_and_compound_locales():
+    voices = {voice['name']: voice for voice in parse_voices(TABLE)}
+    assert len(voices) == 7
+    assert voices['en-US-AndrewNeural'] == {
+        'name': 'en-US-AndrewNeural', 'locale': 'en-US', 'language': 'en', 'gender': 'male',
+        'categories': ['Conversation', 'Copilot'], 'personalities': ['Warm', 'Confident', 'Authentic', 'Honest'],
+    }
+    assert voices['iu-Latn-CA-SiqiniqNeural']['locale'] == 'iu-Latn-CA'
+    assert voices['zh-CN-liaoning-XiaobeiNeural']['locale'] == 'zh-CN-liaoning'
+    assert voices['zh-CN-liaoning-XiaobeiNeural']['language'] == 'zh'
+    # Rows with missing trailing columns still parse
+    assert voices['sw-KE-RafikiNeural']['categories'] == [] and voices['sw-KE-RafikiNeural']['personalities'] == []
+
+def test_defaults_prefer_the_configured_voice_then_the_first_of_a_gender(catalog):
+    assert catalog.defaults[('ta', 'female')] == 'ta-IN-PallaviNeural'
+    assert catalog.defaults[('ta', 'male')] == 'ta-IN-ValluvarNeural'
+    assert catalog.defaults[('zh', 'female')] == 'zh-CN-liaoning-XiaobeiNeural'
+    # A language without a voice of that gender falls back to one of its own voices
+    assert catalog.defaults[('sw', 'female')] == 'sw-KE-RafikiNeural'
+
+def test_resolve_and_knows(catalog):
+    assert catalog.resolve('en-US-EmmaNeural', 'ta') == 'en-US-EmmaNeural'
+    assert catalog.resolve('Male', 'ta-IN') == 'ta-IN-ValluvarNeural'
+    # Unknown gender words mean female; languages without voices use English
+    assert catalog.resolve('robot', 'ta') == 'ta-IN-PallaviNeural'
+    assert catalog.resolve('male', 'xx') == 'en-US-AndrewNeural'
+    assert catalog.knows('zh-CN-liaoning-XiaobeiNeural') and catalog.knows('FEMALE')
+    assert not catalog.knows('en-US-NobodyNeural') and not catalog.knows(None)
+
+def test_bundled_catalog_loads_from_utf16():
+    catalog = load_voice_catalog('voices.txt')
+    assert len(catalog.voices) > 300
+    for language, genders in [('hi', ('hi-IN-SwaraNeural', 'hi-IN-MadhurNeural')), ('ml', ('ml-IN-SobhanaNeural', 'ml-IN-MidhunNeural'))]:
+        assert (catalog.defaults[(language, 'female')], catalog.defaults[(language, 'male')]) == genders
+
+def test_payload_groups_voices_by_language(catalog):
+    payload = json.loads(catalog.payload)
+    assert list(payload['languages']) == sorted(payload['languages'])
+    assert payload['languages']['ta']['default'] == {'female': 'ta-IN-PallaviNeural', 'male': 'ta-IN-ValluvarNeural'}
+    assert payload['languages']['ta']['voices'][0] == {
+        'name': 'ta-IN-PallaviNeural', 'locale': 'ta-IN', 'gender': 'female', 'personalities': ['Friendly', 'Positive']
+    }
+
+def test_etag_follows_the_payload(catalog):
+    assert catalog.etag == VoiceCatalog(parse_voices(TABLE)).etag
+    fewer = VoiceCatalog(parse_voices(TABLE.replace("sw-KE-RafikiNeural                 Male\n", "")))
+    assert fewer.etag != catalog.etag
+
+def test_voices_endpoint_revalidates_with_etag(catalog, monkeypatch):
+    monkeypatch.setattr(translation, 'get_voice_catalog', lambda: catalog)
+    app = FastAPI()
+    app.include_router(translation.router)
+    client = TestClient(app)
+
+    first = client.get('/api/voices')
+    assert first.status_code == 200
+    assert first.content == catalog.payload
+    assert first.headers['etag'] == catalog.etag
+    assert first.headers['cache-control'] == 'public, max-age=3600'
+
+    revalidated = client.get('/api/voices', headers={'If-None-Match': catalog.etag})
+    assert revalidated.status_code == 304 and revalidated.content == b''
+    assert revalidated.headers['etag'] == catalog.etag
+    # One of several cached tags is enough
+    assert client.get('/api/voices', headers={'If-None-Match': f'"stale", {catalog.etag}'}).status_code == 304
+    assert client.get('/api/voices', headers={'If-None-Match': '"stale"'}).status_code == 200